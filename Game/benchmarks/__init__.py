@@ -0,0 +1,2 @@
+# Fixed-seed engine benchmarks.  Run them with "python -m Game.benchmarks.suite run" and compare the last two runs in
+# the history file with "python -m Game.benchmarks.suite compare".
@@ -0,0 +1,176 @@
+from Game import gamecache, parser, randomplayer, selectorcompiler, selectorparser
+from Game.game import Game, GameDefinition
+from lxml import etree
+import os
+
+# Each scenario takes the path of the game to use, does its setup, and returns a function that runs the measured work
+# once together with the number of operations that work performs.  Everything random is seeded, so a scenario does
+# the same work on every run.
+
+DEFAULT_GAME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "games", "race.xml")
+SEED = 1
+GAMES = 5
+# Decisions played before measuring anything that needs a game in progress
+WARMUP_DECISIONS = 40
+SELECTOR_CALLS = 20000
+MOVE_LOOPS = 2000
+NETWORK_INPUTS = 200
+NETWORK_BATCH = 256
+
+scenarios = {}
+
+
+def scenario(name: str):
+    def register(function):
+        scenarios[name] = function
+        return function
+    return register
+
+
+def load_definition(game_path: str) -> GameDefinition:
+    return gamecache.load_definition(game_path, None)
+
+
+def game_in_progress(game_path: str, num_players: int = 2) -> Game:
+    game = load_definition(game_path).new_game(SEED)
+    decision = game.begin([randomplayer.RandomPlayer(index) for index in range(num_players)])
+    for _ in range(WARMUP_DECISIONS):
+        if decision is None:
+            break
+        decision = game.resume(decision.ask())
+    return game
+
+
+@scenario("parse")
+def parse_only(game_path: str):
+    with open(game_path, "rb") as file:
+        content = file.read()
+
+    def run():
+        selectorparser.parsed.clear()
+        parser.parse_definition_string(content)
+    return run, 1
+
+
+def play_random_games(game_path: str, num_players: int):
+    definition = load_definition(game_path)
+
+    def run():
+        for seed in range(SEED, SEED + GAMES):
+            definition.new_game(seed).start([randomplayer.RandomPlayer(index) for index in range(num_players)])
+    return run, GAMES
+
+
+@scenario("game-2-random")
+def two_random_players(game_path: str):
+    return play_random_games(game_path, 2)
+
+
+@scenario("game-4-random")
+def four_random_players(game_path: str):
+    return play_random_games(game_path, 4)
+
+
+# The same games as game-2-random on a TracingMachine with a tracer that does nothing, to show the cost of tracing
+# next to the untraced games
+@scenario("game-2-random-traced")
+def two_random_players_traced(game_path: str):
+    from Game.tracing import Tracer, TracingMachine
+    definition = load_definition(game_path)
+    tracer = Tracer()
+
+    def create_machine(game_state):
+        return TracingMachine(game_state, tracer)
+
+    def run():
+        for seed in range(SEED, SEED + GAMES):
+            definition.new_game(seed).start([randomplayer.RandomPlayer(index) for index in range(2)], create_machine)
+    return run, GAMES
+
+
+def call_selector(game_path: str, expression: str, selector_type):
+    game = game_in_progress(game_path)
+    selector = selectorparser.parse(expression, selector_type)
+    selectorcompiler.install(selector, set())
+    game_state = game.state
+
+    def run():
+        for _ in range(SELECTOR_CALLS):
+            selector.select(game_state)
+    return run, SELECTOR_CALLS
+
+
+@scenario("selector-hand-treasure")
+def hand_treasure(game_path: str):
+    return call_selector(game_path, "player:hand:pieces[@treasure]", selectorparser.piece)
+
+
+@scenario("selector-empty-reserves")
+def empty_reserves(game_path: str):
+    return call_selector(game_path, "count(game:collections[@reserve][count(:pieces)=0])", selectorparser.numeric)
+
+
+# Moves the current player's whole hand to their bank and back, one piece at a time and all at once
+@scenario("move-pieces")
+def move_pieces(game_path: str):
+    game = game_in_progress(game_path)
+    action = parser.create_action(etree.fromstring(
+        '<action>'
+        '<move-pieces pieces="player:hand:pieces" to="player:bank" position="Last"/>'
+        '<move-pieces pieces="player:bank:pieces" to="player:hand" count="1"/>'
+        '<move-pieces pieces="player:hand:pieces" to="player:bank" position="Random"/>'
+        '<move-pieces pieces="player:bank:pieces" to="player:hand"/>'
+        '</action>'))
+    selectorcompiler.install(action, set())
+    game_state = game.state
+
+    def run():
+        for _ in range(MOVE_LOOPS):
+            for step in action.steps:
+                step.perform(game_state)
+    return run, MOVE_LOOPS * len(action.steps)
+
+
+# Encodes the same decision from scratch every time, which is what each encoding costs when every part of the state
+# changed since the last one
+@scenario("network-input")
+def network_input(game_path: str):
+    from Game import learningplayer
+    game = game_in_progress(game_path)
+    network_input = learningplayer.NeuralNetworkInput(game)
+    current_action = list(network_input.possible_steps.steps.keys())[0]
+    out = network_input.buffer.copy()
+
+    def run():
+        for _ in range(NETWORK_INPUTS):
+            network_input.generate(game.state, current_action, out)
+    return run, NETWORK_INPUTS
+
+
+# The same decision through the encoder's cache, which finds nothing changed and rewrites no block: the cheapest an
+# encoding can be, for comparison with network-input
+@scenario("network-input-cached")
+def network_input_cached(game_path: str):
+    from Game import learningplayer
+    game = game_in_progress(game_path)
+    network_input = learningplayer.NeuralNetworkInput(game)
+    current_action = list(network_input.possible_steps.steps.keys())[0]
+
+    def run():
+        for _ in range(NETWORK_INPUTS):
+            network_input.generate(game.state, current_action)
+    return run, NETWORK_INPUTS
+
+
+@scenario("network-batch")
+def network_batch(game_path: str):
+    from Game import learningplayer, networks
+    game = game_in_progress(game_path)
+    network_input = learningplayer.NeuralNetworkInput(game)
+    current_action = list(network_input.possible_steps.steps.keys())[0]
+    inputs = network_input.generate_batch([(game.state, current_action)] * NETWORK_BATCH)
+    network = networks.NumpyNetwork([network_input.input_length, network_input.input_length // 2, 1], SEED)
+
+    def run():
+        network.run_batch(inputs)
+    return run, NETWORK_BATCH
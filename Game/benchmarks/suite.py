@@ -0,0 +1,149 @@
+from Game.benchmarks.scenarios import scenarios, DEFAULT_GAME_PATH
+import click
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import traceback
+
+DEFAULT_HISTORY_PATH = "benchmark-history.json"
+REPEATS = 5
+REGRESSION_THRESHOLD = .1
+
+
+def time_scenario(name: str, game_path: str, repeats: int) -> dict:
+    try:
+        run, operations = scenarios[name](game_path)
+        run()
+        times = []
+        for _ in range(repeats):
+            gc.collect()
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+    except Exception as e:
+        return {"error": type(e).__name__ + ": " + str(e).splitlines()[0] if str(e) else type(e).__name__,
+                "traceback": traceback.format_exc()}
+    best = min(times)
+    return {
+        "operations": operations,
+        "best": best,
+        "median": statistics.median(times),
+        "ops_per_sec": operations / best,
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def read_history(path: str) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return json.load(file)
+
+
+def write_history(path: str, history: list):
+    with open(path + ".tmp", "w") as file:
+        json.dump(history, file, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+# Returns (scenario, baseline ops/sec, current ops/sec, change) for scenarios that succeeded in both runs
+def compare_runs(baseline: dict, current: dict) -> list:
+    changes = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name, {})
+        if "ops_per_sec" in result and "ops_per_sec" in before:
+            changes.append((name, before["ops_per_sec"], result["ops_per_sec"],
+                            result["ops_per_sec"] / before["ops_per_sec"] - 1))
+    return changes
+
+
+# Returns (scenario, reason) for scenarios that succeeded in the baseline but failed in, or are missing from, the
+# current run
+def lost_scenarios(baseline: dict, current: dict) -> list:
+    lost = []
+    for name, before in baseline["results"].items():
+        if "ops_per_sec" not in before:
+            continue
+        result = current["results"].get(name)
+        if result is None:
+            lost.append((name, "missing"))
+        elif "ops_per_sec" not in result:
+            lost.append((name, "failed: " + result.get("error", "unknown error")))
+    return lost
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command()
+@click.option("--game_path", default=DEFAULT_GAME_PATH, help="Path to the game's XML")
+@click.option("--history", default=DEFAULT_HISTORY_PATH, help="JSON file the results are appended to")
+@click.option("--repeats", default=REPEATS, help="Timed runs of each scenario; the fastest is recorded", type=int)
+@click.option("--only", default=None, help="Comma delimited list of scenarios to run. Available: " +
+                                           ",".join(scenarios.keys()))
+def run(game_path: str, history: str, repeats: int, only: str):
+    names = only.split(",") if only else list(scenarios.keys())
+    results = {}
+    for name in names:
+        result = results[name] = time_scenario(name, game_path, repeats)
+        if "error" in result:
+            print("{:<26} failed: {}".format(name, result["error"]))
+        else:
+            print("{:<26} {:>12.1f} ops/sec".format(name, result["ops_per_sec"]))
+    runs = read_history(history)
+    runs.append({
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "game_path": os.path.basename(game_path),
+        "results": results,
+    })
+    write_history(history, runs)
+
+
+@cli.command()
+@click.option("--history", default=DEFAULT_HISTORY_PATH, help="JSON file written by run")
+@click.option("--baseline", default=-2, help="Index of the baseline run in the history", type=int)
+@click.option("--current", default=-1, help="Index of the run to check", type=int)
+@click.option("--threshold", default=REGRESSION_THRESHOLD, help="Slowdown that counts as a regression", type=float)
+def compare(history: str, baseline: int, current: int, threshold: float):
+    runs = read_history(history)
+    if len(runs) < 2:
+        raise click.ClickException("Need at least two runs in " + history)
+    baseline_run, current_run = runs[baseline], runs[current]
+    if baseline_run.get("game_path") != current_run.get("game_path"):
+        raise click.ClickException("The runs played different games: " + str(baseline_run.get("game_path")) +
+                                   " and " + str(current_run.get("game_path")))
+    print("Baseline: {} ({})  Current: {} ({})".format(baseline_run["date"], baseline_run["commit"],
+                                                       current_run["date"], current_run["commit"]))
+    regressions = 0
+    for name, before, after, change in compare_runs(baseline_run, current_run):
+        flag = ""
+        if change < -threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print("{:<26} {:>12.1f} -> {:>12.1f} ops/sec {:>+7.1%}{}".format(name, before, after, change, flag))
+    for name, reason in lost_scenarios(baseline_run, current_run):
+        regressions += 1
+        print("{:<26} {}  REGRESSION".format(name, reason))
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    cli()
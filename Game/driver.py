@@ -0,0 +1,35 @@
+# Plays many games in one thread.  Every game runs until it needs a decision; the pending decisions of all games are
+# then grouped by Player.batch_key() and each group is answered by a single select_batch() call, so players that share
+# a model (such as LearningPlayers sharing a network) can score every waiting game at once.
+
+
+def group_decisions(pending: dict) -> list:
+    groups = {}
+    for game, decision in pending.items():
+        games, decisions = groups.setdefault(decision.player.batch_key(), ([], []))
+        games.append(game)
+        decisions.append(decision)
+    return list(groups.values())
+
+
+# players holds one list of players for each game.  Returns the winners of each game, in the same order as games.
+# decisions, when given, holds a list of counters for each game, and counts the decisions of each seat.
+def play_games(games: list, players: list, decisions: list = None) -> list:
+    counters = dict(zip(games, decisions)) if decisions is not None else None
+    pending = {}
+    for game, game_players in zip(games, players):
+        decision = game.begin(game_players)
+        if decision is not None:
+            pending[game] = decision
+    while pending:
+        for group_games, group in group_decisions(pending):
+            answers = group[0].player.select_batch(group)
+            for game, decision, chosen in zip(group_games, group, answers):
+                if counters is not None:
+                    counters[game][decision.player.index] += 1
+                decision = game.resume(chosen)
+                if decision is None:
+                    del pending[game]
+                else:
+                    pending[game] = decision
+    return [game.state.winners for game in games]
@@ -1,5 +1,4 @@
 from Game.game import GameState
-import random
 
 
 class Filter:
@@ -41,7 +40,7 @@ class RandomFilter(Filter):
 
     def filter(self, selected, game_state: GameState):
         try:
-            return list(random.sample(selected, self.count))
+            return list(game_state.random.sample(selected, self.count))
         except ValueError:
             for collection in game_state.game.collections.values():
                 print(collection)
@@ -1,5 +1,9 @@
+from collections.abc import Sequence
 from enum import Enum
+from types import MappingProxyType
 import copy
+import operator
+import random
 
 
 class WonException(Exception):
@@ -11,9 +15,14 @@ class AccessError(Exception):
 
 
 class GameObject:
+    __slots__ = ("name", "attributes", "version")
+
     def __init__(self, name: str, has_attributes: bool):
         self.name = name
         self.attributes = {} if has_attributes else None
+        # Incremented on every change to the attributes (and, for a collection, to its contents), so that anything
+        # derived from the object can tell whether it is still current
+        self.version = 0
 
     def get_attribute(self, name: str):
         try:
@@ -23,6 +32,11 @@ class GameObject:
 
     def set_attribute(self, name: str, item):
         self.attributes[name] = item
+        self.version += 1
+
+    def remove_attribute(self, name: str):
+        del self.attributes[name]
+        self.version += 1
 
     def has_attribute(self, name):
         return name in self.attributes
@@ -31,9 +45,12 @@ class GameObject:
         return self.name
 
 
-class Game(GameObject):
+class GameDefinition:
+    # The rules of a game, as parsed from its XML.  A definition is never modified while games are played, so a
+    # single definition is shared by every Game created from it.  Collections and turns stored here are prototypes
+    # that each Game copies.
     def __init__(self, name):
-        super(Game, self).__init__(name, True)
+        self.name = name
         self.collections = {}
         """:type: dict[str, Collection]"""
         self.player_collections = {}
@@ -48,41 +65,159 @@ class Game(GameObject):
         self.max_players = 2
         self.starting_turn = None
         """:type: Turn"""
+
+    def new_game(self, seed: int = None) -> "Game":
+        return Game(self, seed)
+
+    def __repr__(self):
+        return self.name
+
+
+class Game(GameObject):
+    # A single match.  Only the mutable state (collection contents, attributes, players, turns and the GameState) is
+    # owned by the game; actions and player collection prototypes are read from the shared definition.  Piece
+    # prototypes are copied for each game (see copy_pieces).
+    def __init__(self, definition: GameDefinition, seed: int = None):
+        super(Game, self).__init__(definition.name, True)
+        self.definition = definition
+        self.collections = dict((name, copy.deepcopy(collection))
+                                for name, collection in definition.collections.items())
+        """:type: dict[str, Collection]"""
+        self.turns = dict((name, copy.deepcopy(turn)) for name, turn in definition.turns.items())
+        """:type: dict[str, Turn]"""
+        self.pieces = self.copy_pieces()
+        """:type: dict[str, Piece]"""
         self.players = []
         """:type: list[Player]"""
-        self.state = GameState(self)
+        self.state = GameState(self, seed)
+        self.machine = None
+        """:type: Machine"""
+
+    @property
+    def seed(self) -> int:
+        return self.state.seed
+
+    @property
+    def actions(self):
+        return self.definition.actions
+
+    @property
+    def player_collections(self):
+        return self.definition.player_collections
+
+    @property
+    def min_players(self):
+        return self.definition.min_players
+
+    @property
+    def max_players(self):
+        return self.definition.max_players
+
+    @property
+    def starting_turn(self):
+        return self.turns[self.definition.starting_turn.name]
+
+    # The game's own piece prototypes, so that assigning an attribute of piece::name changes this game only.  Each
+    # shares its attribute dict with the definition's prototype until the game changes an attribute (see Piece.shared).
+    # A relation parsed from a piece's <relation> points at the definition's collection, turn or piece, which no game
+    # plays with, so pieces with relations get their own dict with the relations pointed at the game's objects.
+    def copy_pieces(self) -> dict:
+        definition = self.definition
+        game_objects = dict((id(definition.collections[name]), collection)
+                            for name, collection in self.collections.items())
+        game_objects.update((id(definition.turns[name]), turn) for name, turn in self.turns.items())
+        pieces = {}
+        for name, prototype in definition.pieces.items():
+            piece = pieces[name] = Piece(name, None)
+            piece.attributes = prototype.attributes
+            piece.shared = True
+            game_objects[id(prototype)] = piece
+        for piece in pieces.values():
+            if any(id(value) in game_objects for value in piece.attributes.values()):
+                piece.attributes = dict((attribute, game_objects.get(id(value), value))
+                                        for attribute, value in piece.attributes.items())
+                piece.shared = False
+        return pieces
 
     def assign_players(self, players: list):
         self.players = players
+        for player in players:
+            player.random = random.Random(player_seed(self.seed, player.index))
         for name, collection in self.player_collections.items():
             for player in players:
                 player.collections[name] = copy.deepcopy(collection)
 
-    def start(self, players: list):
+    # create_machine(game_state) replaces the plain Machine, e.g. with a profiling one
+    def begin(self, players: list, create_machine=None):
         if players:
             self.assign_players(players)
-        try:
-            import sys
-            sys.setrecursionlimit(1500)
-            self.starting_turn.perform([self.players[0]], self.state)
-        except WonException:
-            pass
-        for player in players:
+        from Game.machine import Machine
+        self.machine = (create_machine or Machine)(self.state)
+        self.machine.push_turn(self.starting_turn, [self.players[0]], False)
+        return self.advance()
+
+    # Runs the game until a player has to make a decision and returns that Decision, or returns None once the game
+    # has ended.  Answer a decision by passing the chosen items to resume().
+    def advance(self):
+        decision = self.machine.run_until_decision()
+        if decision is None:
+            self.finish()
+        return decision
+
+    def resume(self, chosen: list):
+        self.machine.resume(chosen)
+        return self.advance()
+
+    # Captures only the mutable state of the game, so search players can play a position out and return to it.
+    # Snapshots must be restored newest first; a restored snapshot can be restored again.
+    def snapshot(self) -> "Snapshot":
+        snapshot = self.state.snapshot()
+        if self.machine is not None:
+            snapshot.frames = [copy.copy(frame) for frame in self.machine.frames]
+            snapshot.pending = self.machine.pending
+        return snapshot
+
+    def restore(self, snapshot: "Snapshot"):
+        self.state.restore(snapshot)
+        if self.machine is not None:
+            self.machine.frames[:] = [copy.copy(frame) for frame in snapshot.frames]
+            self.machine.pending = snapshot.pending
+
+    def finish(self):
+        for player in self.players:
             if player in self.state.winners:
                 player.won()
             else:
                 player.lost()
         return self.state.winners
 
+    def start(self, players: list, create_machine=None):
+        decision = self.begin(players, create_machine)
+        while decision is not None:
+            decision = self.resume(decision.ask())
+        return self.state.winners
+
     def __getitem__(self, item):
         if item == "collections":
             return list(self.collections.values())
         return [self.collections[item]]
 
 
+# Each seat draws from its own stream, so a player's choices do not shift the game's shuffles or another player's
+# choices.  All of them follow from the game's seed.
+def player_seed(seed: int, index: int) -> str:
+    return "player " + str(index) + " of " + str(seed)
+
+
 class GameState:
-    def __init__(self, game: Game):
+    def __init__(self, game: Game, seed: int = None):
         self.game = game
+        # All randomness in the rules goes through this stream.  Without a seed one is drawn from the random module,
+        # so a script that seeds random still plays the same games.
+        if seed is None:
+            seed = random.getrandbits(63)
+        self.seed = seed
+        self.random = random.Random(seed)
         self.player = None
         """:type: Player"""
         self.vars = {}
@@ -91,6 +226,14 @@ class GameState:
         self.turns = []
 
         self.winners = []
+        # Number of times a player has started a turn
+        self.turns_played = 0
+        # Undo journal, only kept while a snapshot may still be restored (see snapshot())
+        self.journal = None
+        """:type: list[tuple]"""
+        self.journaled = set()
+        # Set for games running on a TracingMachine
+        self.tracer = None
 
     def set_player(self, player):
         self.player = player
@@ -112,6 +255,85 @@ class GameState:
     def set_selected(self, selected):
         self.selected = selected
 
+    # Collection contents and attributes are saved the first time they change after a snapshot, so restoring a
+    # snapshot costs as much as the state that changed since it was taken.  Steps call these before mutating.
+    def record_pieces(self, collection: "Collection"):
+        if self.journal is not None and id(collection) not in self.journaled:
+            self.journaled.add(id(collection))
+            self.journal.append((collection, list(collection.pieces)))
+
+    def record_attribute(self, game_object: GameObject, name: str):
+        if self.journal is not None and (id(game_object), name) not in self.journaled:
+            self.journaled.add((id(game_object), name))
+            attributes = game_object.attributes
+            self.journal.append((game_object, name, attributes[name] if name in attributes else missing))
+
+    def snapshot(self) -> "Snapshot":
+        if self.journal is None:
+            self.journal = []
+        self.journaled = set()
+        return Snapshot(self)
+
+    def restore(self, snapshot: "Snapshot"):
+        journal = self.journal
+        assert(journal is not None and len(journal) >= snapshot.mark), "Snapshot was already released"
+        # The oldest entry for each collection or attribute is the one to go back to.  Every collection is emptied
+        # before any is refilled, as refilling one relinks pieces that are still linked into another.
+        contents = {}
+        attributes = {}
+        while len(journal) > snapshot.mark:
+            entry = journal.pop()
+            if len(entry) == 2:
+                contents[entry[0]] = entry[1]
+            else:
+                attributes[(id(entry[0]), entry[1])] = entry
+        for collection in contents:
+            collection.detach_pieces()
+        for collection, pieces in contents.items():
+            collection.set_pieces(pieces)
+        for game_object, name, value in attributes.values():
+            if value is missing:
+                game_object.remove_attribute(name)
+            else:
+                game_object.set_attribute(name, value)
+        self.journaled = set()
+        self.player = snapshot.player
+        self.vars = dict(snapshot.vars)
+        self.selected = snapshot.selected
+        self.turns = list(snapshot.turns)
+        self.winners = list(snapshot.winners)
+        self.turns_played = snapshot.turns_played
+        self.random.setstate(snapshot.random)
+
+    # Stops journaling; snapshots taken so far can no longer be restored
+    def release_snapshots(self):
+        self.journal = None
+        self.journaled = set()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["journal"] = None
+        state["journaled"] = set()
+        state["tracer"] = None
+        return state
+
+
+missing = object()
+
+
+class Snapshot:
+    def __init__(self, game_state: GameState):
+        self.mark = len(game_state.journal)
+        self.player = game_state.player
+        self.vars = dict(game_state.vars)
+        self.selected = game_state.selected
+        self.turns = list(game_state.turns)
+        self.winners = list(game_state.winners)
+        self.turns_played = game_state.turns_played
+        self.random = game_state.random.getstate()
+        self.frames = None
+        self.pending = None
+
 
 class Visibility(Enum):
     Hidden = 0,
@@ -120,7 +342,157 @@ class Visibility(Enum):
     Public = 3,
 
 
+order_key = operator.attrgetter("order")
+
+
+class AttributeIndex:
+    # The pieces of a collection that have one attribute, and the same pieces grouped by the attribute's value.  Both
+    # are dicts used as ordered sets, so adding and removing a piece is O(1).
+    def __init__(self, name: str, pieces: list):
+        self.name = name
+        self.pieces = {}
+        """:type: dict[Piece, object]"""
+        self.values = {}
+        """:type: dict[object, dict[Piece, None]]"""
+        for piece in pieces:
+            self.add(piece)
+
+    def add(self, piece: "Piece"):
+        attributes = piece.attributes
+        if self.name in attributes:
+            value = attributes[self.name]
+            self.pieces[piece] = value
+            self.values.setdefault(value, {})[piece] = None
+
+    def remove(self, piece: "Piece"):
+        if piece in self.pieces:
+            value = self.pieces.pop(piece)
+            matching = self.values[value]
+            del matching[piece]
+            if not matching:
+                del self.values[value]
+
+
+class PieceList(Sequence):
+    # The pieces of a collection, from the last piece (index 0) to the first (index -1).  Each piece links to its
+    # neighbours, so removing a piece or adding one at either end costs O(1) however large the collection is.
+    # Reading it as a list (iterating, indexing, slicing) uses a list that is built on demand and dropped on the next
+    # change; callers may keep that list, but must not change it.
+    def __init__(self):
+        self.head = None
+        """:type: Piece"""
+        self.tail = None
+        """:type: Piece"""
+        self.length = 0
+        self.cache = []
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return iter(self.as_list())
+
+    def __getitem__(self, item):
+        if item == -1 and self.tail is not None and type(item) is int:
+            return self.tail
+        if item == 0 and self.head is not None and type(item) is int:
+            return self.head
+        return self.as_list()[item]
+
+    def __contains__(self, piece):
+        return piece in self.as_list()
+
+    def __eq__(self, other):
+        return self.as_list() == list(other)
+
+    def __repr__(self):
+        return repr(self.as_list())
+
+    def __getstate__(self):
+        return self.as_list()
+
+    def __setstate__(self, state):
+        self.head = self.tail = None
+        self.length = 0
+        self.reset(state)
+
+    def as_list(self) -> list:
+        if self.cache is None:
+            cache = []
+            piece = self.head
+            while piece is not None:
+                cache.append(piece)
+                piece = piece.next_piece
+            self.cache = cache
+        return self.cache
+
+    def at(self, position: int) -> "Piece":
+        if self.cache is not None:
+            return self.cache[position]
+        if position < self.length // 2:
+            piece = self.head
+            for _ in range(position):
+                piece = piece.next_piece
+        else:
+            piece = self.tail
+            for _ in range(self.length - 1 - position):
+                piece = piece.previous_piece
+        return piece
+
+    # Links pieces, in order, in front of the piece before, or at the end when before is None
+    def insert(self, pieces: list, before: "Piece" = None):
+        if not pieces:
+            return
+        previous = self.tail if before is None else before.previous_piece
+        for piece in pieces:
+            piece.previous_piece = previous
+            if previous is None:
+                self.head = piece
+            else:
+                previous.next_piece = piece
+            previous = piece
+        previous.next_piece = before
+        if before is None:
+            self.tail = previous
+        else:
+            before.previous_piece = previous
+        self.length += len(pieces)
+        self.cache = None
+
+    def remove(self, piece: "Piece"):
+        previous = piece.previous_piece
+        following = piece.next_piece
+        if previous is None:
+            self.head = following
+        else:
+            previous.next_piece = following
+        if following is None:
+            self.tail = previous
+        else:
+            following.previous_piece = previous
+        piece.previous_piece = piece.next_piece = None
+        self.length -= 1
+        self.cache = None
+
+    # Replaces the contents.  The links of the old pieces are left as they are: they may belong to another list by now.
+    def reset(self, pieces: list):
+        self.head = self.tail = None
+        self.length = 0
+        self.insert(pieces)
+        self.cache = list(pieces)
+
+
 class Collection(GameObject):
+    __slots__ = ("visible_count", "visible_top", "visible_all", "pieces", "indexes", "name_counts")
+
+    # What a selector's :context reads from a collection; shared by all collections
+    contexts = {
+        "pieces": lambda s: s.pieces.as_list(),
+        "size": lambda s: [len(s.pieces)],
+        "first": lambda s: [s.pieces[-1]] if s.pieces else [],
+        "last": lambda s: [s.pieces[0]] if s.pieces else [],
+    }
+
     def __init__(self, name):
         super(Collection, self).__init__(name, True)
         self.visible_count = Visibility.Hidden
@@ -129,17 +501,18 @@ class Collection(GameObject):
         """:type: Visibility"""
         self.visible_all = Visibility.Hidden
         """:type: Visibility"""
-        self.pieces = []
-        self.filters = {
-            "pieces": lambda s: s.pieces,
-            "size": lambda s: [len(s.pieces)],
-            "first": lambda s: [s.pieces[-1]] if s.pieces else [],
-            "last": lambda s: [s.pieces[0]] if s.pieces else [],
-        }
+        self.pieces = PieceList()
+        # Attribute indexes are built the first time a selector filters this collection by that attribute, and
+        # kept up to date from then on.  While a collection has indexes its pieces carry order keys.
+        self.indexes = {}
+        """:type: dict[str, AttributeIndex]"""
+        # How many of each piece (by name) the collection holds
+        self.name_counts = {}
+        """:type: dict[str, int]"""
 
     def __getitem__(self, item):
         try:
-            return self.filters[item](self)
+            return Collection.contexts[item](self)
         except:
             print("Pieces:"+str(self.pieces))
             raise
@@ -155,9 +528,112 @@ class Collection(GameObject):
         p.attributes = copy.copy(self.attributes)
         return p
 
+    # Every change to the contents of a collection goes through add_pieces, remove_pieces or set_pieces, so that its
+    # indexes stay current.  position is the index in pieces to insert at; None appends.
+    def add_pieces(self, pieces: list, position: int = None):
+        if not pieces:
+            return
+        self.version += 1
+        name_counts = self.name_counts
+        for piece in pieces:
+            piece.parent = self
+            name_counts[piece.name] = name_counts.get(piece.name, 0) + 1
+        if position is None or position >= len(self.pieces):
+            self.pieces.insert(pieces)
+        else:
+            self.pieces.insert(pieces, self.pieces.at(position))
+        if self.indexes:
+            self.number_pieces(pieces)
+            for index in self.indexes.values():
+                for piece in pieces:
+                    index.add(piece)
+
+    # Removes pieces that are in this collection, in O(len(pieces))
+    def remove_pieces(self, pieces: list):
+        self.version += 1
+        name_counts = self.name_counts
+        for piece in pieces:
+            assert(piece.parent is self), str(piece) + " is not in " + str(self.name)
+            self.pieces.remove(piece)
+            name_counts[piece.name] -= 1
+            if not name_counts[piece.name]:
+                del name_counts[piece.name]
+            for index in self.indexes.values():
+                index.remove(piece)
+
+    # Replaces the contents, e.g. after a shuffle.  When pieces move between several collections at once, call
+    # detach_pieces on all of them first.
+    def set_pieces(self, pieces: list):
+        self.version += 1
+        self.pieces.reset(pieces)
+        self.name_counts.clear()
+        name_counts = self.name_counts
+        for piece in pieces:
+            piece.parent = self
+            name_counts[piece.name] = name_counts.get(piece.name, 0) + 1
+        if self.indexes:
+            self.renumber_pieces()
+            for name in self.indexes:
+                self.indexes[name] = AttributeIndex(name, pieces)
+
+    # Unsets the parent of the pieces in the collection, without changing its contents
+    def detach_pieces(self):
+        for piece in self.pieces:
+            if piece.parent is self:
+                piece.parent = None
+
+    # A read only view of name_counts
+    @property
+    def piece_counts(self) -> MappingProxyType:
+        return MappingProxyType(self.name_counts)
+
+    def renumber_pieces(self):
+        for key, piece in enumerate(self.pieces):
+            piece.order = key
+
+    # Gives pieces just inserted next to each other order keys between those of their neighbours
+    def number_pieces(self, pieces: list):
+        count = len(pieces)
+        before = pieces[0].previous_piece
+        after = pieces[-1].next_piece
+        if before is None and after is None:
+            keys = range(count)
+        elif after is None:
+            keys = [before.order + 1 + number for number in range(count)]
+        elif before is None:
+            keys = [after.order - count + number for number in range(count)]
+        else:
+            step = (after.order - before.order) / (count + 1)
+            keys = [before.order + step * (number + 1) for number in range(count)]
+            # Renumber once the gap is too small for distinct floats
+            if not (before.order < keys[0] and keys[-1] < after.order and len(set(keys)) == count):
+                self.renumber_pieces()
+                return
+        for key, piece in zip(keys, pieces):
+            piece.order = key
+
+    def attribute_index(self, name: str) -> "AttributeIndex":
+        index = self.indexes.get(name)
+        if index is None:
+            if not self.indexes:
+                self.renumber_pieces()
+            index = self.indexes[name] = AttributeIndex(name, self.pieces)
+        return index
+
+    # The pieces that have the attribute, or that have it set to value, in the order they are in the collection
+    def pieces_with(self, name: str, value=missing) -> list:
+        index = self.attribute_index(name)
+        matches = index.pieces if value is missing else index.values.get(value, ())
+        if len(matches) > 1:
+            return sorted(matches, key=order_key)
+        return list(matches)
+
     def is_visible(self, visibility: Visibility, game_state: GameState):
+        return self.visible_to(visibility, game_state.player)
+
+    def visible_to(self, visibility: Visibility, player):
         return visibility == Visibility.Player or visibility == Visibility.Public or \
-               (visibility == Visibility.Owner and self in game_state.player.collections.values())
+               (visibility == Visibility.Owner and self in player.collections.values())
 
     def top_visible(self, game_state: GameState):
         return self.is_visible(self.visible_top, game_state)
@@ -170,29 +646,80 @@ class Collection(GameObject):
 
 
 class Turn(GameObject):
+    __slots__ = ("action",)
+
     def __init__(self, name, action):
         super(Turn, self).__init__(name, True)
         self.action = action
 
+    def __deepcopy__(self, memo):
+        t = Turn(self.name, self.action)
+        t.attributes = copy.copy(self.attributes)
+        return t
+
     def perform(self, players, game_state: GameState):
-        players = sorted(players, key=lambda p: p.index)
-        old_player = game_state.player
-        for player in players:
-            game_state.set_player(player)
-            self.action.perform(game_state)
-        game_state.set_player(old_player)
+        from Game.machine import Machine
+        machine = Machine(game_state)
+        machine.push_turn(self, players, False)
+        machine.run()
 
 
 class Piece(GameObject):
+    # Pieces are the most numerous objects in a game, so they have no __dict__.  A copied piece shares its
+    # attribute dict with the piece it was copied from until either of them changes an attribute (see shared).
+    __slots__ = ("parent", "order", "shared", "previous_piece", "next_piece")
+
     def __init__(self, name, parent):
         super(Piece, self).__init__(name, True)
         self.parent = parent
+        # Position in the parent collection, relative to the other pieces; only kept while the parent has indexes
+        self.order = 0
+        # Whether attributes may also be the attribute dict of another piece, and has to be copied before a change
+        self.shared = False
+        # Neighbours in the parent's PieceList
+        self.previous_piece = None
+        self.next_piece = None
 
-    def __deepcopy__(self, memo):
+    def set_attribute(self, name: str, item):
+        if self.shared:
+            self.unshare_attributes()
+        self.attributes[name] = item
+        self.version += 1
+        self.attribute_changed(name)
+
+    def remove_attribute(self, name: str):
+        if self.shared:
+            self.unshare_attributes()
+        del self.attributes[name]
+        self.version += 1
+        self.attribute_changed(name)
+
+    def unshare_attributes(self):
+        self.attributes = dict(self.attributes)
+        self.shared = False
+
+    def attribute_changed(self, name: str):
+        parent = self.parent
+        if parent is not None and name in parent.indexes:
+            index = parent.indexes[name]
+            index.remove(self)
+            index.add(self)
+
+    def copy(self) -> "Piece":
         p = Piece(self.name, None)
-        p.attributes = copy.copy(self.attributes)
+        p.attributes = self.attributes
+        p.shared = self.shared = True
         return p
 
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    # The links are left to the PieceList, which pickles as a plain list, so a long collection does not pickle as a
+    # deeply nested chain of pieces
+    def __getstate__(self):
+        return None, {"name": self.name, "attributes": self.attributes, "version": self.version, "parent": self.parent,
+                      "order": self.order, "shared": self.shared}
+
 
 class Action(GameObject):
     def __init__(self, steps, name):
@@ -202,8 +729,10 @@ class Action(GameObject):
         assert(all(isinstance(step, Step) for step in steps))
 
     def perform(self, game_state: GameState):
-        for step in self.steps:
-            step.perform(game_state)
+        from Game.machine import Machine
+        machine = Machine(game_state)
+        machine.push_action(self)
+        machine.run()
 
 
 class Player(GameObject):
@@ -213,6 +742,9 @@ class Player(GameObject):
         super(Player, self).__init__(name, True)
         self.index = index
         self.collections = {}
+        # Reseeded from the game's seed when the player is seated
+        self.random = random.Random()
+        """:type: random.Random"""
 
     def __getitem__(self, item):
         return [self.collections[item]]
@@ -220,6 +752,20 @@ class Player(GameObject):
     def select(self, choices: list, min_choices: int, max_choices: int, game_state: GameState, current_action: int):
         pass
 
+    # Used by the asyncio GameHost.  Players that wait on something outside the process override this instead of
+    # blocking in select.
+    async def select_async(self, choices: list, min_choices: int, max_choices: int, game_state: GameState,
+                           current_action: int):
+        return self.select(choices, min_choices, max_choices, game_state, current_action)
+
+    # Decisions from different games that can be answered together return the same key from batch_key(), and are
+    # passed to select_batch() on one of those players as a single list.
+    def batch_key(self):
+        return self
+
+    def select_batch(self, decisions: list) -> list:
+        return [decision.ask() for decision in decisions]
+
     def __repr__(self):
         return "Player "+str(self.index)
 
@@ -0,0 +1,95 @@
+from Game import game, parser, selectorparser, selectorcompiler, selectors, steps, tests
+from Game.game import GameDefinition
+import hashlib
+import os
+import pickle
+
+# Bump whenever the pickled layout of GameDefinition, Step or Selector objects changes,
+# so that stale compiled games on disk are ignored instead of loaded.
+CACHE_VERSION = 7
+CACHE_DIR = os.environ.get("TDGGP_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "tdggp"))
+COMPILED_FILE_SUFFIX = ".game"
+# The modules whose classes are pickled in a compiled game, and the parser that makes the selector cache.  Their
+# source is part of every cache key, so that a change to them that forgets to bump CACHE_VERSION still misses.
+PICKLED_MODULES = (game, steps, selectors, tests, selectorparser)
+
+
+def layout_fingerprint() -> str:
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    for module in PICKLED_MODULES:
+        with open(module.__file__, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+LAYOUT_FINGERPRINT = layout_fingerprint()
+SELECTOR_CACHE_FILE = "selectors-" + LAYOUT_FINGERPRINT + ".cache"
+
+definitions = {}
+""":type: dict[str, GameDefinition]"""
+
+
+def content_hash(content: bytes) -> str:
+    digest = hashlib.sha256(content)
+    digest.update(LAYOUT_FINGERPRINT.encode())
+    return digest.hexdigest()
+
+
+def compile_definition(content: bytes) -> bytes:
+    return pickle.dumps(parser.parse_definition_string(content), pickle.HIGHEST_PROTOCOL)
+
+
+def compiled_path(key: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, key + COMPILED_FILE_SUFFIX)
+
+
+def read_compiled(path: str):
+    try:
+        with open(path, 'rb') as file:
+            return pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+
+def write_compiled(path: str, compiled: bytes) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + "." + str(os.getpid())
+        with open(temp_path, 'wb') as file:
+            file.write(compiled)
+        os.replace(temp_path, path)
+    except OSError:
+        pass
+
+
+def load_definition(game_path: str, cache_dir: str = CACHE_DIR) -> GameDefinition:
+    with open(game_path, 'rb') as file:
+        content = file.read()
+    key = content_hash(content)
+    definition = definitions.get(key)
+    if definition is not None:
+        return definition
+    path = compiled_path(key, cache_dir) if cache_dir else None
+    if path is not None:
+        definition = read_compiled(path)
+    if definition is None:
+        if path is not None:
+            selectorparser.load_cache(os.path.join(cache_dir, SELECTOR_CACHE_FILE))
+        compiled = compile_definition(content)
+        if path is not None:
+            write_compiled(path, compiled)
+            selectorparser.save_cache(os.path.join(cache_dir, SELECTOR_CACHE_FILE))
+        definition = pickle.loads(compiled)
+    selectorcompiler.compile_definition(definition)
+    definitions[key] = definition
+    return definition
+
+
+# Returns a fresh, unstarted Game.  The XML is only parsed the first time its content is seen, afterwards the
+# shared definition is read back from memory or from cache_dir.  Pass cache_dir=None to keep the cache in memory only.
+def load_game(game_path: str, cache_dir: str = CACHE_DIR, seed: int = None):
+    return load_definition(game_path, cache_dir).new_game(seed)
+
+
+def clear_cache() -> None:
+    definitions.clear()
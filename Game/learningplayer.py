@@ -1,10 +1,9 @@
 from Game.game import *
-from Game import parser, randomplayer, manualplayer
+from Game import gamecache, randomplayer, manualplayer, networks, replay, training
 from Game.steps import *
-from fann2 import libfann
 from Game.selectors import *
 from typing import Sequence, List, Mapping, Union, Optional
-import click, random, os, pickle
+import click, numpy, os, pickle
 
 SCORER_FILE_SUFFIX = "-score.nn"
 CHOICE_FILE_SUFFIX = "-choice.nn"
@@ -12,18 +11,16 @@ INPUT_MAPPER_FILE_SUFFIX = "-input.map"
 OUTPUT_MAPPER_FILE_SUFFIX = "-output.map"
 
 
-def create_neural_network(input_size: int, output_size: int) -> libfann.neural_net:
-    network = libfann.neural_net()
-    network.create_standard_array([input_size, (input_size+output_size)/2, output_size])
-    return network
+def create_neural_network(input_size: int, output_size: int, backend: str = "numpy") -> networks.NeuralNetwork:
+    return networks.create_network(input_size, output_size, backend)
 
 
-def load_or_create_neural_network(path: str, input_size: int, output_size: int) -> libfann.neural_net:
+def load_or_create_neural_network(path: str, input_size: int, output_size: int,
+                                  backend: str = "numpy") -> networks.NeuralNetwork:
     if os.path.exists(path):
-        network = libfann.neural_net()
-        network.create_from_file(path)
+        network = networks.load_network(path)
     else:
-        network = create_neural_network(input_size, output_size)
+        network = create_neural_network(input_size, output_size, backend)
     return network
 
 
@@ -37,13 +34,25 @@ def read_mapper(path: str) -> Union["NeuralNetworkInput", "NeuralNetworkOutputMa
         return pickle.load(file)
 
 
+# Reads the mappers and networks that learn_game saved under prefix (the game's name), in LearningPlayer's argument
+# order after the index
+def load_checkpoint(prefix: str) -> tuple:
+    scorer = networks.load_network(prefix + SCORER_FILE_SUFFIX)
+    chooser = networks.load_network(prefix + CHOICE_FILE_SUFFIX)
+    return read_mapper(prefix + INPUT_MAPPER_FILE_SUFFIX), read_mapper(prefix + OUTPUT_MAPPER_FILE_SUFFIX), \
+        scorer, chooser
+
+
 class LearningPlayer(Player):
     def __init__(self,
                  index: int,
                  input_mapper: "NeuralNetworkInput",
                  output_mapper: "NeuralNetworkOutputMapper",
-                 scorer: libfann.neural_net,
-                 chooser: libfann.neural_net):
+                 scorer: networks.NeuralNetwork,
+                 chooser: networks.NeuralNetwork,
+                 training_mode: str = training.ONLINE,
+                 learner: training.Learner = None,
+                 replay_store: replay.ReplayStore = None):
         super(LearningPlayer, self).__init__(index)
         self.input = input_mapper
         self.output = output_mapper
@@ -55,6 +64,17 @@ class LearningPlayer(Player):
         self.previous_output = []
         self.previous_action = None  # type: Optional[int]
         self.exploration_rate = .1
+        # Players being evaluated leave their networks untouched
+        self.training = True
+        # ONLINE trains on every decision inside select; DEFERRED and BACKGROUND record transitions and train on them
+        # at the end of the game, or hand them to learner (see training.py)
+        self.training_mode = training_mode
+        self.learner = learner
+        """:type: training.Learner"""
+        self.learner_version = learner.version if learner is not None else 0
+        self.transitions = training.TransitionBuffer()
+        # When set, the transitions of each game are kept in replay_store, and training is on a sample of all of them
+        self.replay_store = replay_store
 
     def select(self,
                choices: List[Union[GameObject, str]],
@@ -62,32 +82,81 @@ class LearningPlayer(Player):
                max_choices: int,
                game_state: GameState,
                current_action: int):
+        if self.learner is not None and self.learner.version != self.learner_version:
+            self.sync_weights()
         # Generate input, get scores for each available choice
         input_array = self.input.generate(game_state, current_action)
-        output_array = self.chooser.run(input_array)
+        return self.choose(choices, min_choices, max_choices, current_action, input_array,
+                           self.chooser.run(input_array), self.scorer.run(input_array)[0])
+
+    # Players that share their mappers and networks answer their decisions together, unless they train online, which
+    # changes the networks between decisions
+    def batch_key(self):
+        if self.training and self.training_mode == training.ONLINE:
+            return self
+        return self.input, self.output, self.scorer, self.chooser
+
+    # Encodes the decisions into one matrix and runs each network once over all of them
+    def select_batch(self, decisions: list) -> list:
+        for decision in decisions:
+            player = decision.player
+            if player.learner is not None and player.learner.version != player.learner_version:
+                player.sync_weights()
+        inputs = self.input.generate_batch([(decision.game_state, decision.line_num) for decision in decisions])
+        outputs = self.chooser.run_batch(inputs)
+        scores = self.scorer.run_batch(inputs)
+        return [decision.player.choose(decision.choices, decision.min_choices, decision.max_choices,
+                                       decision.line_num, input_array, output_array, score[0])
+                for decision, input_array, output_array, score in zip(decisions, inputs, outputs, scores)]
+
+    def choose(self, choices: list, min_choices: int, max_choices: int, current_action: int,
+               input_array: numpy.ndarray, output_array: numpy.ndarray, score: float) -> list:
         # Score current state, teach AI
-        score = self.scorer.run(input_array)
-        self.update_network(score[0])
+        self.update_network(score)
         # Select choices
-        if random.random() < self.exploration_rate:
+        if self.random.random() < self.exploration_rate:
             self.learning = False
-            to_choose = random.sample(choices, random.randint(min_choices, max_choices))
+            to_choose = self.random.sample(choices, self.random.randint(min_choices, max_choices))
         else:
             self.learning = True
             choice_scores = self.output.map(output_array, current_action)
             to_choose = self.choose_top_choices(choices, choice_scores, min_choices, max_choices)
             # Update History
             self.previous_choices = to_choose
-            self.previous_input = input_array
+            self.previous_input = input_array.copy()
             self.previous_output = output_array
             self.previous_action = current_action
         return to_choose
 
     def update_network(self, score: int):
-        if self.learning:  # If not on first turn
-            self.scorer.train(self.previous_input, [score])
+        if self.learning and self.training:  # If not on first turn
             updated = self.output.new_output(self.previous_output, self.previous_choices, score, self.previous_action)
-            self.chooser.train(self.previous_input, updated)
+            mask = self.output.mask(self.previous_action)
+            if self.training_mode == training.ONLINE:
+                self.scorer.train(self.previous_input, [score])
+                self.chooser.train_batch(self.previous_input.reshape(1, -1), numpy.reshape(updated, (1, -1)),
+                                         mask.reshape(1, -1))
+            else:
+                self.transitions.add(self.previous_input, score, updated, mask)
+
+    # Trains on, or hands over, the transitions recorded during the game
+    def end_game(self) -> None:
+        if not len(self.transitions):
+            return
+        transitions = self.transitions.take()
+        if self.replay_store is not None:
+            transitions = training.replay_sample(self.replay_store, transitions, self.random)
+        if self.training_mode == training.DEFERRED:
+            training.train_minibatches(self.scorer, self.chooser, transitions, self.random)
+        elif self.training_mode == training.BACKGROUND:
+            self.learner.submit(transitions)
+
+    def sync_weights(self) -> None:
+        version = self.learner.version
+        scorer_weights, chooser_weights = self.learner.weights
+        self.scorer.set_weights(scorer_weights)
+        self.chooser.set_weights(chooser_weights)
+        self.learner_version = version
 
     @staticmethod
     def choose_top_choices(choices: Sequence[str], mapping: Mapping, min_choices: int, max_choices: int) -> List[str]:
@@ -114,9 +183,11 @@ class LearningPlayer(Player):
 
     def won(self) -> None:
         self.update_network(1)
+        self.end_game()
 
     def lost(self) -> None:
         self.update_network(0)
+        self.end_game()
 
 
 def get_value_type(attribute):
@@ -125,6 +196,25 @@ def get_value_type(attribute):
     return attribute
 
 
+scope_types = {
+    "game": Game,
+    "current_turn": Turn,
+    "player": Player,
+    "players": Player,
+    "opponents": Player,
+}
+
+
+# The type of object an AssignAttributeStep writes to.  Scopes are known without selecting anything, as there may be
+# no current turn or player when the rules are read.
+def assigned_type(step: AssignAttributeStep, game_state: GameState) -> type:
+    selector = step.assign_to_selector
+    if type(selector) is ScopeSelector and selector.scope in scope_types:
+        return scope_types[selector.scope]
+    selected = selector.select(game_state)[0]
+    return Player if isinstance(selected, Player) else type(selected)
+
+
 def get_all_attributes(game):
     game_state = game.state
     attributes = {
@@ -145,10 +235,8 @@ def get_all_attributes(game):
             attribute_values.setdefault((Piece, name), set()).add(get_value_type(val))
     for action in game.actions.values():
         for step in action.steps:
-            from Game.steps import AssignAttributeStep
             if type(step) == AssignAttributeStep:
-                selected = step.assign_to_selector.select(game_state)[0]
-                selector_type = Player if isinstance(selected, Player) else type(selected)
+                selector_type = assigned_type(step, game_state)
                 attributes[selector_type].add(step.attribute_name)
                 value_type = get_value_type(step.assign_selector.select(game_state)[0])
                 attribute_values.setdefault((selector_type, step.attribute_name), set()).add(value_type)
@@ -179,89 +267,89 @@ def get_all_choice_steps(game):
                   key=lambda step: step.line_num)
 
 
+# The network input is a fixed layout of feature blocks, each at an offset worked out once when the mapper is built.
+# generate() clears one float32 buffer and writes every block straight into its slice, so the input costs no list
+# building, and a row of a larger matrix can be filled the same way to encode many states at once.
+
+
+def scope_objects(game_state: GameState, scope: str) -> list:
+    if scope == "current_turn":
+        return game_state.turns[-1:]
+    return scopes[scope](game_state)
+
+
 class InputItem:
-    def __init__(self, selector):
-        self.selector = selector
+    width = 1
+
+    def __init__(self, attribute_name: str):
+        self.attribute_name = attribute_name
+        self.offset = 0
 
-    def generate(self, game_state: GameState) -> float:
+    def layout(self, offset: int) -> int:
+        self.offset = offset
+        return offset + self.width
+
+    # value is the attribute's value, or missing
+    def write(self, buffer: numpy.ndarray, value, game_state: GameState) -> None:
         pass
 
 
 class PlayerInputItem(InputItem):
-    def generate(self, game_state: GameState):
-        players = self.selector.select(game_state)
-        if len(players) == 0:
-            return 0
-        return int(players[0] == game_state.player)
+    def write(self, buffer: numpy.ndarray, value, game_state: GameState):
+        if value is not missing and value == game_state.player:
+            buffer[self.offset] = 1
 
 
 class StringInputItem(InputItem):
-    def __init__(self, selector, string):
-        super(StringInputItem, self).__init__(selector)
+    def __init__(self, attribute_name: str, string: str):
+        super(StringInputItem, self).__init__(attribute_name)
         self.string = string
 
-    def generate(self, game_state: GameState):
-        return int(self.selector.select_one_of_type(game_state, str) == self.string)
-
-
-class GameObjectInputItem(InputItem):
-    def __init__(self, selector, item_name):
-        super(GameObjectInputItem, self).__init__(selector)
-        self.item_name = item_name
-
-    def generate(self, game_state: GameState):
-        return int(self.selector.select_one(game_state).name == self.item_name)
+    def write(self, buffer: numpy.ndarray, value, game_state: GameState):
+        if value == self.string:
+            buffer[self.offset] = 1
 
 
 class IntInputItem(InputItem):
-    def generate(self, game_state: GameState):
-        selected = self.selector.select(game_state)
-        if len(selected) == 0:
-            return 0
-        value = selected[0]
-        return value/(value+1)
+    def write(self, buffer: numpy.ndarray, value, game_state: GameState):
+        if value is not missing:
+            buffer[self.offset] = value/(value+1)
 
 
 class BooleanInputItem(InputItem):
-    def generate(self, game_state: GameState):
-        selected = self.selector.select(game_state)
-        if len(selected) == 0:
-            return .5
-        return int(selected[0])
+    def write(self, buffer: numpy.ndarray, value, game_state: GameState):
+        buffer[self.offset] = .5 if value is missing else int(value)
 
 
-class GameObjectInputSet:
-    def __init__(self, possible_options: list, selector: Selector):
+# One-hot over the possible objects by name, with a last entry for no object
+class GameObjectInputSet(InputItem):
+    def __init__(self, attribute_name: Optional[str], possible_options: list):
+        super(GameObjectInputSet, self).__init__(attribute_name)
         self.possible_options = dict((option.name, index)
                                      for index, option in enumerate(sorted(possible_options,
                                                                            key=lambda option: option.name)))
-        self.selector = selector
+        self.width = len(self.possible_options) + 1
 
-    def generate(self, game_state: GameState):
-        array = [0]*(len(self.possible_options)+1)
-        selected = self.selector.select(game_state)
-        if len(selected) == 0:
-            array[-1] = 1
+    def write(self, buffer: numpy.ndarray, value, game_state: GameState):
+        if value is missing:
+            buffer[self.offset + self.width - 1] = 1
         else:
-            array[self.possible_options[selected[0].name]] = 1
-
-        return array
+            buffer[self.offset + self.possible_options[value.name]] = 1
 
 
 class AttributeInputSet:
-    def __init__(self, game_object: Selector, game: Game, attributes: dict):
+    def __init__(self, game: Game, attributes: dict):
         self.array = []
         for name, values in sorted(attributes.items()):
-            selector = AttributeSelector(name, game_object)
             for value in values:
                 if value == int:
-                    self.array.append(IntInputItem(selector))
+                    self.array.append(IntInputItem(name))
                 elif value == bool:
-                    self.array.append(BooleanInputItem(selector))
+                    self.array.append(BooleanInputItem(name))
                 elif issubclass(value, Player):
-                    self.array.append(PlayerInputItem(selector))
+                    self.array.append(PlayerInputItem(name))
                 elif type(value) == str:
-                    self.array.append(StringInputItem(selector, value))
+                    self.array.append(StringInputItem(name, value))
                 else:
                     if value == Collection:
                         object_set = list(game.player_collections.values()) + \
@@ -274,55 +362,107 @@ class AttributeInputSet:
                         object_set = game.actions.values()
                     else:
                         raise AssertionError("Bad state")
-                    self.array.append(GameObjectInputSet(object_set, selector))
+                    self.array.append(GameObjectInputSet(name, list(object_set)))
 
-    def generate(self, game_state):
-        array = []
+    def layout(self, offset: int) -> int:
         for item in self.array:
-            generated = item.generate(game_state)
-            if type(generated) == list:
-                array.extend(generated)
-            else:
-                array.append(generated)
-        return array
+            offset = item.layout(offset)
+        return offset
+
+    # Each attribute is read from the first owner that has it
+    def write(self, buffer: numpy.ndarray, owners: list, game_state: GameState):
+        for item in self.array:
+            value = missing
+            for owner in owners:
+                attributes = owner.attributes
+                if item.attribute_name in attributes:
+                    value = attributes[item.attribute_name]
+                    break
+            item.write(buffer, value, game_state)
+
+
+# Blocks that describe game objects (ScopeInputSet, CollectionInputSet) have a start and end in the input, list the
+# objects they read with owners(), and fill their slice from those objects with write().
+
+
+class ScopeInputSet:
+    def __init__(self, scope: str, game: Game, attributes: dict):
+        self.scope = scope
+        self.attributes = AttributeInputSet(game, attributes)
+        self.start = self.end = 0
+
+    def layout(self, offset: int) -> int:
+        self.start = offset
+        self.end = self.attributes.layout(offset)
+        return self.end
+
+    def owners(self, game_state: GameState) -> list:
+        return scope_objects(game_state, self.scope)
+
+    def write(self, buffer: numpy.ndarray, owners: list, game_state: GameState):
+        self.attributes.write(buffer, owners, game_state)
 
 
 class StepInputSet:
     def __init__(self, steps):
         self.steps = dict((step.line_num, index) for index, step in enumerate(steps))
+        self.offset = 0
 
-    def generate(self, current_action: int):
-        array = [0]*len(self.steps)
-        array[self.steps[current_action]] = 1
-        return array
+    def layout(self, offset: int) -> int:
+        self.offset = offset
+        return offset + len(self.steps)
+
+    def write(self, buffer: numpy.ndarray, current_action: int):
+        buffer[self.offset + self.steps[current_action]] = 1
 
 
 class CollectionInputSet:
-    def __init__(self, collection_name, possible_attributes, game: Game, scope: ScopeSelector):
-        self.selector = ContextSelector(collection_name, scope)
-        self.attributes = AttributeInputSet(self.selector, game, possible_attributes)
-        self.first_item = GameObjectInputSet(list(game.pieces.values()), ContextSelector("first", self.selector))
-        self.piece_counts = dict((piece.name, index) for index, piece in sorted(enumerate(game.pieces.values())))
-
-    def generate(self, game_state):
-        collections = self.selector.select(game_state)
-        array = []
-        collection_size = []
-        collection_pieces = [0]*len(self.piece_counts)
-        for collection in collections:
-            if collection.count_visible(game_state) or collection.all_visible(game_state):
-                length = len(collection.pieces)
-                collection_size.append(length/(length+1))
-            if collection.all_visible(game_state):
-                for piece in collection.pieces:
-                    index = self.piece_counts[piece.name]
-                    collection_pieces[index] = -1/(collection_pieces[index]-2)
+    # Describes the collection of a given name in each object of a scope (the game, the player or the opponents).
+    # The top piece and the attributes are only filled in when the scope has exactly one such collection.
+    def __init__(self, collection_name: str, possible_attributes: dict, game: Game, scope: str):
+        self.collection_name = collection_name
+        self.scope = scope
+        self.first_item = GameObjectInputSet(None, list(game.pieces.values()))
+        self.attributes = AttributeInputSet(game, possible_attributes)
+        self.piece_counts = dict((piece.name, index) for index, piece in enumerate(game.pieces.values()))
+        self.counts = numpy.zeros(len(self.piece_counts), numpy.float32)
+        self.start = self.end = 0
+        self.size_offset = 0
+        self.counts_offset = 0
+
+    def layout(self, offset: int) -> int:
+        self.start = offset
+        offset = self.first_item.layout(offset)
+        offset = self.attributes.layout(offset)
+        self.size_offset = offset
+        self.counts_offset = offset + 1
+        self.end = self.counts_offset + len(self.piece_counts)
+        return self.end
+
+    def owners(self, game_state: GameState) -> list:
+        return [owner.collections[self.collection_name] for owner in scope_objects(game_state, self.scope)]
+
+    def write(self, buffer: numpy.ndarray, collections: list, game_state: GameState):
         if len(collections) == 1:
-            array.extend(self.first_item.generate(game_state))
-            array.extend(self.attributes.generate(game_state))
-        array.extend(collection_size)
-        array.extend(collection_pieces)
-        return array
+            pieces = collections[0].pieces
+            self.first_item.write(buffer, pieces[-1] if pieces else missing, game_state)
+            self.attributes.write(buffer, collections, game_state)
+        size = 0
+        counts = self.counts
+        counts.fill(0)
+        piece_indexes = self.piece_counts
+        for collection in collections:
+            all_visible = collection.all_visible(game_state)
+            if all_visible or collection.count_visible(game_state):
+                size += len(collection.pieces)
+            if all_visible:
+                for name, count in collection.piece_counts.items():
+                    counts[piece_indexes[name]] += count
+        buffer[self.size_offset] = size/(size+1)
+        # count/(count+1) for every piece, written in place
+        block = buffer[self.counts_offset:self.end]
+        numpy.add(counts, 1, out=block)
+        numpy.divide(counts, block, out=block)
 
 
 class NeuralNetworkInput:
@@ -333,27 +473,66 @@ class NeuralNetworkInput:
         def attributes_of_class(class_type):
             return dict([(attribute_name, attribute_values[(class_type, attribute_name)])
                         for attribute_name in attribute_names[class_type]])
-        self.game_attributes = AttributeInputSet(ScopeSelector("player"), game, attributes_of_class(Game))
-        self.turn_attributes = AttributeInputSet(ScopeSelector("current_turn"), game, attributes_of_class(Turn))
+        self.game_attributes = ScopeInputSet("game", game, attributes_of_class(Game))
+        self.turn_attributes = ScopeInputSet("current_turn", game, attributes_of_class(Turn))
         collection_scopes = {
             "game": game.collections,
             "player": game.player_collections,
             "opponents": game.player_collections
         }
         self.collections = [
-            CollectionInputSet(collection, attributes_of_class(Collection), game, ScopeSelector(scope_name))
+            CollectionInputSet(collection, attributes_of_class(Collection), game, scope_name)
             for scope_name, collections in collection_scopes.items() for collection in collections
         ]
-        self.input_length = len(self.generate(game.state, list(self.possible_steps.steps.keys())[0]))
-
-    def generate(self, game_state, current_action) -> list:
-        array = []
-        array.extend(self.possible_steps.generate(current_action))
-        array.extend(self.game_attributes.generate(game_state))
-        array.extend(self.turn_attributes.generate(game_state))
-        for collection in self.collections:
-            array.extend(collection.generate(game_state))
-        return array
+        self.blocks = [self.game_attributes, self.turn_attributes] + self.collections
+        offset = self.possible_steps.layout(0)
+        for block in self.blocks:
+            offset = block.layout(offset)
+        self.input_length = offset
+        self.buffer = numpy.zeros(self.input_length, numpy.float32)
+        # What each block of buffer was last written from: the player it was written for, then each object it
+        # read and that object's version.  A block is only rewritten once this changes.
+        self.keys = [None] * len(self.blocks)
+
+    # Returns the input for the decision at current_action.  Without out, this is a buffer that the next call
+    # updates in place, rewriting only the blocks whose objects changed; copy it to keep it.
+    def generate(self, game_state, current_action, out: numpy.ndarray = None) -> numpy.ndarray:
+        if out is not None:
+            out.fill(0)
+            self.possible_steps.write(out, current_action)
+            for block in self.blocks:
+                block.write(out, block.owners(game_state), game_state)
+            return out
+        buffer = self.buffer
+        steps = self.possible_steps
+        buffer[steps.offset:steps.offset + len(steps.steps)] = 0
+        steps.write(buffer, current_action)
+        keys = self.keys
+        player = game_state.player
+        for number, block in enumerate(self.blocks):
+            owners = block.owners(game_state)
+            key = [player]
+            for owner in owners:
+                key.append(owner)
+                key.append(owner.version)
+            if key != keys[number]:
+                keys[number] = key
+                buffer[block.start:block.end] = 0
+                block.write(buffer, owners, game_state)
+        return buffer
+
+    # Encodes (game_state, current_action) pairs as the rows of one matrix
+    def generate_batch(self, decisions: list) -> numpy.ndarray:
+        matrix = numpy.empty((len(decisions), self.input_length), numpy.float32)
+        for row, (game_state, current_action) in zip(matrix, decisions):
+            self.generate(game_state, current_action, row)
+        return matrix
+
+    # The keys refer to objects of the last game played; they are not saved with the mapper
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["keys"] = [None] * len(self.blocks)
+        return state
 
 
 class NeuralNetworkOutputMapper:
@@ -385,6 +564,13 @@ class NeuralNetworkOutputMapper:
         neural_output[mapping.start_index:mapping.start_index + len(new_values)] = new_values
         return neural_output
 
+    # The outputs that belong to an action's choice
+    def mask(self, action: int) -> numpy.ndarray:
+        mapping = self.mappings[action]
+        mask = numpy.zeros(self.output_length, numpy.bool_)
+        mask[mapping.start_index:mapping.start_index + len(mapping.objects)] = True
+        return mask
+
     def missing_mappings(self):
         return any(value is None for value in self.mappings.values())
 
@@ -401,7 +587,7 @@ class ExploratoryPlayer(Player):
         self.output_mapper = output_mapper
 
     def select(self, choices: list, min_choices: int, max_choices: int, game_state: GameState, current_action: int):
-        to_choose = random.sample(choices, random.randint(min_choices, max_choices))
+        to_choose = self.random.sample(choices, self.random.randint(min_choices, max_choices))
         if self.output_mapper.mappings[current_action] is None:
             selection_type = type(choices[0])
             if selection_type == Piece:
@@ -421,8 +607,17 @@ class ExploratoryPlayer(Player):
 @click.option("--game_path", prompt="Game Path", help="Path to the game's XML")
 @click.option("--num_iterations", prompt="Iterations", help="Number of times the AI should play itself", type=int)
 @click.option("--refresh", default=False, help="Pass true if you want the AI to forget all previous learning")
-def learn_game(game_path: str, num_iterations: int, refresh: bool):
-    game = parser.parse_xml(game_path)
+@click.option("--backend", default="numpy", type=click.Choice(networks.BACKENDS),
+              help="Network implementation for new networks; saved networks are loaded with the one they were made by")
+@click.option("--training", "training_mode", default=training.ONLINE, type=click.Choice(training.TRAINING_MODES),
+              help="Train on every decision, in minibatches at the end of each game, or on a background thread")
+@click.option("--replay", "replay_path", default=None,
+              help="Directory of a replay store to keep every game's transitions in and train on samples of")
+def learn_game(game_path: str, num_iterations: int, refresh: bool, backend: str, training_mode: str,
+               replay_path: str):
+    if replay_path is not None and training_mode == training.ONLINE:
+        raise click.BadParameter("Replay needs the deferred or background training mode", param_hint="replay")
+    game = gamecache.load_game(game_path)
     game.start([randomplayer.RandomPlayer(0), randomplayer.RandomPlayer(1)])
     input_mapper_path = game.name + INPUT_MAPPER_FILE_SUFFIX
     input_mapper = NeuralNetworkInput(game) if refresh or not os.path.exists(input_mapper_path) \
@@ -432,29 +627,38 @@ def learn_game(game_path: str, num_iterations: int, refresh: bool):
         else read_mapper(output_mapper_path)
     while output_mapper.missing_mappings():
         players = [ExploratoryPlayer(0, output_mapper), ExploratoryPlayer(1, output_mapper)]
-        parser.parse_xml(game_path).start(players)
+        gamecache.load_game(game_path).start(players)
     chooser_path = game.name + CHOICE_FILE_SUFFIX
-    chooser = create_neural_network(input_mapper.input_length, output_mapper.output_length) if refresh \
-        else load_or_create_neural_network(chooser_path, input_mapper.input_length, output_mapper.output_length)
+    chooser = create_neural_network(input_mapper.input_length, output_mapper.output_length, backend) if refresh \
+        else load_or_create_neural_network(chooser_path, input_mapper.input_length, output_mapper.output_length,
+                                           backend)
     scorer_path = game.name + SCORER_FILE_SUFFIX
-    scorer = create_neural_network(input_mapper.input_length, 1) if refresh \
-        else load_or_create_neural_network(scorer_path, input_mapper.input_length, 1)
-
+    scorer = create_neural_network(input_mapper.input_length, 1, backend) if refresh \
+        else load_or_create_neural_network(scorer_path, input_mapper.input_length, 1, backend)
+
+    learner = training.Learner(scorer, chooser) if training_mode == training.BACKGROUND else None
+    replay_store = replay.ReplayStore(replay_path, input_mapper.input_length, output_mapper.output_length) \
+        if replay_path is not None else None
+    learning_player = LearningPlayer(0, input_mapper, output_mapper, scorer, chooser, training_mode, learner,
+                                     replay_store)
     players = [
-        LearningPlayer(0, input_mapper, output_mapper, scorer, chooser),
+        learning_player,
         manualplayer.ManualPlayer(1)
     ]
     wins = 0
     losses = 0
 
     def save():
+        if learner is not None:
+            learner.wait()
+            learning_player.sync_weights()
         save_mapper(input_mapper_path, input_mapper)
         save_mapper(output_mapper_path, output_mapper)
         chooser.save(chooser_path)
         scorer.save(scorer_path)
     for i in range(int(num_iterations)):
         print("Game "+str(i))
-        winners = parser.parse_xml(game_path).start(players)
+        winners = gamecache.load_game(game_path).start(players)
         wins += int(all(isinstance(winner, LearningPlayer) for winner in winners))
         losses += int(not(any(isinstance(winner, LearningPlayer) for winner in winners)))
         if i % 100 == 0:
@@ -462,6 +666,10 @@ def learn_game(game_path: str, num_iterations: int, refresh: bool):
     print("Winners:"+str(wins))
     print("Losers:"+str(losses))
     save()
+    if learner is not None:
+        learner.close()
+    if replay_store is not None:
+        replay_store.close()
 
 
 if __name__ == '__main__':
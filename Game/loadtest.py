@@ -0,0 +1,113 @@
+from Game import gamecache
+from Game.server import GameHost, MAX_LINE_LENGTH
+import asyncio
+import click
+import json
+import random
+import time
+
+# Drives simulated clients against a GameHost listening on a local socket.  Each client plays games back to back,
+# answering every decision with a random selection after think_time seconds.  A share of the clients are slow
+# (answering after slow_time seconds) to check that they do not hold up the other sessions.
+
+
+class ClientStats:
+    def __init__(self):
+        self.games = 0
+        self.decisions = 0
+        self.latencies = []
+        """:type: list[float]"""
+
+
+async def play_client(connect, stats: ClientStats, games: int, think_time: float, rng: random.Random):
+    for _ in range(games):
+        reader, writer = await connect()
+        sent = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line.decode())
+                if sent is not None:
+                    stats.latencies.append(time.perf_counter() - sent)
+                    sent = None
+                if message["type"] == "select":
+                    count = rng.randint(message["min"], message["max"])
+                    chosen = rng.sample(range(len(message["choices"])), count)
+                    if think_time:
+                        await asyncio.sleep(think_time)
+                    writer.write(json.dumps({"id": message["id"], "choices": chosen}).encode() + b"\n")
+                    await writer.drain()
+                    sent = time.perf_counter()
+                    stats.decisions += 1
+                elif message["type"] == "end":
+                    stats.games += 1
+                    break
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run_load_test(game_path: str, clients: int, games: int, seats: int, slow_clients: int, slow_time: float,
+                        unix: str, seed: int):
+    game_host = GameHost(gamecache.load_definition(game_path), seats, decision_timeout=max(10.0, slow_time * 10))
+    if unix:
+        server = await game_host.serve_unix(unix)
+
+        def connect():
+            return asyncio.open_unix_connection(unix, limit=MAX_LINE_LENGTH)
+    else:
+        server = await game_host.serve_tcp("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        def connect():
+            return asyncio.open_connection("127.0.0.1", port, limit=MAX_LINE_LENGTH)
+    fast_stats = ClientStats()
+    slow_stats = ClientStats()
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    async with server:
+        await asyncio.gather(*[
+            play_client(connect,
+                        slow_stats if index < slow_clients else fast_stats,
+                        games,
+                        slow_time if index < slow_clients else 0,
+                        random.Random(rng.random()))
+            for index in range(clients)
+        ])
+    elapsed = time.perf_counter() - start
+    decisions = fast_stats.decisions + slow_stats.decisions
+    print("Clients:        " + str(clients) + " (" + str(slow_clients) + " slow)")
+    print("Games:          " + str(game_host.games_played) + " in {:.2f}s".format(elapsed))
+    print("Decisions/sec:  {:.0f}".format(decisions / elapsed))
+    print("Fast clients:   p50 {:.1f}ms, p99 {:.1f}ms per decision".format(
+        percentile(fast_stats.latencies, .5) * 1000, percentile(fast_stats.latencies, .99) * 1000))
+    if slow_clients:
+        print("Slow clients:   p50 {:.1f}ms, p99 {:.1f}ms per decision".format(
+            percentile(slow_stats.latencies, .5) * 1000, percentile(slow_stats.latencies, .99) * 1000))
+
+
+@click.command()
+@click.option("--game_path", prompt="Game Path", help="Path to the game's XML")
+@click.option("--clients", default=200, help="Number of simulated clients", type=int)
+@click.option("--games", default=5, help="Games each client plays", type=int)
+@click.option("--seats", default=2, help="Number of players in each game", type=int)
+@click.option("--slow_clients", default=0, help="Number of clients that think before answering", type=int)
+@click.option("--slow_time", default=.5, help="Seconds a slow client thinks", type=float)
+@click.option("--unix", default=None, help="Use this Unix socket path instead of TCP")
+@click.option("--seed", default=0, help="Seed for the clients' choices", type=int)
+def load_test(game_path: str, clients: int, games: int, seats: int, slow_clients: int, slow_time: float, unix: str,
+              seed: int):
+    asyncio.run(run_load_test(game_path, clients, games, seats, slow_clients, slow_time, unix, seed))
+
+
+if __name__ == '__main__':
+    load_test()
@@ -0,0 +1,170 @@
+from Game.game import GameState, Action, Turn
+
+# Runs actions on an explicit stack of frames instead of the Python call stack.  An Action is a flat list of steps;
+# ordinary steps are performed in place, while control steps (perform, if, repeat, give-turn, player-choice) push a
+# frame for the action they run.  Games can nest actions to any depth without touching the recursion limit, and a
+# game can be stopped between any two steps and continued later by calling run() again.
+#
+# Player decisions are not made inside the interpreter.  PlayerSelect and PlayerChoice suspend the machine with a
+# Decision; run_until_decision() returns it, and the game continues once resume() is called with the chosen items.
+# run() answers decisions itself by asking each decision's player.
+
+
+class Decision:
+    def __init__(self, step, player, choices: list, min_choices: int, max_choices: int, game_state: GameState):
+        self.step = step
+        self.player = player
+        self.choices = choices
+        self.min_choices = min_choices
+        self.max_choices = max_choices
+        self.game_state = game_state
+
+    @property
+    def line_num(self) -> int:
+        return self.step.line_num
+
+    def ask(self) -> list:
+        return self.player.select(self.choices, self.min_choices, self.max_choices, self.game_state, self.line_num)
+
+    def __repr__(self):
+        return str(self.player)+" selects "+str(self.min_choices)+"-"+str(self.max_choices)+" of "+str(self.choices)
+
+
+class Frame:
+    # Runs the next step of the frame and returns True, or returns False once the frame is finished
+    def advance(self, machine: "Machine") -> bool:
+        pass
+
+
+class ActionFrame(Frame):
+    def __init__(self, action: Action):
+        self.steps = action.steps
+        self.index = 0
+
+    def advance(self, machine: "Machine"):
+        if self.index == len(self.steps):
+            return False
+        step = self.steps[self.index]
+        self.index += 1
+        step.execute(machine)
+        return True
+
+
+class WhileFrame(Frame):
+    def __init__(self, test, action: Action):
+        self.test = test
+        self.action = action
+
+    def advance(self, machine: "Machine"):
+        if not self.test.test(machine.game_state):
+            return False
+        machine.push_action(self.action)
+        return True
+
+
+class RepeatFrame(Frame):
+    def __init__(self, count: int, action: Action):
+        self.remaining = count
+        self.action = action
+
+    def advance(self, machine: "Machine"):
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        machine.push_action(self.action)
+        return True
+
+
+class ForEachFrame(Frame):
+    def __init__(self, items: list, label: str, action: Action):
+        self.items = items
+        self.label = label
+        self.action = action
+        self.index = 0
+
+    def advance(self, machine: "Machine"):
+        if self.index == len(self.items):
+            return False
+        machine.game_state.set_var([self.items[self.index]], self.label)
+        self.index += 1
+        machine.push_action(self.action)
+        return True
+
+
+class TurnFrame(Frame):
+    def __init__(self, turn: Turn, players: list, old_player, pop_turn: bool):
+        self.turn = turn
+        self.players = sorted(players, key=lambda p: p.index)
+        self.old_player = old_player
+        self.pop_turn = pop_turn
+        self.index = 0
+
+    def advance(self, machine: "Machine"):
+        game_state = machine.game_state
+        if self.index == len(self.players):
+            game_state.set_player(self.old_player)
+            if self.pop_turn:
+                game_state.turns.pop()
+            return False
+        game_state.set_player(self.players[self.index])
+        game_state.turns_played += 1
+        self.index += 1
+        machine.push_action(self.turn.action)
+        return True
+
+
+class Machine:
+    def __init__(self, game_state: GameState):
+        self.game_state = game_state
+        self.frames = []
+        """:type: list[Frame]"""
+        self.pending = None
+        """:type: Decision"""
+
+    def push(self, frame: Frame) -> None:
+        self.frames.append(frame)
+
+    def push_action(self, action: Action) -> None:
+        self.frames.append(ActionFrame(action))
+
+    def push_turn(self, turn: Turn, players: list, pop_turn: bool) -> None:
+        self.frames.append(TurnFrame(turn, players, self.game_state.player, pop_turn))
+
+    def halt(self) -> None:
+        del self.frames[:]
+
+    def suspend(self, decision: Decision) -> None:
+        self.pending = decision
+
+    def running(self) -> bool:
+        return bool(self.frames) or self.pending is not None
+
+    def step(self) -> None:
+        assert(self.pending is None), "The game is waiting for a decision"
+        frame = self.frames[-1]
+        if not frame.advance(self) and self.frames and self.frames[-1] is frame:
+            self.frames.pop()
+
+    def run_until_decision(self) -> Decision:
+        frames = self.frames
+        while frames and self.pending is None:
+            frame = frames[-1]
+            if not frame.advance(self) and frames and frames[-1] is frame:
+                frames.pop()
+        return self.pending
+
+    def resume(self, chosen: list) -> None:
+        decision = self.pending
+        assert(decision is not None), "The game is not waiting for a decision"
+        self.pending = None
+        decision.step.complete(self, decision, chosen)
+
+    def run(self) -> None:
+        decision = self.run_until_decision()
+        while decision is not None:
+            self.resume(decision.ask())
+            decision = self.run_until_decision()
+
+    def run_step(self, step) -> None:
+        step.execute(self)
+        self.run()
@@ -2,6 +2,13 @@ from Game.game import Player, GameState, Visibility
 
 
 class ManualPlayer(Player):
+    async def select_async(self, choices: list, min_choices: int, max_choices: int, game_state: GameState,
+                           current_action: int):
+        # input() blocks, so ask on a worker thread to keep other games on the event loop running
+        import asyncio
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.select, choices, min_choices, max_choices, game_state, current_action)
+
     def select(self, choices: list, min_choices: int, max_choices: int, game_state: GameState, current_action: int):
         input(self.name)
         choices = sorted(choices, key=lambda k: k.name)
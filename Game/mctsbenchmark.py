@@ -0,0 +1,42 @@
+from Game import gamecache, mctsplayer, randomplayer
+import click
+import os
+import time
+
+DEFAULT_GAME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "games", "race.xml")
+
+
+@click.command()
+@click.option("--game_path", default=DEFAULT_GAME_PATH, help="Path to the game's XML")
+@click.option("--games", default=20, help="Number of games to play against a random player", type=int)
+@click.option("--iterations", default=200, help="Rollouts per MCTS decision", type=int)
+@click.option("--workers", default=1, help="Worker processes searching each decision", type=int)
+@click.option("--seed", default=0, help="Seed of the first game; each game uses the next", type=int)
+def benchmark(game_path: str, games: int, iterations: int, workers: int, seed: int):
+    definition = gamecache.load_definition(game_path)
+    player = mctsplayer.MCTSPlayer(0, iterations, workers=workers)
+    wins = 0.0
+    start = time.perf_counter()
+    try:
+        for game_index in range(games):
+            # Alternate seats so that neither player always moves first
+            seat = game_index % 2
+            player.index = seat
+            players = [randomplayer.RandomPlayer(1 - seat)]
+            players.insert(seat, player)
+            game = definition.new_game(seed + game_index)
+            game.start(players)
+            if player in game.state.winners:
+                wins += 1 / len(game.state.winners)
+    finally:
+        player.close()
+    elapsed = time.perf_counter() - start
+    print("Games:          {} in {:.2f}s".format(games, elapsed))
+    print("MCTS win rate:  {:.0%}".format(wins / games))
+    print("MCTS decisions: {} at {:.1f}/sec ({:.0f} rollouts/sec)".format(
+        player.decisions, player.decisions / player.search_time if player.search_time else 0,
+        player.decisions * iterations / player.search_time if player.search_time else 0))
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,266 @@
+from Game.game import Player, GameState, Game, GameDefinition, GameObject
+from Game import serialization, selectorcompiler
+import concurrent.futures
+import itertools
+import math
+import pickle
+import random
+import time
+
+# Information set Monte Carlo tree search (single observer).  Every iteration fills the collections this player cannot
+# see with a random arrangement of their hidden pieces (a determinization), then walks down one tree shared by all
+# determinizations: each node is a decision, reached by the selections made before it, and each child a selection,
+# named by the names of the objects chosen so that it means the same in every determinization.  Children are picked
+# with UCB1 from the perspective of the player making the decision, counting only the visits in which a child was
+# available.  The first selection not yet in the tree is added, the game is played out with random decisions, and the
+# result is added to every node on the path.  The most visited selection of the root is played.  With workers > 1 the
+# search runs in a process pool (root parallelism): each worker grows a tree of its own and the root counts are summed.
+
+MAX_CANDIDATES = 24
+MAX_ROLLOUT_DECISIONS = 5000
+EXPLORATION = math.sqrt(2)
+
+
+def candidate_selections(num_choices: int, min_choices: int, max_choices: int, rng: random.Random) -> list:
+    sizes = range(min_choices, max_choices + 1)
+    total = sum(math.comb(num_choices, size) for size in sizes)
+    if total <= MAX_CANDIDATES:
+        return [combination for size in sizes for combination in itertools.combinations(range(num_choices), size)]
+    candidates = {tuple(range(min_choices))}
+    for _ in range(MAX_CANDIDATES * 10):
+        if len(candidates) >= MAX_CANDIDATES:
+            break
+        size = rng.randint(min_choices, max_choices)
+        candidates.add(tuple(sorted(rng.sample(range(num_choices), size))))
+    return sorted(candidates)
+
+
+def hidden_groups(game: Game, observer: Player) -> list:
+    groups = [[collection for collection in game.collections.values()
+               if not collection.visible_to(collection.visible_all, observer)]]
+    for player in game.players:
+        groups.append([collection for collection in player.collections.values()
+                       if not collection.visible_to(collection.visible_all, observer)])
+    return groups
+
+
+# Shuffles the hidden pieces of each owner (the game, or a player) between that owner's hidden collections, keeping
+# collection sizes, visible top pieces and the pieces being chosen from in place.  The game's random stream is
+# reseeded too, as the player cannot know how later shuffles will fall.
+def determinize(game: Game, observer: Player, fixed: set, rng: random.Random):
+    game_state = game.state
+    game_state.random.seed(rng.getrandbits(63))
+    for group in hidden_groups(game, observer):
+        slots = []
+        pool = []
+        for collection in group:
+            # The top piece is the last one, as with the "first" context
+            top = len(collection.pieces) - 1 if collection.visible_to(collection.visible_top, observer) else None
+            for position, piece in enumerate(collection.pieces):
+                if position == top or id(piece) in fixed:
+                    continue
+                slots.append((collection, position))
+                pool.append(piece)
+        if len(pool) < 2:
+            continue
+        rng.shuffle(pool)
+        arrangements = dict((collection, list(collection.pieces)) for collection in group)
+        for (collection, position), piece in zip(slots, pool):
+            arrangements[collection][position] = piece
+        for collection in group:
+            game_state.record_pieces(collection)
+            collection.detach_pieces()
+        for collection, pieces in arrangements.items():
+            collection.set_pieces(pieces)
+
+
+def random_selection(decision, rng: random.Random) -> list:
+    return rng.sample(decision.choices, rng.randint(decision.min_choices, decision.max_choices))
+
+
+def choice_name(choice) -> str:
+    if isinstance(choice, GameObject):
+        return choice.name
+    return str(choice)
+
+
+# The selections considered at a decision below the root, by the names they choose.  Pieces with the same name are
+# interchangeable, so selections that differ only in which of them they take are one selection.
+def named_selections(decision, rng: random.Random) -> dict:
+    choices = decision.choices
+    selections = {}
+    for candidate in candidate_selections(len(choices), decision.min_choices, decision.max_choices, rng):
+        selection = [choices[choice] for choice in candidate]
+        selections.setdefault(tuple(sorted(choice_name(choice) for choice in selection)), selection)
+    return selections
+
+
+class Node:
+    __slots__ = ("player", "children", "visits", "reward", "available")
+
+    def __init__(self, player: int = None):
+        # Index of the player whose selection leads to this node; the root's is None
+        self.player = player
+        self.children = {}
+        """:type: dict[object, Node]"""
+        self.visits = 0
+        # Sum of the rewards of player
+        self.reward = 0.0
+        # Visits of the parent in which this node's selection could be made
+        self.available = 1
+
+    def best_child(self, keys) -> tuple:
+        best = None
+        best_value = None
+        for key in keys:
+            child = self.children[key]
+            value = child.reward / child.visits + EXPLORATION * math.sqrt(math.log(child.available) / child.visits)
+            if best_value is None or value > best_value:
+                best = key, child
+                best_value = value
+        return best
+
+
+# Plays the game out with random decisions.  Returns the winners, or no one if the game runs too long.
+def rollout(game: Game, rng: random.Random) -> list:
+    machine = game.machine
+    decision = machine.run_until_decision()
+    decisions = 0
+    while decision is not None:
+        decisions += 1
+        if decisions > MAX_ROLLOUT_DECISIONS:
+            return []
+        machine.resume(random_selection(decision, rng))
+        decision = machine.run_until_decision()
+    return game.state.winners
+
+
+# Plays one determinization down the tree, adds a node and plays out from it.  Returns the nodes visited, root first,
+# and the winners.
+def descend(game: Game, root: Node, candidates: list, rng: random.Random) -> tuple:
+    machine = game.machine
+    decision = machine.pending
+    # The root's candidates are the caller's, so that their counts can be summed across workers
+    selections = dict((index, [decision.choices[choice] for choice in candidate])
+                      for index, candidate in enumerate(candidates))
+    node = root
+    path = [root]
+    while True:
+        explored = [key for key in selections if key in node.children]
+        for key in explored:
+            node.children[key].available += 1
+        if len(explored) < len(selections):
+            key = rng.choice([key for key in selections if key not in node.children])
+            child = node.children[key] = Node(decision.player.index)
+            machine.resume(selections[key])
+            path.append(child)
+            return path, rollout(game, rng)
+        key, node = node.best_child(explored)
+        machine.resume(selections[key])
+        path.append(node)
+        decision = machine.run_until_decision()
+        if decision is None:
+            return path, game.state.winners
+        selections = named_selections(decision, rng)
+
+
+# Searches from the decision the game is currently waiting on.  Returns the visit count and total reward of each
+# candidate.  The game is left exactly as it was found.
+def search(game: Game, player_index: int, candidates: list, iterations: int, time_limit, rng: random.Random):
+    decision = game.machine.pending
+    observer = next(player for player in game.players if player.index == player_index)
+    fixed = set(id(choice) for choice in decision.choices)
+    tree = Node()
+    deadline = time.perf_counter() + time_limit if time_limit else None
+    journaling = game.state.journal is not None
+    root = game.snapshot()
+    try:
+        for _ in range(iterations):
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            determinize(game, observer, fixed, rng)
+            path, winners = descend(game, tree, candidates, rng)
+            rewards = dict((winner.index, 1 / len(winners)) for winner in winners)
+            game.restore(root)
+            for node in path:
+                node.visits += 1
+                node.reward += rewards.get(node.player, 0)
+    finally:
+        game.restore(root)
+        if not journaling:
+            game.state.release_snapshots()
+    children = [tree.children.get(index) for index in range(len(candidates))]
+    return [child.visits if child else 0 for child in children], [child.reward if child else 0.0 for child in children]
+
+
+worker_definition = None
+""":type: GameDefinition"""
+
+
+def init_worker(definition: bytes):
+    global worker_definition
+    worker_definition = pickle.loads(definition)
+    selectorcompiler.compile_definition(worker_definition)
+
+
+def worker_search(game: bytes, player_index: int, candidates: list, iterations: int, time_limit, seed: int):
+    loaded = serialization.loads_game(worker_definition, game)
+    return search(loaded, player_index, candidates, iterations, time_limit, random.Random(seed))
+
+
+class MCTSPlayer(Player):
+    def __init__(self, index, iterations: int = 200, time_limit: float = None, workers: int = 1):
+        super(MCTSPlayer, self).__init__(index)
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.workers = workers
+        self.pool = None
+        """:type: concurrent.futures.ProcessPoolExecutor"""
+        self.pool_definition = None
+        self.decisions = 0
+        self.search_time = 0.0
+
+    def select(self, choices: list, min_choices: int, max_choices: int, game_state: GameState, current_action: int):
+        candidates = candidate_selections(len(choices), min_choices, max_choices, self.random)
+        if len(candidates) == 1:
+            return [choices[choice] for choice in candidates[0]]
+        start = time.perf_counter()
+        game = game_state.game
+        if self.workers > 1:
+            visits, rewards = self.search_parallel(game, candidates)
+        else:
+            visits, rewards = search(game, self.index, candidates, self.iterations, self.time_limit, self.random)
+        self.decisions += 1
+        self.search_time += time.perf_counter() - start
+        best = max(range(len(candidates)), key=lambda i: (visits[i], rewards[i]))
+        return [choices[choice] for choice in candidates[best]]
+
+    def search_parallel(self, game: Game, candidates: list):
+        pool = self.get_pool(game.definition)
+        data = serialization.dumps_game(game)
+        iterations = int(math.ceil(self.iterations / self.workers))
+        futures = [pool.submit(worker_search, data, self.index, candidates, iterations, self.time_limit,
+                               self.random.getrandbits(63))
+                   for _ in range(self.workers)]
+        visits = [0] * len(candidates)
+        rewards = [0.0] * len(candidates)
+        for future in futures:
+            worker_visits, worker_rewards = future.result()
+            for index in range(len(candidates)):
+                visits[index] += worker_visits[index]
+                rewards[index] += worker_rewards[index]
+        return visits, rewards
+
+    def get_pool(self, definition: GameDefinition) -> concurrent.futures.ProcessPoolExecutor:
+        if self.pool is None or self.pool_definition is not definition:
+            self.close()
+            self.pool = concurrent.futures.ProcessPoolExecutor(self.workers, initializer=init_worker,
+                                                               initargs=(pickle.dumps(definition),))
+            self.pool_definition = definition
+        return self.pool
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+            self.pool_definition = None
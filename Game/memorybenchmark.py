@@ -0,0 +1,43 @@
+from Game import parser, randomplayer
+import click
+import gc
+import os
+import tracemalloc
+
+DEFAULT_GAME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "games", "race.xml")
+
+
+def create_players():
+    return [randomplayer.RandomPlayer(0), randomplayer.RandomPlayer(1)]
+
+
+def measure(create_game, num_games: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = []
+    for _ in range(num_games):
+        game = create_game()
+        game.assign_players(create_players())
+        games.append(game)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / num_games
+
+
+@click.command()
+@click.option("--game_path", default=DEFAULT_GAME_PATH, help="Path to the game's XML")
+@click.option("--num_games", default=1000, help="Number of live games to hold in memory", type=int)
+def benchmark(game_path: str, num_games: int):
+    definition = parser.parse_definition(game_path)
+    shared = measure(definition.new_game, num_games)
+    print("Shared definition: {:.1f} KB per game".format(shared / 1024))
+    unshared_games = max(1, num_games // 100)
+    unshared = measure(lambda: parser.parse_xml(game_path), unshared_games)
+    print("Parsed per game:   {:.1f} KB per game".format(unshared / 1024))
+    print("Reduction:         {:.0f}x".format(unshared / shared))
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,243 @@
+import abc
+import numpy
+import os
+import tempfile
+
+try:
+    from fann2 import libfann
+except ImportError:
+    libfann = None
+
+# Neural networks for LearningPlayer.  A network maps an input vector to an output vector with values between 0 and 1,
+# and is trained towards target outputs.  NumpyNetwork is a multi-layer perceptron written with NumPy that runs and
+# trains on whole batches at once; FannNetwork wraps a fann2 network, for checkpoints written by earlier versions.
+# fann2 has no way to copy a network, so FannNetwork's weights are the contents of its saved file.
+# load_network tells the two file formats apart, so the "-score.nn" and "-choice.nn" files can be either.
+
+BACKENDS = ("numpy", "fann")
+LEARNING_RATE = 0.01
+BETA1 = 0.9
+BETA2 = 0.999
+EPSILON = 1e-8
+FANN_HEADER = b"FANN"
+
+
+class NeuralNetwork(abc.ABC):
+    @abc.abstractmethod
+    def run(self, inputs) -> numpy.ndarray:
+        pass
+
+    @abc.abstractmethod
+    def train(self, inputs, targets) -> None:
+        pass
+
+    # One row per sample.  Backends that only handle single samples run them one at a time.
+    def run_batch(self, inputs) -> numpy.ndarray:
+        return numpy.array([self.run(row) for row in inputs], numpy.float32)
+
+    # masks, when given, has a row per sample of which outputs to train; the others are left where they are by
+    # targeting the network's current output for them
+    def train_batch(self, inputs, targets, masks=None) -> None:
+        if masks is not None:
+            targets = numpy.where(masks, targets, self.run_batch(inputs))
+        for row, target in zip(inputs, targets):
+            self.train(row, target)
+
+    @abc.abstractmethod
+    def save(self, path: str) -> None:
+        pass
+
+    # Used to train a copy of a network on another thread and hand its weights back (see training.Learner)
+    @abc.abstractmethod
+    def get_weights(self) -> list:
+        pass
+
+    @abc.abstractmethod
+    def set_weights(self, weights: list) -> None:
+        pass
+
+    @abc.abstractmethod
+    def copy(self) -> "NeuralNetwork":
+        pass
+
+
+def sigmoid(x: numpy.ndarray) -> numpy.ndarray:
+    # Same as 1/(1+exp(-x)), without overflowing for large negative x
+    return 0.5 * (1 + numpy.tanh(0.5 * x))
+
+
+class NumpyNetwork(NeuralNetwork):
+    # Fully connected layers with sigmoid activations, trained on mean squared error with Adam
+    def __init__(self, layer_sizes: list, seed: int = None, learning_rate: float = LEARNING_RATE):
+        rng = numpy.random.default_rng(seed)
+        self.weights = []
+        """:type: list[numpy.ndarray]"""
+        self.biases = []
+        """:type: list[numpy.ndarray]"""
+        for inputs, outputs in zip(layer_sizes, layer_sizes[1:]):
+            limit = 1 / numpy.sqrt(inputs)
+            self.weights.append(rng.uniform(-limit, limit, (inputs, outputs)).astype(numpy.float32))
+            self.biases.append(numpy.zeros(outputs, numpy.float32))
+        self.learning_rate = learning_rate
+        self.reset_optimizer()
+
+    # Adam's moment estimates are not saved with the network; training resumes from fresh ones
+    def reset_optimizer(self):
+        parameters = self.weights + self.biases
+        self.first_moments = [numpy.zeros_like(parameter) for parameter in parameters]
+        self.second_moments = [numpy.zeros_like(parameter) for parameter in parameters]
+        self.steps = 0
+
+    def get_weights(self) -> list:
+        return [parameter.copy() for parameter in self.weights + self.biases]
+
+    # Takes the weights of every layer followed by the biases of every layer, as get_weights returns them
+    def set_weights(self, weights: list) -> None:
+        layers = len(weights) // 2
+        self.weights = list(weights[:layers])
+        self.biases = list(weights[layers:])
+        self.reset_optimizer()
+
+    def copy(self) -> "NumpyNetwork":
+        network = NumpyNetwork.__new__(NumpyNetwork)
+        network.weights = []
+        network.biases = []
+        network.learning_rate = self.learning_rate
+        network.set_weights(self.get_weights())
+        return network
+
+    @property
+    def layer_sizes(self) -> list:
+        return [self.weights[0].shape[0]] + [weights.shape[1] for weights in self.weights]
+
+    def run(self, inputs) -> numpy.ndarray:
+        return self.run_batch(numpy.asarray(inputs, numpy.float32).reshape(1, -1))[0]
+
+    def run_batch(self, inputs) -> numpy.ndarray:
+        activation = numpy.asarray(inputs, numpy.float32)
+        for weights, biases in zip(self.weights, self.biases):
+            activation = sigmoid(activation @ weights + biases)
+        return activation
+
+    def train(self, inputs, targets) -> None:
+        self.train_batch(numpy.asarray(inputs, numpy.float32).reshape(1, -1),
+                         numpy.asarray(targets, numpy.float32).reshape(1, -1))
+
+    # One Adam step on the mean squared error over the batch, or over the outputs in masks.  Returns that error, from
+    # before the step.
+    def train_batch(self, inputs, targets, masks=None) -> float:
+        activations = [numpy.asarray(inputs, numpy.float32)]
+        for weights, biases in zip(self.weights, self.biases):
+            activations.append(sigmoid(activations[-1] @ weights + biases))
+        output = activations[-1]
+        error = output - numpy.asarray(targets, numpy.float32)
+        trained = error.size
+        if masks is not None:
+            error *= masks
+            trained = max(1, int(numpy.count_nonzero(masks)))
+        delta = error * output * (1 - output) * (2 / trained)
+        weight_gradients = [None] * len(self.weights)
+        bias_gradients = [None] * len(self.biases)
+        for layer in reversed(range(len(self.weights))):
+            weight_gradients[layer] = activations[layer].T @ delta
+            bias_gradients[layer] = delta.sum(axis=0)
+            if layer:
+                activation = activations[layer]
+                delta = (delta @ self.weights[layer].T) * activation * (1 - activation)
+        self.steps += 1
+        step_size = self.learning_rate * numpy.sqrt(1 - BETA2 ** self.steps) / (1 - BETA1 ** self.steps)
+        parameters = self.weights + self.biases
+        gradients = weight_gradients + bias_gradients
+        for parameter, gradient, first, second in zip(parameters, gradients, self.first_moments,
+                                                      self.second_moments):
+            first *= BETA1
+            first += (1 - BETA1) * gradient
+            second *= BETA2
+            second += (1 - BETA2) * gradient * gradient
+            parameter -= step_size * first / (numpy.sqrt(second) + EPSILON)
+        return float(numpy.sum(error * error) / trained)
+
+    def save(self, path: str) -> None:
+        arrays = dict(("weights" + str(layer), weights) for layer, weights in enumerate(self.weights))
+        arrays.update(("biases" + str(layer), biases) for layer, biases in enumerate(self.biases))
+        # Written through a file object so that numpy does not add ".npz" to the path
+        with open(path, 'wb') as file:
+            numpy.savez(file, layers=len(self.weights), learning_rate=self.learning_rate, **arrays)
+
+    @staticmethod
+    def load(path: str) -> "NumpyNetwork":
+        with numpy.load(path) as arrays:
+            network = NumpyNetwork.__new__(NumpyNetwork)
+            layers = int(arrays["layers"])
+            network.weights = [arrays["weights" + str(layer)] for layer in range(layers)]
+            network.biases = [arrays["biases" + str(layer)] for layer in range(layers)]
+            network.learning_rate = float(arrays["learning_rate"])
+        network.reset_optimizer()
+        return network
+
+
+class FannNetwork(NeuralNetwork):
+    def __init__(self, network: "libfann.neural_net"):
+        self.network = network
+
+    @staticmethod
+    def create(layer_sizes: list) -> "FannNetwork":
+        network = fann_module().neural_net()
+        network.create_standard_array(layer_sizes)
+        return FannNetwork(network)
+
+    @staticmethod
+    def load(path: str) -> "FannNetwork":
+        network = fann_module().neural_net()
+        network.create_from_file(path)
+        return FannNetwork(network)
+
+    def run(self, inputs) -> numpy.ndarray:
+        return numpy.array(self.network.run([float(value) for value in inputs]), numpy.float32)
+
+    def train(self, inputs, targets) -> None:
+        self.network.train([float(value) for value in inputs], [float(value) for value in targets])
+
+    def save(self, path: str) -> None:
+        self.network.save(path)
+
+    def get_weights(self) -> list:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "network.net")
+            self.network.save(path)
+            with open(path, 'rb') as file:
+                return [file.read()]
+
+    def set_weights(self, weights: list) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "network.net")
+            with open(path, 'wb') as file:
+                file.write(weights[0])
+            self.network = FannNetwork.load(path).network
+
+    def copy(self) -> "FannNetwork":
+        network = FannNetwork(None)
+        network.set_weights(self.get_weights())
+        return network
+
+
+def fann_module():
+    if libfann is None:
+        raise ImportError("The fann backend needs the fann2 package")
+    return libfann
+
+
+# A network with one hidden layer half way in size between the input and the output
+def create_network(input_size: int, output_size: int, backend: str = "numpy") -> NeuralNetwork:
+    layer_sizes = [input_size, max(1, (input_size + output_size) // 2), output_size]
+    if backend == "fann":
+        return FannNetwork.create(layer_sizes)
+    return NumpyNetwork(layer_sizes)
+
+
+def load_network(path: str) -> NeuralNetwork:
+    with open(path, 'rb') as file:
+        header = file.read(len(FANN_HEADER))
+    if header == FANN_HEADER:
+        return FannNetwork.load(path)
+    return NumpyNetwork.load(path)
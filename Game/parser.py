@@ -5,7 +5,7 @@ from Game import game as game_models, \
     selectors as selector_models, \
     filters as filter_models, \
     steps as step_models
-from Game import selectorparser
+from Game import selectorparser, selectorcompiler
 __author__ = 'Nathan Merrill'
 
 
@@ -20,23 +20,32 @@ class BadAttribute(Exception):
 
 
 def parse_xml(filename):
+    return parse_definition(filename).new_game()
+
+
+def parse_definition(filename):
     tree = ET.parse(filename)
     root = tree.getroot()
-    return create_game(root)
+    return create_definition(root)
+
+
+def parse_definition_string(content: bytes):
+    return create_definition(ET.fromstring(content))
 
 
-def create_game(root: Element):
-    game = game_models.Game(root.attrib['name'])
+def create_definition(root: Element):
+    game = game_models.GameDefinition(root.attrib['name'])
     game.max_players = root.attrib['max_players']
     game.min_players = root.attrib['min_players']
     add_actions(root.find("actions"), game)
     add_collections(root.find("collections"), game)
     add_turns(root.find("turns"), game)
     add_pieces(root.find("pieces"), game)
+    selectorcompiler.compile_definition(game)
     return game
 
 
-def add_pieces(element: Element, game: game_models.Game):
+def add_pieces(element: Element, game: game_models.GameDefinition):
     for piece in element:
         name = piece.attrib["id"]
         new_piece = game_models.Piece(name, None)
@@ -70,7 +79,7 @@ def add_pieces(element: Element, game: game_models.Game):
                 game.pieces[piece.attrib["id"]].attributes[relation.attrib["name"]] = related
 
 
-def add_turns(element: Element, game: game_models.Game):
+def add_turns(element: Element, game: game_models.GameDefinition):
     for turn in element:
         name = turn.attrib["id"]
         new_turn = game_models.Turn(action=game.actions[turn.attrib["action"]], name=name)
@@ -79,7 +88,7 @@ def add_turns(element: Element, game: game_models.Game):
             game.starting_turn = new_turn
 
 
-def add_collections(element: Element, game: game_models.Game):
+def add_collections(element: Element, game: game_models.GameDefinition):
     for collection in element:
         (game.collections
          if collection.attrib['scope'] == 'game'
@@ -181,7 +190,7 @@ def parse_perform(element: Element):
 
 
 def parse_assign_attribute(element: Element):
-    parts = selectorparser.attribute.parseString(element.attrib["attribute"])
+    parts = selectorparser.parse_tokens(element.attrib["attribute"], selectorparser.attribute, False)
     attr_name = parts[-1]
     attr = selectorparser.to_selector(parts[:-2])
     value = selectorparser.parse(element.attrib["value"], selectorparser.item)
@@ -273,8 +282,8 @@ def parse_if(element: Element):
 
 
 def parse_comparison(test_str):
-    return selectorparser.to_test(selectorparser.test.parseString(test_str))
+    return selectorparser.parse_test(test_str, selectorparser.test)
 
 
 def parse_exists(test_str):
-    return selectorparser.to_test(selectorparser.item.parseString(test_str))
+    return selectorparser.parse_test(test_str, selectorparser.item)
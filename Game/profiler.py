@@ -1,9 +1,12 @@
 import cProfile
+import os
 from Game import start
 
+GAME_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "games", "race.xml")
+
 players = [x(index) for index, x in enumerate([start.player_types["Random"]]*2)]
 profiler = cProfile.Profile()
 profiler.enable()
-start.run_game("../games/dominion.xml", players)
+start.run_game(GAME_PATH, players)
 profiler.disable()
 profiler.print_stats(sort="time")
\ No newline at end of file
@@ -0,0 +1,161 @@
+import contextlib
+import fcntl
+import numpy
+import os
+
+# An append-only store of training transitions on disk, so that LearningPlayer can train on past games again instead
+# of only on the decision it just made.  Each field is a file of fixed width rows mapped with numpy.memmap, so a store
+# of millions of transitions is read a sampled row at a time and never loaded whole.  Several processes can append
+# to one store at once: appends take an exclusive lock on the store's lock file, write their rows, and only then move
+# the row count in the header forward, so readers never see a row that is still being written.  Game ids are handed
+# out from a counter in the header under the same lock, so they are unique across every process using the store.
+
+HEADER_FILE = "header"
+LOCK_FILE = "lock"
+INITIAL_CAPACITY = 4096
+DEFAULT_PRIORITY = 1.0
+# Header fields
+INPUT_LENGTH, OUTPUT_LENGTH, COUNT, CAPACITY, NEXT_GAME_ID = range(5)
+HEADER_LENGTH = 5
+
+
+class ReplayStore:
+    # Field name, dtype, and whether the rows are input_length or output_length wide (None for one value per row)
+    fields = (
+        ("inputs", numpy.float32, INPUT_LENGTH),
+        ("scores", numpy.float32, None),
+        ("choice_targets", numpy.float32, OUTPUT_LENGTH),
+        ("masks", numpy.bool_, OUTPUT_LENGTH),
+        ("game_ids", numpy.int64, None),
+        ("priorities", numpy.float32, None),
+    )
+
+    def __init__(self, path: str, input_length: int, output_length: int, capacity: int = INITIAL_CAPACITY):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.lock_file = open(os.path.join(path, LOCK_FILE), 'a')
+        with self.locked():
+            header_path = os.path.join(path, HEADER_FILE)
+            if os.path.exists(header_path):
+                self.header = numpy.memmap(header_path, numpy.int64, 'r+', shape=(HEADER_LENGTH,))
+                if self.header[INPUT_LENGTH] != input_length or self.header[OUTPUT_LENGTH] != output_length:
+                    raise ValueError(path + " holds rows of " + str(self.header[INPUT_LENGTH]) + " inputs and " +
+                                     str(self.header[OUTPUT_LENGTH]) + " outputs, not " + str(input_length) +
+                                     " and " + str(output_length))
+            else:
+                for name, dtype, width in ReplayStore.fields:
+                    self.resize_file(name, dtype, width, capacity, input_length, output_length)
+                header = numpy.memmap(header_path + ".new", numpy.int64, 'w+', shape=(HEADER_LENGTH,))
+                header[:] = (input_length, output_length, 0, capacity, 0)
+                header.flush()
+                del header
+                os.replace(header_path + ".new", header_path)
+                self.header = numpy.memmap(header_path, numpy.int64, 'r+', shape=(HEADER_LENGTH,))
+        self.input_length = input_length
+        self.output_length = output_length
+        self.capacity = 0
+        self.map_fields()
+
+    @contextlib.contextmanager
+    def locked(self):
+        fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+
+    def field_path(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def row_shape(self, width, rows: int, input_length: int, output_length: int) -> tuple:
+        if width is None:
+            return rows,
+        return rows, input_length if width == INPUT_LENGTH else output_length
+
+    def resize_file(self, name: str, dtype, width, rows: int, input_length: int, output_length: int):
+        size = int(numpy.prod(self.row_shape(width, rows, input_length, output_length))) * numpy.dtype(dtype).itemsize
+        # Extending a file this way leaves a sparse file, so unused capacity takes no disk space
+        with open(self.field_path(name), 'ab') as file:
+            file.truncate(size)
+
+    # Maps every field at the capacity in the header, after this or another process grew the files
+    def map_fields(self):
+        capacity = int(self.header[CAPACITY])
+        for name, dtype, width in ReplayStore.fields:
+            shape = self.row_shape(width, capacity, self.input_length, self.output_length)
+            setattr(self, name, numpy.memmap(self.field_path(name), dtype, 'r+', shape=shape))
+        self.capacity = capacity
+
+    def __len__(self):
+        return int(self.header[COUNT])
+
+    # Appends one row per transition.  transitions is (inputs, scores, choice targets, masks) as TransitionBuffer.take
+    # returns them; game_ids is a single id for all the rows or one per row.  Without game_ids the rows are one game,
+    # and get a new game id.
+    def append(self, transitions: tuple, game_ids=None) -> range:
+        inputs, scores, choice_targets, masks = transitions
+        rows = len(inputs)
+        with self.locked():
+            if game_ids is None:
+                game_ids = self.reserve_game_ids(1)
+            start = int(self.header[COUNT])
+            end = start + rows
+            if end > self.header[CAPACITY]:
+                capacity = max(end, int(self.header[CAPACITY]) * 2)
+                for name, dtype, width in ReplayStore.fields:
+                    self.resize_file(name, dtype, width, capacity, self.input_length, self.output_length)
+                self.header[CAPACITY] = capacity
+            if self.header[CAPACITY] != self.capacity:
+                self.map_fields()
+            self.inputs[start:end] = inputs
+            self.scores[start:end] = numpy.asarray(scores, numpy.float32).reshape(-1)
+            self.choice_targets[start:end] = choice_targets
+            self.masks[start:end] = masks
+            self.game_ids[start:end] = game_ids
+            self.priorities[start:end] = DEFAULT_PRIORITY
+            self.header[COUNT] = end
+        return range(start, end)
+
+    # Returns the first of count new game ids.  Call with the store locked.
+    def reserve_game_ids(self, count: int) -> int:
+        first = int(self.header[NEXT_GAME_ID])
+        self.header[NEXT_GAME_ID] = first + count
+        return first
+
+    # Returns the rows at indexes as (inputs, scores, choice targets, masks), read into memory
+    def read(self, indexes) -> tuple:
+        if len(self) > self.capacity:
+            self.map_fields()
+        return (numpy.array(self.inputs[indexes]), numpy.array(self.scores[indexes]).reshape(-1, 1),
+                numpy.array(self.choice_targets[indexes]), numpy.array(self.masks[indexes]))
+
+    def sample_uniform(self, size: int, rng: numpy.random.Generator) -> tuple:
+        indexes = rng.integers(0, len(self), size)
+        return indexes, self.read(indexes)
+
+    # Samples rows with probability proportional to priority ** alpha.  Also returns the importance sampling weight
+    # of each row, (count * probability) ** -beta scaled so that the largest is 1.
+    def sample_prioritized(self, size: int, rng: numpy.random.Generator, alpha: float = 0.6,
+                           beta: float = 0.4) -> tuple:
+        count = len(self)
+        if count > self.capacity:
+            self.map_fields()
+        priorities = numpy.power(self.priorities[:count], alpha, dtype=numpy.float64)
+        probabilities = priorities / priorities.sum()
+        indexes = rng.choice(count, size, p=probabilities)
+        weights = numpy.power(count * probabilities[indexes], -beta)
+        return indexes, self.read(indexes), (weights / weights.max()).astype(numpy.float32)
+
+    def update_priorities(self, indexes, priorities) -> None:
+        if len(self) > self.capacity:
+            self.map_fields()
+        self.priorities[indexes] = priorities
+
+    def flush(self) -> None:
+        for name, dtype, width in ReplayStore.fields:
+            getattr(self, name).flush()
+        self.header.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.lock_file.close()
@@ -0,0 +1,371 @@
+from Game import selectors as selector_models, tests as test_models
+from Game.game import GameDefinition, GameState, Collection, Action, missing
+import operator
+from Game.steps import Step
+
+# Compiles Selector and Test trees into plain closures.  Scope lookups, attribute and context names and operators are
+# bound when the closure is built, and common shapes (named items, attribute filters, constant operands) are fused
+# into a single closure.  The tree form is kept as is: it is still used for __repr__ and error messages, and the
+# compiled closure is installed on the root node as its select/test method, so callers do not change.
+
+
+def compile_selector(selector):
+    if not isinstance(selector, selector_models.Selector):
+        return constant(selector)
+    return selector_compilers[type(selector)](selector)
+
+
+def compile_test(test: test_models.Test):
+    return test_compilers[type(test)](test)
+
+
+def constant(value):
+    def select(game_state: GameState, selected: list = None):
+        return [value]
+    return select
+
+
+def compile_value(selector: selector_models.ValueSelector):
+    return constant(selector.value)
+
+
+def compile_scope(selector: selector_models.ScopeSelector):
+    if selector.scope == "game":
+        def select(game_state: GameState, selected: list = None):
+            return [game_state.game]
+    elif selector.scope == "player":
+        def select(game_state: GameState, selected: list = None):
+            return [game_state.player]
+    elif selector.scope == "players":
+        def select(game_state: GameState, selected: list = None):
+            return game_state.game.players
+    elif selector.scope == "current_turn":
+        def select(game_state: GameState, selected: list = None):
+            return [game_state.turns[-1]]
+    else:
+        scope = selector_models.scopes[selector.scope]
+
+        def select(game_state: GameState, selected: list = None):
+            return scope(game_state)
+    return select
+
+
+def compile_variable(selector: selector_models.VariableSelector):
+    name = selector.variable_name
+
+    def select(game_state: GameState, selected: list = None):
+        return game_state.vars[name]
+    return select
+
+
+def compile_attribute(selector: selector_models.AttributeSelector):
+    name = selector.attribute_name
+
+    def select(game_state: GameState, selected: list = None):
+        return [parent.attributes[name] for parent in selected if name in parent.attributes]
+    return select
+
+
+def context_getter(name: str):
+    if name == "pieces":
+        def get(parent):
+            return parent.pieces if type(parent) is Collection else parent[name]
+    elif name in Collection.contexts:
+        collection_get = Collection.contexts[name]
+
+        def get(parent):
+            return collection_get(parent) if type(parent) is Collection else parent[name]
+    else:
+        def get(parent):
+            return parent[name]
+    return get
+
+
+def compile_context(selector: selector_models.ContextSelector):
+    get = context_getter(selector.context_name)
+
+    def select(game_state: GameState, selected: list = None):
+        return [child for parent in selected for child in get(parent)]
+    return select
+
+
+def compile_named_item(selector: selector_models.NamedItemSelector):
+    name = selector.item_name
+
+    def select(game_state: GameState, selected: list = None):
+        assert(len(selected) == 1)
+        return selected[0].get_item(name)
+    return select
+
+
+def compile_named_scope(scope: str, name: str):
+    if scope == "piece":
+        def select(game_state: GameState, selected: list = None):
+            return [game_state.game.pieces[name]]
+    elif scope == "turn":
+        def select(game_state: GameState, selected: list = None):
+            return [game_state.game.turns[name]]
+    else:
+        def select(game_state: GameState, selected: list = None):
+            return [game_state.game.actions[name]]
+    return select
+
+
+def compile_filter(selector: selector_models.FilterSelector):
+    test = compile_item_test(selector.test)
+
+    def select(game_state: GameState, selected: list = None):
+        return [item for item in selected if test(game_state, item)]
+    return select
+
+
+def compile_context_filter(context: selector_models.ContextSelector, selector: selector_models.FilterSelector):
+    get = context_getter(context.context_name)
+    test = compile_item_test(selector.test)
+
+    def select(game_state: GameState, selected: list = None):
+        return [child for parent in selected for child in get(parent) if test(game_state, child)]
+    return select
+
+
+# [@attribute] and [@attribute = value] filters over a collection's pieces are answered from the collection's
+# attribute index.  Returns the attribute name and value (missing for [@attribute]) of such a filter, or None.
+def indexed_filter(test: test_models.Test):
+    if type(test) is test_models.TestExists and type(test.selector) is selector_models.AttributeSelector:
+        return test.selector.attribute_name, missing
+    if type(test) is test_models.TestComparison and type(test.obj1) is selector_models.AttributeSelector \
+            and type(test.obj2) is selector_models.ValueSelector and test.comparison is operator.eq:
+        return test.obj1.attribute_name, test.obj2.value
+    return None
+
+
+def compile_indexed_filter(selector: selector_models.FilterSelector, name: str, value):
+    get = context_getter("pieces")
+    test = compile_item_test(selector.test)
+
+    def select(game_state: GameState, selected: list = None):
+        result = []
+        for parent in selected:
+            if type(parent) is Collection:
+                result.extend(parent.pieces_with(name, value))
+            else:
+                result.extend(child for child in get(parent) if test(game_state, child))
+        return result
+    return select
+
+
+def chain(first, second):
+    def select(game_state: GameState, selected: list = None):
+        return second(game_state, first(game_state, selected))
+    return select
+
+
+def compile_iterating(selector: selector_models.IteratingSelector):
+    return compile_nodes(list(selector.selectors))
+
+
+def compile_nodes(nodes: list):
+    compiled = []
+    index = 0
+    while index < len(nodes):
+        node = nodes[index]
+        following = nodes[index+1] if index+1 < len(nodes) else None
+        if type(node) is selector_models.ScopeSelector and node.scope in ("piece", "turn", "action") \
+                and type(following) is selector_models.NamedItemSelector:
+            compiled.append(compile_named_scope(node.scope, following.item_name))
+            index += 2
+        elif type(node) is selector_models.ContextSelector and type(following) is selector_models.FilterSelector:
+            indexed = indexed_filter(following.test) if node.context_name == "pieces" else None
+            if indexed is not None:
+                compiled.append(compile_indexed_filter(following, *indexed))
+            else:
+                compiled.append(compile_context_filter(node, following))
+            index += 2
+        else:
+            compiled.append(compile_selector(node))
+            index += 1
+    select = compiled[0]
+    for following in compiled[1:]:
+        select = chain(select, following)
+    return select
+
+
+def compile_operator(selector: selector_models.OperatorSelector):
+    left = compile_selector(selector.left)
+    operator = selector.operator
+
+    def type_error(left_value, right_value):
+        return str(selector.left) + " did not match type with "+str(selector.right) \
+            + ": " + str(type(left_value)) + " vs " + str(type(right_value)) \
+            + " Left value: "+str(left_value)+" Right value: "+str(right_value)
+
+    if type(selector.right) is selector_models.ValueSelector:
+        right_value = selector.right.value
+
+        def select(game_state: GameState, selected: list = None):
+            left_selected = left(game_state, selected)
+            assert(len(left_selected) == 1), str(selector.left)+" selected "+str(len(left_selected))+" items"
+            left_value = left_selected[0]
+            assert(type(left_value) == type(right_value)), type_error(left_value, right_value)
+            return [operator(left_value, right_value)]
+        return select
+    right = compile_selector(selector.right)
+
+    def select(game_state: GameState, selected: list = None):
+        left_selected = left(game_state, selected)
+        right_selected = right(game_state, selected)
+        assert(len(left_selected) == 1), str(selector.left)+" selected "+str(len(left_selected))+" items"
+        assert(len(right_selected) == 1), str(selector.right)+" selected "+str(len(right_selected))+" items"
+        left_value = left_selected[0]
+        right_value = right_selected[0]
+        assert(type(left_value) == type(right_value)), type_error(left_value, right_value)
+        return [operator(left_value, right_value)]
+    return select
+
+
+def pieces_count(parent) -> int:
+    return len(parent.pieces) if type(parent) is Collection else len(parent["pieces"])
+
+
+def compile_size(selector: selector_models.SizeSelector):
+    # count(...:pieces) adds up the sizes of the collections instead of listing their pieces
+    nodes = selector.to_count.selectors if type(selector.to_count) is selector_models.IteratingSelector \
+        else [selector.to_count]
+    last = nodes[-1]
+    if type(last) is selector_models.ContextSelector and last.context_name == "pieces":
+        if len(nodes) == 1:
+            def select(game_state: GameState, selected: list = None):
+                return [sum(pieces_count(parent) for parent in selected)]
+            return select
+        parents = compile_nodes(list(nodes[:-1]))
+
+        def select(game_state: GameState, selected: list = None):
+            return [sum(pieces_count(parent) for parent in parents(game_state, selected))]
+        return select
+    to_count = compile_selector(selector.to_count)
+
+    def select(game_state: GameState, selected: list = None):
+        return [len(to_count(game_state, selected))]
+    return select
+
+
+def compile_first(selector: selector_models.FirstSelector):
+    first_of = compile_selector(selector.first_of)
+
+    def select(game_state: GameState, selected: list = None):
+        return [first_of(game_state, selected)[0]]
+    return select
+
+
+def compile_random(selector: selector_models.RandomSelector):
+    random_from = compile_selector(selector.random_from)
+    count = compile_selector(selector.count)
+
+    def select(game_state: GameState, selected: list = None):
+        return game_state.random.sample(random_from(game_state, selected), count(game_state, selected)[0])
+    return select
+
+
+def compile_comparison(test: test_models.TestComparison):
+    left = compile_selector(test.obj1)
+    right = compile_selector(test.obj2)
+    comparison = test.comparison
+
+    def check(game_state: GameState, selected: list = None):
+        left_selected = left(game_state, selected)
+        right_selected = right(game_state, selected)
+        if len(left_selected) == 0 or len(right_selected) == 0:
+            return False
+        assert(len(left_selected) == 1), str(test.obj1) + " returned "+str(len(left_selected))+" objects: " + \
+            str(left_selected)
+        assert(len(right_selected) == 1), str(test.obj2) + " returned "+str(len(right_selected))+" objects: " + \
+            str(right_selected)
+        return comparison(left_selected[0], right_selected[0])
+    return check
+
+
+def compile_exists(test: test_models.TestExists):
+    selector = compile_selector(test.selector)
+
+    def check(game_state: GameState, selected: list = None):
+        return len(selector(game_state, selected)) != 0
+    return check
+
+
+# Tests inside a filter are run once per item.  These variants take the item itself instead of a one item list, and
+# read attributes of the item directly for the [@attribute] and [@attribute op value] shapes.
+def compile_item_test(test: test_models.Test):
+    if type(test) is test_models.TestExists and type(test.selector) is selector_models.AttributeSelector:
+        name = test.selector.attribute_name
+
+        def check(game_state: GameState, item):
+            return name in item.attributes
+        return check
+    if type(test) is test_models.TestComparison and type(test.obj1) is selector_models.AttributeSelector \
+            and type(test.obj2) is selector_models.ValueSelector:
+        name = test.obj1.attribute_name
+        value = test.obj2.value
+        comparison = test.comparison
+
+        def check(game_state: GameState, item):
+            attributes = item.attributes
+            return name in attributes and comparison(attributes[name], value)
+        return check
+    compiled = compile_test(test)
+
+    def check(game_state: GameState, item):
+        return compiled(game_state, [item])
+    return check
+
+
+selector_compilers = {
+    selector_models.ValueSelector: compile_value,
+    selector_models.ScopeSelector: compile_scope,
+    selector_models.VariableSelector: compile_variable,
+    selector_models.AttributeSelector: compile_attribute,
+    selector_models.ContextSelector: compile_context,
+    selector_models.NamedItemSelector: compile_named_item,
+    selector_models.FilterSelector: compile_filter,
+    selector_models.IteratingSelector: compile_iterating,
+    selector_models.OperatorSelector: compile_operator,
+    selector_models.SizeSelector: compile_size,
+    selector_models.FirstSelector: compile_first,
+    selector_models.RandomSelector: compile_random,
+}
+
+test_compilers = {
+    test_models.TestComparison: compile_comparison,
+    test_models.TestExists: compile_exists,
+}
+
+
+def install(obj, seen: set) -> None:
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+    if isinstance(obj, selector_models.Selector):
+        obj.select = compile_selector(obj)
+        if isinstance(obj, selector_models.ValueSelector):
+            install(obj.value, seen)
+    elif isinstance(obj, test_models.Test):
+        obj.test = compile_test(obj)
+    elif isinstance(obj, Action):
+        for step in obj.steps:
+            install(step, seen)
+    elif isinstance(obj, Step):
+        for value in vars(obj).values():
+            install(value, seen)
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            install(value, seen)
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            install(value, seen)
+
+
+def compile_definition(definition: GameDefinition) -> None:
+    seen = set()
+    for action in definition.actions.values():
+        install(action, seen)
+    for turn in definition.turns.values():
+        install(turn.action, seen)
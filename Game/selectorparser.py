@@ -1,6 +1,8 @@
 from Game import selectors as selector_models
 from Game import tests as test_models
 from pyparsing import *
+import os
+import pickle
 
 
 class BadSelector(Exception):
@@ -92,14 +94,78 @@ numeric << (number ^ count_function ^ attribute ^ variable) + ZeroOrMore(oneOf("
 boolean << (test ^ true ^ false)
 
 
+productions = {
+    "item": item,
+    "numeric": numeric,
+    "piece": piece,
+    "collection": collection,
+    "turn": turn,
+    "action": action,
+    "attribute": attribute,
+    "boolean": boolean,
+    "player": player,
+    "test": test,
+}
+production_names = dict((id(production), name) for name, production in productions.items())
+whole_productions = dict((name, StringStart()+production+StringEnd()) for name, production in productions.items())
+
+# Interned parse results, keyed by (kind, expression, production name).  The same expression is repeated many times
+# in a rule file, so it is only run through the grammar once and every occurrence shares the resulting selector.
+parsed = {}
+""":type: dict[tuple[str, str, str], object]"""
+
+
+def production_name(selector_type) -> str:
+    try:
+        return production_names[id(selector_type)]
+    except KeyError:
+        raise BadSelector("Unknown grammar production: "+str(selector_type))
+
+
+def parse_tokens(string, selector_type, parse_all=True) -> list:
+    name = production_name(selector_type)
+    key = ("tokens" if parse_all else "prefix", string, name)
+    tokens = parsed.get(key)
+    if tokens is None:
+        grammar = whole_productions[name] if parse_all else selector_type
+        tokens = parsed[key] = grammar.parseString(string).asList()
+    return tokens
+
+
 def parse(string, selector_type):
     if string is None:
         return None
-    print(string)
+    key = ("selector", string, production_name(selector_type))
+    selector = parsed.get(key)
+    if selector is None:
+        selector = parsed[key] = to_selector(parse_tokens(string, selector_type))
+    return selector
+
+
+def parse_test(string, selector_type):
+    key = ("test", string, production_name(selector_type))
+    test = parsed.get(key)
+    if test is None:
+        test = parsed[key] = to_test(parse_tokens(string, selector_type, False))
+    return test
+
+
+def load_cache(path: str) -> None:
+    try:
+        with open(path, 'rb') as file:
+            parsed.update(pickle.load(file))
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        pass
+
+
+def save_cache(path: str) -> None:
     try:
-        return to_selector((StringStart()+selector_type+StringEnd()).setDebug(False).parseString(string))
-    except (Exception, RecursionError, ValueError):
-        raise
+        temp_path = path + "." + str(os.getpid())
+        with open(temp_path, 'wb') as file:
+            pickle.dump(parsed, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    except OSError:
+        pass
 
 
 def to_selector(tokens) -> selector_models.Selector:
@@ -161,7 +227,6 @@ def to_selectors(tokens) -> list:
                 selector = to_selector(tokens[iterator+2:end_position])
                 selectors.append(selector_models.FirstSelector(selector))
             else:
-                print(tokens)
                 selector = to_selector(tokens[iterator+2:comma_position])
                 count = to_selector(tokens[comma_position+1:end_position])
                 selectors.append(selector_models.RandomSelector(selector, count))
@@ -196,10 +261,10 @@ def to_selectors(tokens) -> list:
             iterator += 2
             continue
         if str(next_token).startswith("'"):
-            selectors.append(next_token[1:-1])
+            selectors.append(selector_models.ValueSelector(tokens[iterator][1:-1]))
             iterator += 1
             continue
-        selectors.append(int(next_token))
+        selectors.append(selector_models.ValueSelector(int(next_token)))
         iterator += 1
     return selectors
 
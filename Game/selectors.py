@@ -10,26 +10,32 @@ operators = {
 
 
 class Selector:
-    def select(self, game_state: GameState, selected: list) -> list:
+    def select(self, game_state: GameState, selected: list = None) -> list:
         pass
 
-    def select_one(self, game_state: GameState, selected: list):
+    def select_one(self, game_state: GameState, selected: list = None):
         item = self.select(game_state, selected)
         assert(len(item) == 1), str(self)+" selected "+str(len(item))+" items"
         return item[0]
 
-    def select_one_of_type(self, game_state: GameState, item_type, selected: list):
+    def select_one_of_type(self, game_state: GameState, item_type, selected: list = None):
         item = self.select_one(game_state, selected)
         assert(isinstance(item, item_type)), \
             str(self) + " selected item of type " + str(type(item)) + " instead of " + str(item_type)
         return item
 
+    def __getstate__(self):
+        # A compiled select (see selectorcompiler) is a closure and is rebuilt after loading
+        state = self.__dict__.copy()
+        state.pop("select", None)
+        return state
+
 
 class IteratingSelector(Selector):
     def __init__(self, selectors):
         self.selectors = selectors
 
-    def select(self, game_state: GameState, selected: list):
+    def select(self, game_state: GameState, selected: list = None):
         current_selected = selected
         for selector in self.selectors:
             current_selected = selector.select(game_state, current_selected)
@@ -46,7 +52,7 @@ class OperatorSelector(Selector):
         self.operator = operators[op]
         self.str = op
 
-    def select(self, game_state: GameState, selected: list):
+    def select(self, game_state: GameState, selected: list = None):
         left_selected = self.left.select_one(game_state, selected)
         right_selected = self.right.select_one(game_state, selected)
         assert(type(left_selected) == type(right_selected)), \
@@ -63,8 +69,7 @@ class ValueSelector(Selector):
     def __init__(self, value):
         self.value = value
 
-    def select(self, game_state: GameState, selected: list):
-        assert(selected is None)
+    def select(self, game_state: GameState, selected: list = None):
         return [self.value]
 
     def __repr__(self):
@@ -78,7 +83,7 @@ class AttributeSelector(Selector):
     def __init__(self, attribute_name: str):
         self.attribute_name = attribute_name
 
-    def select(self, game_state: GameState, selected: list):
+    def select(self, game_state: GameState, selected: list = None):
         try:
             return [parent.get_attribute(self.attribute_name)
                     for parent in selected
@@ -96,7 +101,7 @@ class SizeSelector(Selector):
     def __init__(self, to_count: Selector):
         self.to_count = to_count
 
-    def select(self, game_state: GameState, selected: list):
+    def select(self, game_state: GameState, selected: list = None):
         return [len(self.to_count.select(game_state, selected))]
 
     def __repr__(self):
@@ -107,7 +112,7 @@ class FirstSelector(Selector):
     def __init__(self, first_of: Selector):
         self.first_of = first_of
 
-    def select(self, game_state: GameState, selected: list):
+    def select(self, game_state: GameState, selected: list = None):
         return [self.first_of.select(game_state, selected)[0]]
 
     def __repr__(self):
@@ -119,9 +124,8 @@ class RandomSelector(Selector):
         self.random_from = random_from
         self.count = count
 
-    def select(self, game_state: GameState, selected: list):
-        import random
-        return random.sample(self.random_from.select(game_state, selected), self.count.select(game_state, selected))
+    def select(self, game_state: GameState, selected: list = None):
+        return game_state.random.sample(self.random_from.select(game_state, selected), self.count.select_one(game_state, selected))
 
 
 class ContextSelector(Selector):
@@ -129,7 +133,7 @@ class ContextSelector(Selector):
         self.context_name = context_name
         assert(self.context_name[0] not in {"$", ":", "@"})
 
-    def select(self, game_state: GameState, selected: list):
+    def select(self, game_state: GameState, selected: list = None):
         try:
             return [child
                     for parent in selected
@@ -156,7 +160,7 @@ class NamedItemSelector(Selector):
     def __init__(self, item_name):
         self.item_name = item_name
 
-    def select(self, game_state: GameState, selected: list):
+    def select(self, game_state: GameState, selected: list = None):
         assert(len(selected) == 1)
         return selected[0].get_item(self.item_name)
 
@@ -182,7 +186,7 @@ class ScopeSelector(Selector):
     def __init__(self, scope: str):
         self.scope = scope
 
-    def select(self, game_state: GameState, selected: list):
+    def select(self, game_state: GameState, selected: list = None):
         return scopes[self.scope](game_state)
 
     def __repr__(self):
@@ -193,7 +197,7 @@ class VariableSelector(Selector):
     def __init__(self, variable_name: str):
         self.variable_name = variable_name
 
-    def select(self, game_state: GameState, selected: list):
+    def select(self, game_state: GameState, selected: list = None):
         return game_state.get_var(self.variable_name)
 
     def __repr__(self):
@@ -204,8 +208,8 @@ class FilterSelector(Selector):
     def __init__(self, test):
         self.test = test
 
-    def select(self, game_state: GameState, selected: list):
-        return [item for item in selected if self.test.test(game_state, item)]
+    def select(self, game_state: GameState, selected: list = None):
+        return [item for item in selected if self.test.test(game_state, [item])]
 
     def __repr__(self):
         return "["+str(self.test)+"]"
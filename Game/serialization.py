@@ -0,0 +1,103 @@
+from Game.game import GameDefinition, Game, Player, Action, Turn, Piece, Collection
+from Game.selectors import Selector
+from Game.tests import Test
+from Game.steps import Step
+import io
+import pickle
+import weakref
+
+# Pickles a running Game without its rules.  Objects that belong to the GameDefinition (actions, steps, selectors,
+# piece prototypes, ...) are written as their index in a fixed walk of the definition, so the game can be loaded
+# against another copy of the same definition, e.g. one that a worker process loaded once at start up.  Players are
+# written as plain Player objects: their seat, name, attributes and collections, but not their strategy.
+
+registries = weakref.WeakKeyDictionary()
+
+
+class DefinitionRegistry:
+    def __init__(self, definition: GameDefinition):
+        self.objects = []
+        self.indexes = {}
+        self.add(definition)
+        for prototypes in (definition.pieces, definition.collections, definition.player_collections,
+                           definition.turns):
+            for prototype in prototypes.values():
+                self.add(prototype)
+        # Copied pieces share their prototype's attribute dict until they change an attribute
+        for prototype in definition.pieces.values():
+            self.add(prototype.attributes)
+        for action in definition.actions.values():
+            self.walk(action)
+        for turn in definition.turns.values():
+            self.walk(turn.action)
+
+    def add(self, obj) -> bool:
+        if id(obj) in self.indexes:
+            return False
+        self.indexes[id(obj)] = len(self.objects)
+        self.objects.append(obj)
+        return True
+
+    def walk(self, obj):
+        if isinstance(obj, (Action, Step, Selector, Test)):
+            if not self.add(obj):
+                return
+            if isinstance(obj, Action):
+                self.add(obj.steps)
+            for value in vars(obj).values():
+                self.walk(value)
+        elif isinstance(obj, dict):
+            for value in obj.values():
+                self.walk(value)
+        elif isinstance(obj, (list, tuple)):
+            for value in obj:
+                self.walk(value)
+
+
+def get_registry(definition: GameDefinition) -> DefinitionRegistry:
+    registry = registries.get(definition)
+    if registry is None:
+        registry = registries[definition] = DefinitionRegistry(definition)
+    return registry
+
+
+def load_player(index: int, name: str, attributes: dict, collections: dict) -> Player:
+    player = Player(index, name)
+    player.attributes = attributes
+    player.collections = collections
+    return player
+
+
+class GamePickler(pickle.Pickler):
+    def __init__(self, file, registry: DefinitionRegistry):
+        super(GamePickler, self).__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.registry = registry
+
+    def persistent_id(self, obj):
+        if isinstance(obj, (str, int, float, bool)) or obj is None:
+            return None
+        return self.registry.indexes.get(id(obj))
+
+    def reducer_override(self, obj):
+        if isinstance(obj, Player):
+            return load_player, (obj.index, obj.name, obj.attributes, obj.collections)
+        return NotImplemented
+
+
+class GameUnpickler(pickle.Unpickler):
+    def __init__(self, file, registry: DefinitionRegistry):
+        super(GameUnpickler, self).__init__(file)
+        self.registry = registry
+
+    def persistent_load(self, pid):
+        return self.registry.objects[pid]
+
+
+def dumps_game(game: Game) -> bytes:
+    file = io.BytesIO()
+    GamePickler(file, get_registry(game.definition)).dump(game)
+    return file.getvalue()
+
+
+def loads_game(definition: GameDefinition, data: bytes) -> Game:
+    return GameUnpickler(io.BytesIO(data), get_registry(definition)).load()
@@ -0,0 +1,284 @@
+from Game.game import Game, GameDefinition, GameObject, GameState, Player
+from Game import gamecache, randomplayer
+import asyncio
+import click
+import json
+import logging
+
+# Hosts many games on one asyncio event loop.  Each client connection is a seat; once enough clients are waiting in
+# the lobby a session starts and runs its Game until a decision is needed, then awaits select_async() of that
+# decision's player.  A remote player's decision is a line of JSON sent to the client, answered by a line of JSON, so a
+# slow client only stalls its own session.
+#
+# Server to client:
+#   {"type": "start", "seat": 0, "players": 2}
+#   {"type": "select", "id": 7, "choices": ["card_copper", ...], "min": 0, "max": 1, "line": 120}
+#   {"type": "end", "won": true, "winners": [0], "seed": 1234}
+# Client to server, answering the select with that id with indexes into its choices:
+#   {"id": 7, "choices": [0, 3]}
+# Answers with any other id, such as a late answer to a select that timed out, are dropped.  An answer that is not
+# valid JSON, or not a valid selection, is answered with {"type": "error", "id": 7, "message": ...} and the select
+# stays open.  A session that stops on a timeout or an error still sends "end", with "timeout" or "error" set.
+
+MAX_LINE_LENGTH = 1 << 16
+# Clients arrive in bursts when many games end at once, so accept more pending connections than asyncio's default
+CONNECTION_BACKLOG = 1024
+INCOMING_QUEUE_SIZE = 4
+
+logger = logging.getLogger(__name__)
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+def choice_name(choice) -> str:
+    if isinstance(choice, GameObject):
+        return choice.name
+    return str(choice)
+
+
+class Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        # Bounded, so that a client sending faster than its session consumes stops being read
+        self.incoming = asyncio.Queue(INCOMING_QUEUE_SIZE)
+        self.closed = False
+        self.reader_task = asyncio.ensure_future(self.read_lines())
+
+    async def read_lines(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                await self.incoming.put(line)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self.closed = True
+            await self.incoming.put(None)
+
+    async def send(self, message: dict):
+        if self.closed or self.writer.is_closing():
+            raise ClientDisconnected()
+        self.writer.write(json.dumps(message).encode() + b"\n")
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            self.closed = True
+            raise ClientDisconnected()
+
+    async def receive(self, timeout: float) -> dict:
+        line = await asyncio.wait_for(self.incoming.get(), timeout)
+        if line is None:
+            raise ClientDisconnected()
+        return json.loads(line.decode())
+
+    async def close(self):
+        self.closed = True
+        self.reader_task.cancel()
+        try:
+            self.writer.close()
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class RemotePlayer(Player):
+    def __init__(self, index: int, connection: Connection, timeout: float):
+        super(RemotePlayer, self).__init__(index)
+        self.connection = connection
+        self.timeout = timeout
+        self.timeouts = 0
+        # Id of the last select sent to the client
+        self.decision_id = 0
+
+    def select(self, choices: list, min_choices: int, max_choices: int, game_state: GameState, current_action: int):
+        raise AssertionError("Remote players can only be asked through select_async")
+
+    async def select_async(self, choices: list, min_choices: int, max_choices: int, game_state: GameState,
+                           current_action: int):
+        if not self.connection.closed:
+            self.decision_id += 1
+            loop = asyncio.get_running_loop()
+            try:
+                await self.connection.send({
+                    "type": "select",
+                    "id": self.decision_id,
+                    "choices": [choice_name(choice) for choice in choices],
+                    "min": min_choices,
+                    "max": max_choices,
+                    "line": current_action,
+                })
+                deadline = loop.time() + self.timeout
+                while True:
+                    try:
+                        answer = await self.connection.receive(deadline - loop.time())
+                    except ValueError:
+                        await self.connection.send({"type": "error", "id": self.decision_id,
+                                                    "message": "Malformed JSON"})
+                        continue
+                    if not isinstance(answer, dict) or answer.get("id") != self.decision_id:
+                        continue
+                    chosen = self.to_choices(answer, choices, min_choices, max_choices)
+                    if chosen is not None:
+                        return chosen
+                    await self.connection.send({"type": "error", "id": self.decision_id,
+                                                "message": "Invalid selection"})
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+            except ClientDisconnected:
+                pass
+        # A player that timed out or left makes the smallest allowed selection
+        return choices[:min_choices]
+
+    @staticmethod
+    def to_choices(answer, choices: list, min_choices: int, max_choices: int):
+        try:
+            indexes = answer["choices"]
+            if len(set(indexes)) != len(indexes) or not min_choices <= len(indexes) <= max_choices:
+                return None
+            if any(not 0 <= index < len(choices) for index in indexes):
+                return None
+            return [choices[index] for index in indexes]
+        except (KeyError, TypeError, IndexError):
+            return None
+
+
+class Session:
+    def __init__(self, game: Game, players: list, connections: list):
+        self.game = game
+        self.players = players
+        self.connections = connections
+
+    async def run(self, timeout: float):
+        try:
+            for player in self.players:
+                if isinstance(player, RemotePlayer):
+                    await self.send(player, {"type": "start", "seat": player.index, "players": len(self.players)})
+            await asyncio.wait_for(self.play(), timeout)
+            winners = [winner.index for winner in self.game.state.winners]
+            for player in self.players:
+                if isinstance(player, RemotePlayer):
+                    await self.send(player, {"type": "end", "won": player.index in winners, "winners": winners,
+                                             "seed": self.game.seed})
+        except asyncio.TimeoutError:
+            await self.send_all({"type": "end", "won": False, "winners": [], "timeout": True})
+        except Exception:
+            await self.send_all({"type": "end", "won": False, "winners": [], "error": True})
+            raise
+        finally:
+            for connection in self.connections:
+                await connection.close()
+
+    async def play(self):
+        decision = self.game.begin(self.players)
+        while decision is not None:
+            chosen = await decision.player.select_async(decision.choices, decision.min_choices,
+                                                        decision.max_choices, decision.game_state,
+                                                        decision.line_num)
+            decision = self.game.resume(chosen)
+            # Let other sessions run between decisions of bots that answer without awaiting
+            await asyncio.sleep(0)
+
+    async def send_all(self, message: dict):
+        for player in self.players:
+            if isinstance(player, RemotePlayer):
+                await self.send(player, message)
+
+    @staticmethod
+    async def send(player: RemotePlayer, message: dict):
+        try:
+            await player.connection.send(message)
+        except ClientDisconnected:
+            pass
+
+
+class GameHost:
+    def __init__(self,
+                 definition: GameDefinition,
+                 seats: int,
+                 bots: int = 0,
+                 decision_timeout: float = 60,
+                 session_timeout: float = 3600,
+                 lobby_timeout: float = 5,
+                 max_sessions: int = 10000):
+        self.definition = definition
+        self.seats = seats
+        self.bots = bots
+        self.decision_timeout = decision_timeout
+        self.session_timeout = session_timeout
+        self.lobby_timeout = lobby_timeout
+        self.lobby = []
+        """:type: list[Connection]"""
+        self.session_slots = asyncio.Semaphore(max_sessions)
+        self.sessions = set()
+        self.games_played = 0
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connection = Connection(reader, writer)
+        self.lobby.append(connection)
+        remote_seats = self.seats - self.bots
+        while len(self.lobby) >= remote_seats:
+            connections = self.lobby[:remote_seats]
+            del self.lobby[:remote_seats]
+            self.start_session(connections)
+        if connection in self.lobby:
+            asyncio.get_running_loop().call_later(self.lobby_timeout, self.flush_lobby, connection)
+
+    # Clients left waiting in the lobby for lobby_timeout seconds play with random players in the empty seats
+    def flush_lobby(self, connection: Connection):
+        if connection in self.lobby:
+            connections = self.lobby[:]
+            del self.lobby[:]
+            self.start_session(connections)
+
+    def start_session(self, connections: list):
+        task = asyncio.ensure_future(self.run_session(connections))
+        self.sessions.add(task)
+        task.add_done_callback(self.sessions.discard)
+
+    async def run_session(self, connections: list):
+        async with self.session_slots:
+            players = [RemotePlayer(index, connection, self.decision_timeout)
+                       for index, connection in enumerate(connections)]
+            players.extend(randomplayer.RandomPlayer(index) for index in range(len(players), self.seats))
+            # Nothing awaits a session's task, so a game that fails is logged here and ends only its own session
+            try:
+                await Session(self.definition.new_game(), players, connections).run(self.session_timeout)
+            except Exception:
+                logger.exception("Session failed")
+                return
+            self.games_played += 1
+
+    async def serve_tcp(self, host: str, port: int):
+        return await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE_LENGTH,
+                                          backlog=CONNECTION_BACKLOG)
+
+    async def serve_unix(self, path: str):
+        return await asyncio.start_unix_server(self.handle_connection, path, limit=MAX_LINE_LENGTH,
+                                               backlog=CONNECTION_BACKLOG)
+
+
+@click.command()
+@click.option("--game_path", prompt="Game Path", help="Path to the game's XML")
+@click.option("--seats", default=2, help="Number of players in each game", type=int)
+@click.option("--bots", default=0, help="Number of seats in each game filled by random players", type=int)
+@click.option("--host", default="127.0.0.1", help="Address to listen on")
+@click.option("--port", default=7777, help="TCP port to listen on", type=int)
+@click.option("--unix", default=None, help="Listen on this Unix socket path instead of TCP")
+@click.option("--decision_timeout", default=60.0, help="Seconds a client has to answer a decision", type=float)
+def serve(game_path: str, seats: int, bots: int, host: str, port: int, unix: str, decision_timeout: float):
+    game_host = GameHost(gamecache.load_definition(game_path), seats, bots, decision_timeout)
+
+    async def main():
+        server = await (game_host.serve_unix(unix) if unix else game_host.serve_tcp(host, port))
+        async with server:
+            await server.serve_forever()
+    asyncio.run(main())
+
+
+if __name__ == '__main__':
+    serve()
@@ -0,0 +1,113 @@
+from Game import driver, gamecache
+from Game.game import GameDefinition
+import concurrent.futures
+import json
+import os
+import time
+
+# Plays many games of one definition over a process pool.  Each worker loads the definition once when it starts and
+# then plays chunks of games; a chunk is a list of seeds, so game n of a run always uses seed + n and can be replayed
+# on its own.  The games of a chunk are played together by driver.play_games, so players that share a network
+# evaluate the decisions of the whole chunk in one call.  Results are handed back per game as they finish.
+
+GAMES_PER_CHUNK = 50
+# Chunks queued per worker, so workers never wait on the parent for more work
+CHUNKS_IN_FLIGHT = 4
+
+worker_definition = None
+""":type: GameDefinition"""
+
+
+def init_worker(game_path: str, cache_dir: str):
+    global worker_definition
+    worker_definition = gamecache.load_definition(game_path, cache_dir)
+
+
+# players holds the players of each game.  A game's "seconds" is the time the whole batch took divided by its games,
+# as the games of a batch are played interleaved.
+def play_batch(definition: GameDefinition, players: list, seeds: list) -> list:
+    start = time.perf_counter()
+    games = [definition.new_game(seed) for seed in seeds]
+    decisions = [[0] * len(game_players) for game_players in players]
+    all_winners = driver.play_games(games, players, decisions)
+    seconds = (time.perf_counter() - start) / max(len(games), 1)
+    return [{
+        "seed": seed,
+        "winners": [winner.index for winner in winners],
+        "turns": game.state.turns_played,
+        "decisions": game_decisions,
+        "seconds": seconds,
+    } for seed, game, winners, game_decisions in zip(seeds, games, all_winners, decisions)]
+
+
+def play_game(definition: GameDefinition, player_types: list, seed: int) -> dict:
+    return play_batch(definition, [[player_type(index) for index, player_type in enumerate(player_types)]], [seed])[0]
+
+
+def play_chunk(player_types: list, seeds: list) -> list:
+    players = [[player_type(index) for index, player_type in enumerate(player_types)] for _ in seeds]
+    return play_batch(worker_definition, players, seeds)
+
+
+class SimulationResults:
+    def __init__(self, num_players: int):
+        self.games = 0
+        self.wins = [0.0] * num_players
+        self.draws = 0
+        self.turns = 0
+        self.decisions = [0] * num_players
+        self.elapsed = 0.0
+
+    def add(self, result: dict):
+        self.games += 1
+        winners = result["winners"]
+        for winner in winners:
+            self.wins[winner] += 1 / len(winners)
+        if not winners:
+            self.draws += 1
+        self.turns += result["turns"]
+        for index, decisions in enumerate(result["decisions"]):
+            self.decisions[index] += decisions
+
+    def report(self, player_names: list) -> str:
+        games = max(self.games, 1)
+        lines = ["Games:              {} in {:.2f}s ({:.1f} games/sec)".format(
+                     self.games, self.elapsed, self.games / self.elapsed if self.elapsed else 0),
+                 "Average length:     {:.1f} turns".format(self.turns / games),
+                 "Decisions per game: {:.1f}".format(sum(self.decisions) / games)]
+        for index, name in enumerate(player_names):
+            lines.append("  {} {}: {:.1%} wins, {:.1f} decisions per game".format(
+                index, name, self.wins[index] / games, self.decisions[index] / games))
+        lines.append("No winner:          {:.1%}".format(self.draws / games))
+        return "\n".join(lines)
+
+
+# Yields the result of every game as it finishes, in no particular order
+def simulate(game_path: str, player_types: list, games: int, seed: int = 0, workers: int = None,
+             cache_dir: str = gamecache.CACHE_DIR):
+    chunks = ([seed + game for game in range(start, min(start + GAMES_PER_CHUNK, games))]
+              for start in range(0, games, GAMES_PER_CHUNK))
+    workers = workers or os.cpu_count()
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=init_worker,
+                                                initargs=(game_path, cache_dir)) as pool:
+        running = set()
+        for chunk in chunks:
+            running.add(pool.submit(play_chunk, player_types, chunk))
+            if len(running) >= workers * CHUNKS_IN_FLIGHT:
+                done, running = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in concurrent.futures.as_completed(running):
+            yield from future.result()
+
+
+def run_simulation(game_path: str, player_types: list, games: int, seed: int = 0, workers: int = None,
+                   output=None) -> SimulationResults:
+    results = SimulationResults(len(player_types))
+    start = time.perf_counter()
+    for result in simulate(game_path, player_types, games, seed, workers):
+        results.add(result)
+        if output is not None:
+            output.write(json.dumps(result) + "\n")
+    results.elapsed = time.perf_counter() - start
+    return results
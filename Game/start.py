@@ -1,27 +1,65 @@
-from Game import parser, manualplayer, learningplayer, randomplayer
+from Game import gamecache, manualplayer, learningplayer, randomplayer, mctsplayer, simulation
 import click
 
 player_types = {
     'Human': manualplayer.ManualPlayer,
     'Random': randomplayer.RandomPlayer,
     'Learning': learningplayer.LearningPlayer,
+    'MCTS': mctsplayer.MCTSPlayer,
 }
 
 
-@click.command()
+class DefaultGroup(click.Group):
+    # Arguments that do not start with a command name are start's, so "start.py --game_path ..." still plays a game
+    def parse_args(self, ctx, args):
+        if not args or (args[0] not in self.commands and args[0] not in self.get_help_option_names(ctx)):
+            args = ["start"] + args
+        return super(DefaultGroup, self).parse_args(ctx, args)
+
+
+@click.group(cls=DefaultGroup)
+def cli():
+    pass
+
+
+@cli.command()
 @click.option("--game_path", prompt="Game Path", help="Path to the game's XML")
 @click.option("--players", prompt="Num Players", help="Comma delimited list of players to play with. Allowed types: " +
                                                       ",".join(player_types.keys()))
-def start(game_path, players):
+@click.option("--seed", default=None, help="Seed for the game's randomness, to replay a game", type=int)
+def start(game_path, players, seed):
     all_players = [player_types[player](index) for index, player in enumerate(players.split(","))]
-    run_game(game_path, all_players)
+    game = run_game(game_path, all_players, seed)
+    print("Winners: "+str(game.state.winners)+" (seed "+str(game.seed)+")")
 
 
-def run_game(game_path, players):
-    game = parser.parse_xml(game_path)
+def run_game(game_path, players, seed=None):
+    game = gamecache.load_game(game_path, seed=seed)
     game.start(players)
     return game
 
 
+@cli.command()
+@click.option("--game_path", prompt="Game Path", help="Path to the game's XML")
+@click.option("--players", prompt="Players", help="Comma delimited list of players to play with. Allowed types: " +
+                                                  ",".join(player_types.keys()))
+@click.option("--games", default=1000, help="Number of games to play", type=int)
+@click.option("--workers", default=None, help="Worker processes (defaults to the number of CPUs)", type=int)
+@click.option("--seed", default=0, help="Seed of the first game; each game uses the next", type=int)
+@click.option("--output", default=None, help="File to write each game's result to, one JSON object per line")
+def simulate(game_path, players, games, workers, seed, output):
+    names = players.split(",")
+    types = [player_types[name] for name in names]
+    # Parse once here, so workers start from the compiled cache
+    gamecache.load_definition(game_path)
+    output_file = open(output, "w") if output else None
+    try:
+        results = simulation.run_simulation(game_path, types, games, seed, workers, output_file)
+    finally:
+        if output_file is not None:
+            output_file.close()
+    print(results.report(names))
+
+
 if __name__ == '__main__':
-    start()
\ No newline at end of file
+    cli()
\ No newline at end of file
@@ -0,0 +1,155 @@
+from Game import gamecache, randomplayer
+from Game.game import GameState, Action
+from Game.tracing import Tracer, TracingMachine
+import click
+import time
+
+# Profiles a game by its rules instead of by Python function.  StepProfiler is a Tracer that times every step from
+# enter to exit, so a control step's cumulative time covers its nested action, and its self time is what is left after
+# the steps run inside it.  Time spent waiting on players is not counted.
+#
+# Results are kept per Step, per line of the rule file, and per stack of (action, step) pairs.  collapsed() writes
+# the stacks in the folded format read by flamegraph.pl and speedscope, with self time in microseconds.
+
+
+class StepStats:
+    def __init__(self):
+        self.calls = 0
+        self.cumulative = 0.0
+        self.self_time = 0.0
+
+    def add(self, other: "StepStats"):
+        self.calls += other.calls
+        self.cumulative += other.cumulative
+        self.self_time += other.self_time
+
+
+class Profile:
+    def __init__(self):
+        self.steps = {}
+        """:type: dict[Step, StepStats]"""
+        self.stacks = {}
+        """:type: dict[tuple, float]"""
+        self.games = 0
+
+    def lines(self) -> dict:
+        lines = {}
+        for step, stats in self.steps.items():
+            lines.setdefault(step.line_num, StepStats()).add(stats)
+        return lines
+
+    def total_time(self) -> float:
+        return sum(self.stacks.values())
+
+    def hot_lines(self, count: int = 30, source_path: str = None) -> str:
+        source = []
+        if source_path is not None:
+            with open(source_path) as file:
+                source = file.read().splitlines()
+        names = {}
+        for step in self.steps:
+            names.setdefault(step.line_num, type(step).__name__)
+        total = self.total_time() or 1
+        lines = sorted(self.lines().items(), key=lambda item: -item[1].self_time)[:count]
+        report = ["{:>6} {:>10} {:>10} {:>10} {:>6}  {}".format("Line", "Calls", "Cum (ms)", "Self (ms)", "Self",
+                                                                "Step")]
+        for line_num, stats in lines:
+            text = source[line_num - 1].strip() if 0 < line_num <= len(source) else names[line_num]
+            report.append("{:>6} {:>10} {:>10.1f} {:>10.1f} {:>6.1%}  {}".format(
+                line_num, stats.calls, stats.cumulative * 1000, stats.self_time * 1000, stats.self_time / total,
+                text[:80]))
+        return "\n".join(report)
+
+    def collapsed(self) -> str:
+        return "\n".join(";".join(stack) + " " + str(int(round(self_time * 1000000)))
+                         for stack, self_time in sorted(self.stacks.items()) if self_time > 0)
+
+
+class OpenStep:
+    def __init__(self, step, stack: tuple, start: float, new_call: bool):
+        self.step = step
+        self.stack = stack
+        self.start = start
+        self.new_call = new_call
+        self.children = 0.0
+
+
+class StepProfiler(Tracer):
+    def __init__(self, profile: Profile):
+        self.profile = profile
+        self.open = []
+        """:type: list[OpenStep]"""
+        self.active = {}
+        self.paused = 0.0
+        self.paused_at = None
+        self.resuming = False
+
+    def clock(self) -> float:
+        return time.perf_counter() - self.paused
+
+    def on_step_enter(self, step, action: Action, game_state: GameState):
+        stack = (self.open[-1].stack if self.open else ()) + (action.name, step.name)
+        # A decision's step is entered again when it completes, which is not another call
+        self.open.append(OpenStep(step, stack, self.clock(), not self.resuming))
+        self.resuming = False
+        self.active[step] = self.active.get(step, 0) + 1
+
+    def on_step_exit(self, step, game_state: GameState):
+        entry = self.open.pop()
+        elapsed = self.clock() - entry.start
+        stats = self.profile.steps.get(step)
+        if stats is None:
+            stats = self.profile.steps[step] = StepStats()
+        if entry.new_call:
+            stats.calls += 1
+        # Only the outermost run of a recursive step adds to its cumulative time
+        self.active[step] -= 1
+        if not self.active[step]:
+            stats.cumulative += elapsed
+        self_time = elapsed - entry.children
+        stats.self_time += self_time
+        self.profile.stacks[entry.stack] = self.profile.stacks.get(entry.stack, 0.0) + self_time
+        if self.open:
+            self.open[-1].children += elapsed
+
+    def on_decision(self, decision):
+        self.paused_at = time.perf_counter()
+
+    def on_player_decision(self, decision, chosen: list):
+        if self.paused_at is not None:
+            self.paused += time.perf_counter() - self.paused_at
+            self.paused_at = None
+        self.resuming = True
+
+
+def profile_games(game_path: str, num_players: int, games: int, seed: int) -> Profile:
+    definition = gamecache.load_definition(game_path)
+    profile = Profile()
+
+    def create_machine(game_state: GameState):
+        return TracingMachine(game_state, StepProfiler(profile))
+    for game_number in range(games):
+        players = [randomplayer.RandomPlayer(index) for index in range(num_players)]
+        definition.new_game(seed + game_number).start(players, create_machine)
+        profile.games += 1
+    return profile
+
+
+@click.command()
+@click.option("--game_path", prompt="Game Path", help="Path to the game's XML")
+@click.option("--players", default=2, help="Number of random players", type=int)
+@click.option("--games", default=10, help="Number of games to profile", type=int)
+@click.option("--seed", default=0, help="Seed of the first game; each game uses the next", type=int)
+@click.option("--top", default=30, help="Number of lines in the report", type=int)
+@click.option("--collapsed", default=None, help="File to write collapsed stacks to, for flamegraph.pl or speedscope")
+def profile(game_path: str, players: int, games: int, seed: int, top: int, collapsed: str):
+    result = profile_games(game_path, players, games, seed)
+    print("{} games, {:.1f} ms in rules".format(result.games, result.total_time() * 1000))
+    print(result.hot_lines(top, game_path))
+    if collapsed:
+        with open(collapsed, "w") as file:
+            file.write(result.collapsed() + "\n")
+
+
+if __name__ == '__main__':
+    profile()
@@ -2,7 +2,6 @@ from enum import Enum
 from Game.selectors import Selector, ValueSelector
 from Game.tests import Test
 from Game.game import GameState, Action
-import copy
 
 
 class Step:
@@ -13,20 +12,30 @@ class Step:
     def perform(self, game_state: GameState):
         pass
 
+    def execute(self, machine):
+        self.perform(machine.game_state)
 
-class ActionStep(Step):
+
+class ControlStep(Step):
+    # Steps that run other actions.  They push frames onto a Machine rather than calling Action.perform, so nested
+    # actions do not grow the Python stack.
+    def perform(self, game_state: GameState):
+        from Game.machine import Machine
+        Machine(game_state).run_step(self)
+
+
+class ActionStep(ControlStep):
     def __init__(self,
                  action_selector: Selector,
                  line_number: int):
         super(ActionStep, self).__init__(line_number)
         self.action_selector = action_selector
 
-    def perform(self, game_state: GameState):
-        action = self.action_selector.select_one_of_type(game_state, Action)
-        action.perform(game_state)
+    def execute(self, machine):
+        machine.push_action(self.action_selector.select_one_of_type(machine.game_state, Action))
 
 
-class TestStep(Step):
+class TestStep(ControlStep):
     def __init__(self,
                  test: Test,
                  true_action_selector: Selector,
@@ -37,11 +46,12 @@ class TestStep(Step):
         self.false = false_action_selector
         self.true = true_action_selector
 
-    def perform(self, game_state: GameState):
+    def execute(self, machine):
+        game_state = machine.game_state
         selector = self.true if self.test.test(game_state) else self.false
         if selector is None:
             return
-        selector.select_one_of_type(game_state, Action).perform(game_state)
+        machine.push_action(selector.select_one_of_type(game_state, Action))
 
 
 class RemoveStep(Step):
@@ -53,7 +63,7 @@ class RemoveStep(Step):
         game_state.del_var(self.to_remove)
 
 
-class WhileStep(Step):
+class WhileStep(ControlStep):
     def __init__(self,
                  test: Test,
                  action_selector: Selector,
@@ -62,13 +72,13 @@ class WhileStep(Step):
         self.test = test
         self.action_selector = action_selector
 
-    def perform(self, game_state: GameState):
-        action = self.action_selector.select_one_of_type(game_state, Action)
-        while self.test.test(game_state):
-            action.perform(game_state)
+    def execute(self, machine):
+        from Game.machine import WhileFrame
+        action = self.action_selector.select_one_of_type(machine.game_state, Action)
+        machine.push(WhileFrame(self.test, action))
 
 
-class RepeatStep(Step):
+class RepeatStep(ControlStep):
     def __init__(self,
                  count: Selector,
                  action_selector: Selector,
@@ -79,14 +89,15 @@ class RepeatStep(Step):
         self.action_selector = action_selector
         self.label = label
 
-    def perform(self, game_state: GameState):
+    def execute(self, machine):
+        from Game.machine import RepeatFrame
+        game_state = machine.game_state
         count = self.count.select_one_of_type(game_state, int)
         action = self.action_selector.select_one_of_type(game_state, Action)
-        for _ in range(count):
-            action.perform(game_state)
+        machine.push(RepeatFrame(count, action))
 
 
-class ForEachStep(Step):
+class ForEachStep(ControlStep):
     def __init__(self,
                  selector: Selector,
                  action_selector: Selector,
@@ -97,11 +108,11 @@ class ForEachStep(Step):
         self.action_selector = action_selector
         self.label = label
 
-    def perform(self, game_state: GameState):
+    def execute(self, machine):
+        from Game.machine import ForEachFrame
+        game_state = machine.game_state
         action = self.action_selector.select_one_of_type(game_state, Action)
-        for piece in self.selector.select(game_state):
-            game_state.set_var([piece], self.label)
-            action.perform(game_state)
+        machine.push(ForEachFrame(self.selector.select(game_state), self.label, action))
 
 
 class AssignAttributeStep(Step):
@@ -119,10 +130,11 @@ class AssignAttributeStep(Step):
         attribute = self.assign_selector.select_one(game_state)
         for game_object in self.assign_to_selector.select(game_state):
             assert(game_object.attributes is not None), str(game_object)+" does not have attributes to assign"
-            game_object.attributes[self.attribute_name] = attribute
+            game_state.record_attribute(game_object, self.attribute_name)
+            game_object.set_attribute(self.attribute_name, attribute)
 
 
-class GiveTurnStep(Step):
+class GiveTurnStep(ControlStep):
     def __init__(self,
                  players_selector: Selector,
                  turn: Selector,
@@ -131,12 +143,12 @@ class GiveTurnStep(Step):
         self.turn = turn
         self.players_selector = players_selector
 
-    def perform(self, game_state: GameState):
+    def execute(self, machine):
         from Game.game import Turn
+        game_state = machine.game_state
         turn = self.turn.select_one_of_type(game_state, Turn)
         game_state.turns.append(turn)
-        turn.perform(self.players_selector.select(game_state), game_state)
-        game_state.turns.pop()
+        machine.push_turn(turn, self.players_selector.select(game_state), True)
 
 
 class EndGameStep(Step):
@@ -151,6 +163,10 @@ class EndGameStep(Step):
         from Game.game import WonException
         raise WonException()
 
+    def execute(self, machine):
+        machine.game_state.winners = self.winners.select(machine.game_state)
+        machine.halt()
+
 
 class Positions(Enum):
     First = 0,
@@ -176,34 +192,31 @@ class MovePieces(Step):
     def perform(self, game_state: GameState):
         from Game.game import Collection
         collection = self.to.select_one_of_type(game_state, Collection)
+        game_state.record_pieces(collection)
         pieces = self.pieces.select(game_state)
         if not self.copy:
-            pieces = self.pieces.select(game_state)
             from Game.game import Piece
             if self.count is not None:
                 pieces = pieces[:self.count.select(game_state)[0]]
-            collections = set()
+            # Each piece is taken out of its own collection; a piece selected twice is only moved once
+            pieces = list(dict.fromkeys(pieces))
+            by_parent = {}
             for piece in pieces:
                 assert(isinstance(piece, Piece)), str(self.pieces) + " did not return pieces, rather: " + \
                                       str(type(piece))
-                collections.add(piece.parent)
-            to_remove = set(pieces)
-            for c in collections:
-                to_move = [piece for piece in c.pieces if piece not in to_remove]
-                c.pieces[:] = to_move
-                assert(c.pieces == to_move)
+                by_parent.setdefault(piece.parent, []).append(piece)
+            for c, removed in by_parent.items():
+                game_state.record_pieces(c)
+                c.remove_pieces(removed)
         else:
-            pieces = [copy.deepcopy(piece) for piece in pieces for _ in range(self.count.select(game_state)[0])]
-        for piece in pieces:
-            piece.parent = collection
+            count = self.count.select(game_state)[0]
+            pieces = [piece.copy() for piece in pieces for _ in range(count)]
         if self.position is Positions.First:
-            collection.pieces.extend(pieces)
+            collection.add_pieces(pieces)
         elif self.position is Positions.Last:
-            collection.pieces[:] = pieces + collection.pieces
+            collection.add_pieces(pieces, 0)
         else:
-            import random
-            position = random.randint(0, len(collection.pieces))
-            collection.pieces[:] = collection.pieces[:position] + pieces + collection.pieces[position:]
+            collection.add_pieces(pieces, game_state.random.randint(0, len(collection.pieces)))
 
 
 class ShuffleCollection(Step):
@@ -215,8 +228,10 @@ class ShuffleCollection(Step):
 
     def perform(self, game_state: GameState):
         for collection in self.collection_selector.select(game_state):
-            import random
-            random.shuffle(collection.pieces)
+            game_state.record_pieces(collection)
+            pieces = list(collection.pieces)
+            game_state.random.shuffle(pieces)
+            collection.set_pieces(pieces)
 
 
 class Select(Step):
@@ -241,7 +256,7 @@ class Select(Step):
         return str(self.selector)
 
 
-class PlayerSelect(Step):
+class PlayerSelect(ControlStep):
     def __init__(self,
                  select: Select,
                  min_pieces: Selector,
@@ -255,7 +270,8 @@ class PlayerSelect(Step):
         from Game.selectors import ScopeSelector
         self.player = ScopeSelector("player") if player is None else player
 
-    def perform(self, game_state: GameState):
+    def execute(self, machine):
+        game_state = machine.game_state
         self.select.perform(game_state)
         selected = game_state.get_var(self.select.label)
         real_max = self.max.select_one_of_type(game_state, int)
@@ -266,21 +282,30 @@ class PlayerSelect(Step):
             real_max = len(selected)
         if selected:
             from Game.game import Player
+            from Game.machine import Decision
             player = self.player.select_one_of_type(game_state, Player)
-            selected = player.select(selected, real_min, real_max, game_state, self.line_num)
-            assert(len(selected) <= real_max)
-            assert(len(selected) >= real_min)
-        game_state.set_var(selected, self.select.label)
+            machine.suspend(Decision(self, player, selected, real_min, real_max, game_state))
+        else:
+            game_state.set_var(selected, self.select.label)
+
+    def complete(self, machine, decision, selected: list):
+        assert(len(selected) <= decision.max_choices)
+        assert(len(selected) >= decision.min_choices)
+        machine.game_state.set_var(selected, self.select.label)
 
 
-class PlayerChoice(Step):
+class PlayerChoice(ControlStep):
     def __init__(self,
                  options: dict,
                  line_number: int):
         super(PlayerChoice, self).__init__(line_number)
         self.options = options
 
-    def perform(self, game_state: GameState):
-        choice = game_state.player.select(list(self.options.keys()), 1, 1, game_state, self.line_num)
+    def execute(self, machine):
+        from Game.machine import Decision
+        game_state = machine.game_state
+        machine.suspend(Decision(self, game_state.player, list(self.options.keys()), 1, 1, game_state))
+
+    def complete(self, machine, decision, choice: list):
         assert(len(choice) == 1), "Can only select 1 choice"
-        self.options[choice[0]].perform(game_state)
+        machine.push_action(self.options[choice[0]])
@@ -11,9 +11,15 @@ comparisons = {
 
 
 class Test:
-    def test(self, game_state, item):
+    def test(self, game_state, selected=None):
         pass
 
+    def __getstate__(self):
+        # A compiled test (see selectorcompiler) is a closure and is rebuilt after loading
+        state = self.__dict__.copy()
+        state.pop("test", None)
+        return state
+
 
 class TestComparison(Test):
     def __init__(self, obj1, comparison, obj2):
@@ -21,7 +27,7 @@ class TestComparison(Test):
         self.obj1 = obj1
         self.obj2 = obj2
 
-    def test(self, game_state, selected):
+    def test(self, game_state, selected=None):
         left = self.obj1.select(game_state, selected)
         right = self.obj2.select(game_state, selected)
         if len(left) == 0 or len(right) == 0:
@@ -38,7 +44,7 @@ class TestExists(Test):
     def __init__(self, selector):
         self.selector = selector
 
-    def test(self, game_state, selected):
+    def test(self, game_state, selected=None):
         return len(self.selector.select(game_state, selected)) != 0
 
     def __repr__(self):
@@ -0,0 +1,177 @@
+from Game import gamecache, simulation, start
+from Game.game import Player
+import click
+import concurrent.futures
+import itertools
+import json
+import os
+
+# Plays a league between player specs and rates them with Elo.  A spec is a name from start.player_types, optionally
+# followed by ":" and an argument: "MCTS:500" is an MCTSPlayer with 500 iterations, and "Learning:dominion" is a
+# LearningPlayer loaded from the dominion-*.nn and dominion-*.map checkpoint files (with training switched off).
+#
+# Turns run players in index order, so every group of specs plays in every seat order.  Games are played in worker
+# processes, but ratings are updated in the order the games were scheduled so a league with the same seed always
+# gives the same ratings.
+
+INITIAL_RATING = 1500.0
+ELO_K = 16.0
+GAMES_PER_CHUNK = 20
+
+worker_checkpoints = {}
+
+
+def create_player(spec: str, index: int) -> Player:
+    name, _, argument = spec.partition(":")
+    if name == "Learning":
+        from Game import learningplayer
+        if argument not in worker_checkpoints:
+            worker_checkpoints[argument] = learningplayer.load_checkpoint(argument)
+        player = learningplayer.LearningPlayer(index, *worker_checkpoints[argument])
+        player.training = False
+        return player
+    player_type = start.player_types[name]
+    if argument:
+        return player_type(index, int(argument))
+    return player_type(index)
+
+
+# games holds (game number, seat order, seed) tuples; a seat order lists the spec index in each seat
+def play_games(specs: list, games: list) -> list:
+    players = [[create_player(specs[spec], index) for index, spec in enumerate(order)] for number, order, seed in games]
+    results = simulation.play_batch(simulation.worker_definition, players, [seed for number, order, seed in games])
+    for result, (number, order, seed) in zip(results, games):
+        result["game"] = number
+        result["order"] = list(order)
+    return results
+
+
+class League:
+    def __init__(self, specs: list, k: float = ELO_K):
+        self.specs = specs
+        self.k = k
+        self.ratings = [INITIAL_RATING] * len(specs)
+        self.games = [0] * len(specs)
+        self.points = [0.0] * len(specs)
+        self.meetings = {}
+
+    # Multiplayer games are rated as a head to head between every pair of seats: a winner beats every loser, and
+    # two winners or two losers draw
+    def add(self, order: list, winners: list):
+        won = [seat in winners for seat in range(len(order))]
+        k = self.k / max(len(order) - 1, 1)
+        changes = [0.0] * len(order)
+        for first, second in itertools.combinations(range(len(order)), 2):
+            a, b = order[first], order[second]
+            expected = 1 / (1 + 10 ** ((self.ratings[b] - self.ratings[a]) / 400))
+            score = .5 if won[first] == won[second] else float(won[first])
+            changes[first] += k * (score - expected)
+            changes[second] -= k * (score - expected)
+            pair = (min(a, b), max(a, b))
+            self.meetings[pair] = self.meetings.get(pair, 0) + 1
+        for seat, spec in enumerate(order):
+            self.ratings[spec] += changes[seat]
+            self.games[spec] += 1
+            if won[seat]:
+                self.points[spec] += 1 / len(winners)
+
+    def standings(self) -> list:
+        return sorted(range(len(self.specs)), key=lambda spec: -self.ratings[spec])
+
+    def report(self) -> str:
+        lines = ["{:<4} {:<24} {:>7} {:>6} {:>7}".format("Rank", "Player", "Rating", "Games", "Wins")]
+        for rank, spec in enumerate(self.standings()):
+            games = max(self.games[spec], 1)
+            lines.append("{:<4} {:<24} {:>7.0f} {:>6} {:>6.1%}".format(
+                rank + 1, self.specs[spec], self.ratings[spec], self.games[spec], self.points[spec] / games))
+        return "\n".join(lines)
+
+
+def round_robin(num_specs: int, seats: int) -> list:
+    return [order for group in itertools.combinations(range(num_specs), seats)
+            for order in itertools.permutations(group)]
+
+
+# Groups specs with others close in rating, preferring opponents they have met least.  When the specs do not divide
+# into groups the lowest rated sit the round out.
+def swiss_round(league: League, seats: int) -> list:
+    unpaired = league.standings()
+    orders = []
+    while len(unpaired) >= seats:
+        group = [unpaired.pop(0)]
+        while len(group) < seats:
+            best = min(unpaired, key=lambda spec: (sum(league.meetings.get((min(spec, other), max(spec, other)), 0)
+                                                       for other in group), unpaired.index(spec)))
+            unpaired.remove(best)
+            group.append(best)
+        orders.extend(itertools.permutations(group))
+    return orders
+
+
+class Tournament:
+    def __init__(self, pool: concurrent.futures.Executor, league: League, games_per_order: int, seed: int,
+                 output=None):
+        self.pool = pool
+        self.league = league
+        self.games_per_order = games_per_order
+        self.seed = seed
+        self.output = output
+        self.games_played = 0
+
+    # Plays every seat order games_per_order times and rates the games in schedule order
+    def play(self, orders: list):
+        games = [(self.games_played + number, order, self.seed + self.games_played + number)
+                 for number, order in enumerate(order for order in orders for _ in range(self.games_per_order))]
+        futures = [self.pool.submit(play_games, self.league.specs, games[start:start + GAMES_PER_CHUNK])
+                   for start in range(0, len(games), GAMES_PER_CHUNK)]
+        finished = {}
+        next_game = self.games_played
+        for future in concurrent.futures.as_completed(futures):
+            for result in future.result():
+                finished[result["game"]] = result
+            while next_game in finished:
+                result = finished.pop(next_game)
+                self.league.add(result["order"], result["winners"])
+                if self.output is not None:
+                    self.output.write(json.dumps(result) + "\n")
+                next_game += 1
+        self.games_played = next_game
+
+
+@click.command()
+@click.option("--game_path", prompt="Game Path", help="Path to the game's XML")
+@click.option("--players", prompt="Players", help="Comma delimited list of player specs: a type from start.py, "
+                                                  "MCTS:<iterations> or Learning:<checkpoint prefix>")
+@click.option("--seats", default=2, help="Number of players in each game", type=int)
+@click.option("--format", "league_format", default="round-robin", type=click.Choice(["round-robin", "swiss"]))
+@click.option("--rounds", default=5, help="Number of rounds of a Swiss tournament", type=int)
+@click.option("--games", default=10, help="Games played in each seat order of a match", type=int)
+@click.option("--workers", default=None, help="Worker processes (defaults to the number of CPUs)", type=int)
+@click.option("--seed", default=0, help="Seed of the first game; each game uses the next", type=int)
+@click.option("--output", default=None, help="File to write each game's result to, one JSON object per line")
+def tournament(game_path: str, players: str, seats: int, league_format: str, rounds: int, games: int, workers: int,
+               seed: int, output: str):
+    specs = players.split(",")
+    if len(specs) < seats:
+        raise click.BadParameter("Need at least as many players as seats", param_hint="players")
+    gamecache.load_definition(game_path)
+    league = League(specs)
+    output_file = open(output, "w") if output else None
+    try:
+        with concurrent.futures.ProcessPoolExecutor(workers or os.cpu_count(), initializer=simulation.init_worker,
+                                                    initargs=(game_path, gamecache.CACHE_DIR)) as pool:
+            league_tournament = Tournament(pool, league, games, seed, output_file)
+            if league_format == "swiss":
+                for round_number in range(rounds):
+                    league_tournament.play(swiss_round(league, seats))
+                    print("Round " + str(round_number + 1) + "\n" + league.report() + "\n")
+            else:
+                league_tournament.play(round_robin(len(specs), seats))
+    finally:
+        if output_file is not None:
+            output_file.close()
+    print(league.report())
+
+
+if __name__ == '__main__':
+    tournament()
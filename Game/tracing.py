@@ -0,0 +1,209 @@
+from Game import selectorcompiler
+from Game.game import GameDefinition, GameState, Action
+from Game.machine import Machine, ActionFrame, Decision
+from Game.selectors import Selector, ValueSelector
+from Game.steps import Step
+from Game.tests import Test, TestComparison, TestExists
+import copy
+import weakref
+
+# Hooks for watching a game run.  Attach a Tracer by starting the game with a TracingMachine:
+#
+#     game.start(players, lambda game_state: TracingMachine(game_state, tracer))
+#
+# Games started normally run on the plain Machine, which has no tracing code at all, so untraced games cost nothing.
+# A step is entered when it executes and exited once everything it started (the frames it pushed) has finished, so a
+# control step's enter and exit surround the steps of its nested action.
+#
+# on_select is only called for definitions that have trace_selectors() installed, as compiled selectors belong to the
+# shared definition rather than to a game.  Selectors are interned, so one selector object can be used by every
+# definition parsed in the process; trace_selectors leaves them alone and gives the definition's steps traced copies
+# instead.  Each traced copy checks game_state.tracer, which is only set for games on a TracingMachine.  The
+# conditions of if and repeat steps get traced copies too, which run uncompiled so that their selectors are reported.
+
+
+class Tracer:
+    def on_step_enter(self, step, action: Action, game_state: GameState):
+        pass
+
+    def on_step_exit(self, step, game_state: GameState):
+        pass
+
+    def on_select(self, selector: Selector, game_state: GameState, result: list):
+        pass
+
+    # The game stopped to wait for a player
+    def on_decision(self, decision: Decision):
+        pass
+
+    # The player answered; called before the game continues
+    def on_player_decision(self, decision: Decision, chosen: list):
+        pass
+
+    def on_game_end(self, game_state: GameState):
+        pass
+
+
+class TracedActionFrame(ActionFrame):
+    def __init__(self, action: Action):
+        super(TracedActionFrame, self).__init__(action)
+        self.action = action
+
+    def advance(self, machine: "TracingMachine"):
+        if self.index == len(self.steps):
+            return False
+        step = self.steps[self.index]
+        self.index += 1
+        machine.enter_step(step, self.action)
+        step.execute(machine)
+        return True
+
+
+class TracingMachine(Machine):
+    def __init__(self, game_state: GameState, tracer: Tracer):
+        super(TracingMachine, self).__init__(game_state)
+        self.tracer = tracer
+        # Entered steps, with the number of frames there were when each executed
+        self.entered = []
+        """:type: list[tuple]"""
+        self.ended = False
+        game_state.tracer = tracer
+
+    def push_action(self, action: Action) -> None:
+        self.frames.append(TracedActionFrame(action))
+
+    def enter_step(self, step, action: Action):
+        self.entered.append((step, len(self.frames)))
+        self.tracer.on_step_enter(step, action, self.game_state)
+
+    def exit_steps(self):
+        depth = len(self.frames)
+        entered = self.entered
+        while entered and entered[-1][1] >= depth:
+            self.tracer.on_step_exit(entered.pop()[0], self.game_state)
+
+    def run_until_decision(self):
+        frames = self.frames
+        while frames and self.pending is None:
+            frame = frames[-1]
+            if not frame.advance(self) and frames and frames[-1] is frame:
+                frames.pop()
+            self.exit_steps()
+        if self.pending is not None:
+            self.tracer.on_decision(self.pending)
+        elif not self.ended:
+            self.ended = True
+            self.tracer.on_game_end(self.game_state)
+        return self.pending
+
+    # The decision's step is entered again while it completes, so an option's action nests under it
+    def resume(self, chosen: list) -> None:
+        decision = self.pending
+        assert(decision is not None), "The game is not waiting for a decision"
+        self.tracer.on_player_decision(decision, chosen)
+        # The frame on top is the action the decision's step belongs to
+        self.enter_step(decision.step, self.frames[-1].action)
+        super(TracingMachine, self).resume(chosen)
+        self.exit_steps()
+
+
+# The selectors each traced definition's steps used before tracing, as (set_item, key, selector)
+traced_definitions = weakref.WeakKeyDictionary()
+
+
+def traced_select(selector: Selector, select):
+    def select_and_trace(game_state: GameState, selected: list = None):
+        result = select(game_state, selected)
+        if game_state.tracer is not None:
+            game_state.tracer.on_select(selector, game_state, result)
+        return result
+    return select_and_trace
+
+
+def traced_copy(selector: Selector) -> Selector:
+    traced = copy.copy(selector)
+    traced.select = traced_select(selector, selector.select)
+    return traced
+
+
+# A test's compiled closure calls its selectors' closures directly.  The copy leaves it out (see Test.__getstate__)
+# and runs the Test class's own test method, which calls select on traced copies of its selectors.
+def traced_test(test: Test) -> Test:
+    traced = copy.copy(test)
+    if isinstance(test, TestComparison):
+        traced.obj1 = traced_operand(test.obj1)
+        traced.obj2 = traced_operand(test.obj2)
+    elif isinstance(test, TestExists):
+        traced.selector = traced_operand(test.selector)
+    return traced
+
+
+def traced_operand(operand):
+    if not isinstance(operand, Selector):
+        return operand
+    traced = copy.copy(operand)
+    traced.select = traced_select(operand, selectorcompiler.compile_selector(operand))
+    return traced
+
+
+# Replaces the compiled selectors and tests held by steps (directly, or in their lists and dicts) with traced copies,
+# and records what was replaced
+def trace_steps(obj, replaced: list, seen: set):
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+    if isinstance(obj, Action):
+        for step in obj.steps:
+            trace_steps(step, replaced, seen)
+        return
+    if isinstance(obj, Step):
+        items = list(vars(obj).items())
+
+        def set_item(key, value):
+            setattr(obj, key, value)
+    elif isinstance(obj, dict):
+        items = list(obj.items())
+        set_item = obj.__setitem__
+    elif isinstance(obj, list):
+        items = list(enumerate(obj))
+        set_item = obj.__setitem__
+    elif isinstance(obj, tuple):
+        items = []
+        for value in obj:
+            trace_steps(value, replaced, seen)
+        set_item = None
+    else:
+        return
+    for key, value in items:
+        if isinstance(value, Selector) and "select" in vars(value):
+            set_item(key, traced_copy(value))
+            replaced.append((set_item, key, value))
+            if isinstance(value, ValueSelector):
+                trace_steps(value.value, replaced, seen)
+        elif isinstance(value, Test) and "test" in vars(value):
+            set_item(key, traced_test(value))
+            replaced.append((set_item, key, value))
+        else:
+            trace_steps(value, replaced, seen)
+
+
+# Gives the definition's steps traced copies of their compiled selectors so traced games get on_select.  Games of the
+# definition that are not traced pay one attribute check per selection until untrace_selectors() is called; other
+# definitions that share the selectors are not affected.
+def trace_selectors(definition: GameDefinition):
+    if definition in traced_definitions:
+        return
+    replaced = []
+    seen = set()
+    for action in definition.actions.values():
+        trace_steps(action, replaced, seen)
+    for turn in definition.turns.values():
+        trace_steps(turn.action, replaced, seen)
+    traced_definitions[definition] = replaced
+
+
+def untrace_selectors(definition: GameDefinition):
+    replaced = traced_definitions.pop(definition, None)
+    if replaced is not None:
+        for set_item, key, selector in reversed(replaced):
+            set_item(key, selector)
@@ -0,0 +1,146 @@
+from Game import networks, replay
+import numpy
+import queue
+import random
+import threading
+
+# Training for LearningPlayer outside of select().  A player in deferred or background mode records one transition per
+# decision it learns from: the input, the score the scorer gave the state that followed, and the chooser's output with
+# the chosen options moved to that score.  Deferred players train on their transitions in minibatches when the game
+# ends.  Background players hand them to a Learner, which trains its own copies of the networks on a thread and
+# publishes the weights; the players pick up the latest weights between decisions.  Players given a ReplayStore
+# append their transitions to it and train on a uniform sample of everything stored instead.
+
+ONLINE = "online"
+DEFERRED = "deferred"
+BACKGROUND = "background"
+TRAINING_MODES = (ONLINE, DEFERRED, BACKGROUND)
+BATCH_SIZE = 32
+# Minibatches a Learner trains on between publishing its weights
+SYNC_INTERVAL = 16
+# Minibatches sampled from a ReplayStore at the end of each game
+REPLAY_BATCHES = 4
+
+
+class TransitionBuffer:
+    def __init__(self):
+        self.inputs = []
+        self.scores = []
+        self.choice_targets = []
+        # Which outputs belong to the decision that was made
+        self.masks = []
+
+    def add(self, inputs: numpy.ndarray, score: float, choice_target, mask: numpy.ndarray) -> None:
+        self.inputs.append(inputs)
+        self.scores.append(score)
+        self.choice_targets.append(choice_target)
+        self.masks.append(mask)
+
+    def __len__(self):
+        return len(self.inputs)
+
+    # Returns the transitions as (inputs, scores, choice targets, masks) matrices with one row each, and empties the
+    # buffer
+    def take(self) -> tuple:
+        transitions = (numpy.array(self.inputs, numpy.float32),
+                       numpy.array(self.scores, numpy.float32).reshape(-1, 1),
+                       numpy.array(self.choice_targets, numpy.float32),
+                       numpy.array(self.masks, numpy.bool_))
+        self.inputs = []
+        self.scores = []
+        self.choice_targets = []
+        self.masks = []
+        return transitions
+
+
+# Trains both networks on (inputs, scores, choice targets, masks) transitions in shuffled minibatches.  Returns the
+# number of minibatches.
+def train_minibatches(scorer: networks.NeuralNetwork, chooser: networks.NeuralNetwork, transitions: tuple,
+                      rng: random.Random, batch_size: int = BATCH_SIZE) -> int:
+    inputs, scores, choice_targets, masks = transitions
+    order = list(range(len(inputs)))
+    rng.shuffle(order)
+    batches = 0
+    for start in range(0, len(order), batch_size):
+        rows = order[start:start + batch_size]
+        scorer.train_batch(inputs[rows], scores[rows])
+        # Only the outputs of the decision that was made are trained
+        chooser.train_batch(inputs[rows], choice_targets[rows], masks[rows])
+        batches += 1
+    return batches
+
+
+# Appends the transitions of a game to the store, under a new game id, and returns a uniform sample of everything
+# stored, of batches minibatches, to train on in their place
+def replay_sample(store: replay.ReplayStore, transitions: tuple, rng: random.Random,
+                  batches: int = REPLAY_BATCHES, batch_size: int = BATCH_SIZE) -> tuple:
+    store.append(transitions)
+    indexes, rows = store.sample_uniform(batches * batch_size, numpy.random.default_rng(rng.getrandbits(64)))
+    return rows
+
+
+class Learner:
+    def __init__(self, scorer: networks.NeuralNetwork, chooser: networks.NeuralNetwork, seed: int = None,
+                 batch_size: int = BATCH_SIZE, sync_interval: int = SYNC_INTERVAL):
+        self.scorer = scorer.copy()
+        self.chooser = chooser.copy()
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.sync_interval = sync_interval
+        # The latest published weights of the scorer and the chooser, and how many times they have been published
+        self.weights = (self.scorer.get_weights(), self.chooser.get_weights())
+        self.version = 0
+        # What stopped training, raised again from submit and wait.  Transitions that arrive after it are dropped.
+        self.error = None
+        """:type: Exception"""
+        self.transitions = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, transitions: tuple) -> None:
+        self.raise_error()
+        self.transitions.put(transitions)
+
+    def run(self):
+        unpublished = 0
+        while True:
+            transitions = self.transitions.get()
+            try:
+                if transitions is None:
+                    return
+                if self.error is not None:
+                    continue
+                for start in range(0, len(transitions[0]), self.batch_size * self.sync_interval):
+                    end = start + self.batch_size * self.sync_interval
+                    unpublished += train_minibatches(self.scorer, self.chooser,
+                                                     tuple(field[start:end] for field in transitions),
+                                                     self.random, self.batch_size)
+                    if unpublished >= self.sync_interval:
+                        self.publish()
+                        unpublished = 0
+                if unpublished:
+                    self.publish()
+                    unpublished = 0
+            except Exception as error:
+                self.error = error
+            finally:
+                self.transitions.task_done()
+
+    def publish(self):
+        # Replaced as a whole, so a player never reads a half updated set of weights
+        self.weights = (self.scorer.get_weights(), self.chooser.get_weights())
+        self.version += 1
+
+    # Waits until everything submitted so far has been trained on and published
+    def wait(self) -> None:
+        self.transitions.join()
+        self.raise_error()
+
+    def raise_error(self) -> None:
+        if self.error is not None:
+            raise self.error
+
+    def close(self) -> None:
+        if self.thread.is_alive():
+            self.transitions.put(None)
+            self.thread.join()
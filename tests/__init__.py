@@ -0,0 +1,8 @@
+import os
+from Game import parser
+
+GAMES_PATH = os.path.join(os.path.dirname(__file__), "games")
+
+
+def load_definition(name: str):
+    return parser.parse_definition(os.path.join(GAMES_PATH, name + ".xml"))
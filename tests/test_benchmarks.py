@@ -0,0 +1,54 @@
+import json
+import os
+from click.testing import CliRunner
+from Game.benchmarks import suite
+from tests import GAMES_PATH
+
+
+def benchmark_run(results: dict, game_path: str = "mini.xml") -> dict:
+    return {"date": "2026-01-01T00:00:00", "commit": None, "python": "3", "game_path": game_path, "results": results}
+
+
+def compare(tmp_path, baseline: dict, current: dict):
+    history = tmp_path / "history.json"
+    history.write_text(json.dumps([baseline, current]))
+    return CliRunner().invoke(suite.cli, ["compare", "--history", str(history)])
+
+
+def test_unchanged_runs_pass(tmp_path):
+    results = {"parse": {"ops_per_sec": 100.0}}
+    assert compare(tmp_path, benchmark_run(results), benchmark_run(results)).exit_code == 0
+
+
+def test_slowdown_is_a_regression(tmp_path):
+    result = compare(tmp_path, benchmark_run({"parse": {"ops_per_sec": 100.0}}),
+                     benchmark_run({"parse": {"ops_per_sec": 50.0}}))
+    assert result.exit_code == 1
+
+
+def test_newly_failing_and_missing_scenarios_are_regressions(tmp_path):
+    baseline = benchmark_run({"parse": {"ops_per_sec": 100.0}, "play": {"ops_per_sec": 10.0}})
+    result = compare(tmp_path, baseline, benchmark_run({"parse": {"error": "KeyError: 'x'"}}))
+    assert result.exit_code == 1
+    assert "parse" in result.output and "play" in result.output
+
+
+def test_runs_of_different_games_are_not_compared(tmp_path):
+    results = {"parse": {"ops_per_sec": 100.0}}
+    result = compare(tmp_path, benchmark_run(results), benchmark_run(results, "dominion.xml"))
+    assert result.exit_code != 0
+    assert "different games" in result.output
+
+
+def test_network_input_scenarios_run():
+    game_path = os.path.join(GAMES_PATH, "race.xml")
+    for name in ("network-input", "network-input-cached"):
+        result = suite.time_scenario(name, game_path, 1)
+        assert "error" not in result, result.get("traceback")
+
+
+def test_default_game_parses():
+    from Game import mctsbenchmark, memorybenchmark
+    from Game.benchmarks import scenarios
+    for game_path in (scenarios.DEFAULT_GAME_PATH, mctsbenchmark.DEFAULT_GAME_PATH, memorybenchmark.DEFAULT_GAME_PATH):
+        assert scenarios.load_definition(game_path).new_game(1) is not None
@@ -0,0 +1,80 @@
+import random
+from collections import Counter
+from Game.game import Collection, Piece, missing
+from Game.randomplayer import RandomPlayer
+from tests import load_definition
+
+VALUES = [1, 2, "x"]
+
+
+def assert_consistent(collection: Collection):
+    pieces = list(collection.pieces)
+    assert len(pieces) == len(collection.pieces)
+    assert all(piece.parent is collection for piece in pieces)
+    assert dict(collection.name_counts) == dict(Counter(piece.name for piece in pieces))
+    for name, index in collection.indexes.items():
+        for value in [missing] + VALUES + [True, False]:
+            expected = [piece for piece in pieces
+                        if name in piece.attributes and (value is missing or piece.attributes[name] == value)]
+            assert collection.pieces_with(name, value) == expected, (collection.name, name, value)
+
+
+def test_indexes_and_name_counts_follow_random_changes():
+    rng = random.Random(3)
+    collections = [Collection("c" + str(number)) for number in range(3)]
+
+    def new_piece(number: int) -> Piece:
+        piece = Piece("p" + str(number % 7), None)
+        if rng.random() < .5:
+            piece.attributes["t"] = rng.choice(VALUES)
+        return piece
+    for collection in collections:
+        collection.add_pieces([new_piece(number) for number in range(20)])
+        collection.attribute_index("t")
+    for _ in range(5000):
+        operation = rng.random()
+        collection = rng.choice(collections)
+        if operation < .4 and collection.pieces:
+            moving = rng.sample(list(collection.pieces), rng.randint(1, min(5, len(collection.pieces))))
+            collection.remove_pieces(moving)
+            target = rng.choice(collections)
+            target.add_pieces(moving, rng.choice([None, 0, rng.randint(0, len(target.pieces))]))
+        elif operation < .5:
+            pieces = list(collection.pieces)
+            rng.shuffle(pieces)
+            collection.set_pieces(pieces)
+        elif operation < .6 and collection.pieces:
+            # Copies share their attribute dict until one of them changes an attribute
+            collection.add_pieces([rng.choice(collection.pieces).copy()], rng.randint(0, len(collection.pieces)))
+        elif collection.pieces:
+            piece = rng.choice(collection.pieces)
+            if rng.random() < .3 and "t" in piece.attributes:
+                piece.remove_attribute("t")
+            else:
+                piece.set_attribute("t", rng.choice(VALUES))
+        for checked in collections:
+            assert_consistent(checked)
+
+
+def test_indexes_and_name_counts_follow_games_and_restores():
+    definition = load_definition("race")
+    for seed in range(5):
+        game = definition.new_game(seed)
+        rng = random.Random(seed)
+        decision = game.begin([RandomPlayer(0), RandomPlayer(1)])
+        while decision is not None:
+            collections = list(game.collections.values())
+            for player in game.players:
+                collections.extend(player.collections.values())
+            snapshot = game.snapshot()
+            for _ in range(3):
+                game.machine.resume(rng.sample(decision.choices,
+                                               rng.randint(decision.min_choices, decision.max_choices)))
+                game.machine.run_until_decision()
+                for collection in collections:
+                    assert_consistent(collection)
+                game.restore(snapshot)
+                for collection in collections:
+                    assert_consistent(collection)
+            game.state.release_snapshots()
+            decision = game.resume(decision.ask())
@@ -0,0 +1,53 @@
+from Game import driver, learningplayer, networks, randomplayer, simulation, training
+from tests import load_definition
+
+
+class CountingNetwork(networks.NumpyNetwork):
+    def __init__(self, layer_sizes: list, seed: int):
+        super(CountingNetwork, self).__init__(layer_sizes, seed)
+        self.batches = []
+
+    def run_batch(self, inputs):
+        self.batches.append(len(inputs))
+        return super(CountingNetwork, self).run_batch(inputs)
+
+
+def make_mappers(definition):
+    game = definition.new_game(0)
+    game.start([randomplayer.RandomPlayer(0), randomplayer.RandomPlayer(1)])
+    input_mapper = learningplayer.NeuralNetworkInput(game)
+    output_mapper = learningplayer.NeuralNetworkOutputMapper(game)
+    seed = 1
+    while output_mapper.missing_mappings():
+        definition.new_game(seed).start([learningplayer.ExploratoryPlayer(0, output_mapper),
+                                         learningplayer.ExploratoryPlayer(1, output_mapper)])
+        seed += 1
+    return input_mapper, output_mapper
+
+
+def make_players(input_mapper, output_mapper, scorer, chooser, count):
+    players = []
+    for _ in range(count):
+        player = learningplayer.LearningPlayer(0, input_mapper, output_mapper, scorer, chooser, training.DEFERRED)
+        player.training = False
+        player.exploration_rate = 0
+        players.append([player, randomplayer.RandomPlayer(1)])
+    return players
+
+
+def test_one_network_call_serves_several_games():
+    definition = load_definition("mini")
+    input_mapper, output_mapper = make_mappers(definition)
+    scorer = CountingNetwork([input_mapper.input_length, 8, 1], 1)
+    chooser = CountingNetwork([input_mapper.input_length, 8, output_mapper.output_length], 2)
+    seeds = list(range(10, 18))
+    results = simulation.play_batch(definition, make_players(input_mapper, output_mapper, scorer, chooser, 8), seeds)
+    decisions = sum(result["decisions"][0] for result in results)
+    assert decisions == sum(chooser.batches)
+    assert max(chooser.batches) > 1
+    assert len(chooser.batches) < decisions
+    # Answering together chooses what answering alone would
+    for seed, result in zip(seeds, results):
+        players = make_players(input_mapper, output_mapper, scorer, chooser, 1)
+        assert result["winners"] == [winner.index for winner in
+                                     driver.play_games([definition.new_game(seed)], players)[0]]
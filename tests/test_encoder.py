@@ -0,0 +1,47 @@
+import numpy
+import pickle
+from Game import learningplayer, mctsplayer, randomplayer
+from tests import load_definition
+
+
+class CheckingPlayer(randomplayer.RandomPlayer):
+    def __init__(self, index: int, encoder: learningplayer.NeuralNetworkInput):
+        super(CheckingPlayer, self).__init__(index)
+        self.encoder = encoder
+        self.full = numpy.empty(encoder.input_length, numpy.float32)
+        self.checked = 0
+
+    def select(self, choices, min_choices, max_choices, game_state, current_action):
+        incremental = self.encoder.generate(game_state, current_action)
+        assert (incremental == self.encoder.generate(game_state, current_action, self.full)).all()
+        self.checked += 1
+        return super(CheckingPlayer, self).select(choices, min_choices, max_choices, game_state, current_action)
+
+
+def test_incremental_encoding_matches_a_full_encoding():
+    for name in ("mini", "race"):
+        definition = load_definition(name)
+        game = definition.new_game(3)
+        game.start([randomplayer.RandomPlayer(0), randomplayer.RandomPlayer(1)])
+        encoder = learningplayer.NeuralNetworkInput(game)
+        checked = 0
+        for seed in range(30):
+            checker = CheckingPlayer(0, encoder)
+            # MCTS plays out and restores positions between the checker's decisions
+            opponent = mctsplayer.MCTSPlayer(1, 10) if seed % 3 == 0 else CheckingPlayer(1, encoder)
+            definition.new_game(seed).start([checker, opponent])
+            checked += checker.checked
+        assert checked
+
+
+def test_unpickled_encoder_encodes_the_same():
+    definition = load_definition("mini")
+    game = definition.new_game(3)
+    game.start([randomplayer.RandomPlayer(0), randomplayer.RandomPlayer(1)])
+    encoder = learningplayer.NeuralNetworkInput(game)
+    game = definition.new_game(4)
+    decision = game.begin([randomplayer.RandomPlayer(0), randomplayer.RandomPlayer(1)])
+    for _ in range(3):
+        decision = game.resume(decision.ask())
+    encoded = encoder.generate(game.state, decision.line_num).copy()
+    assert (pickle.loads(pickle.dumps(encoder)).generate(game.state, decision.line_num) == encoded).all()
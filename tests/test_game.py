@@ -0,0 +1,36 @@
+from Game.randomplayer import RandomPlayer
+from tests import load_definition
+
+
+def piece_names(collection) -> list:
+    return [piece.name for piece in collection.pieces]
+
+
+def test_relations_point_at_each_games_own_collections():
+    definition = load_definition("relations")
+    for seed in range(3):
+        game = definition.new_game(seed)
+        game.start([RandomPlayer(0), RandomPlayer(1)])
+        assert game.pieces["marker"].attributes["home"] is game.collections["pile"]
+        assert piece_names(game.collections["pile"]) == ["stone"]
+        assert piece_names(game.collections["board"]) == ["marker", "stone", "stone"]
+    assert piece_names(definition.collections["pile"]) == []
+
+
+def test_pieces_without_relations_share_the_prototype_attributes():
+    definition = load_definition("relations")
+    game = definition.new_game(0)
+    assert game.pieces["stone"] is not definition.pieces["stone"]
+    assert game.pieces["stone"].attributes is definition.pieces["stone"].attributes
+    assert game.pieces["marker"].attributes is not definition.pieces["marker"].attributes
+
+
+def test_assigning_a_piece_attribute_changes_that_game_only():
+    definition = load_definition("pieceattributes")
+    for seed in range(3):
+        game = definition.new_game(seed)
+        game.start([RandomPlayer(0), RandomPlayer(1)])
+        assert [piece.attributes["value"] for piece in game.collections["board"].pieces] == [1, 2]
+        assert game.pieces["stone"].attributes["value"] == 2
+    assert definition.pieces["stone"].attributes == {"value": 1}
+    assert not definition.pieces["stone"].shared
@@ -0,0 +1,24 @@
+import os
+import types
+from Game import gamecache
+from tests import GAMES_PATH
+
+
+def test_cache_key_follows_the_source_of_the_pickled_modules(tmp_path, monkeypatch):
+    source = tmp_path / "module.py"
+    source.write_text("class Piece:\n    __slots__ = ('name',)\n")
+    monkeypatch.setattr(gamecache, "PICKLED_MODULES", (types.SimpleNamespace(__file__=str(source)),))
+    before = gamecache.layout_fingerprint()
+    source.write_text("class Piece:\n    __slots__ = ('name', 'shared')\n")
+    assert gamecache.layout_fingerprint() != before
+
+
+def test_compiled_game_is_read_back_from_the_cache(tmp_path):
+    path = os.path.join(GAMES_PATH, "race.xml")
+    gamecache.clear_cache()
+    definition = gamecache.load_definition(path, str(tmp_path))
+    assert os.listdir(tmp_path)
+    gamecache.clear_cache()
+    cached = gamecache.load_definition(path, str(tmp_path))
+    assert cached is not definition and cached.name == definition.name
+    gamecache.clear_cache()
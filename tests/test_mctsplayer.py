@@ -0,0 +1,67 @@
+import random
+from Game import mctsplayer
+from Game.randomplayer import RandomPlayer
+from tests import load_definition
+
+
+def test_determinize_keeps_the_visible_top_piece():
+    definition = load_definition("race")
+    moved = 0
+    for seed in range(20):
+        game = definition.new_game(seed)
+        game.begin([RandomPlayer(0), RandomPlayer(1)])
+        reserve = game.collections["reserve"]
+        observer = game.players[0]
+        assert reserve.visible_to(reserve.visible_top, observer)
+        before = list(reserve.pieces)
+        snapshot = game.snapshot()
+        mctsplayer.determinize(game, observer, set(), random.Random(seed))
+        after = list(reserve.pieces)
+        assert after[-1] is before[-1]
+        assert sorted(map(id, after)) == sorted(map(id, before))
+        moved += after != before
+        game.restore(snapshot)
+        assert list(reserve.pieces) == before
+    assert moved
+
+
+def test_search_grows_a_tree_below_the_root():
+    definition = load_definition("race")
+    game = definition.new_game(5)
+    decision = game.begin([RandomPlayer(0), RandomPlayer(1)])
+    candidates = mctsplayer.candidate_selections(len(decision.choices), decision.min_choices, decision.max_choices,
+                                                 random.Random(0))
+    observer = decision.player
+    tree = mctsplayer.Node()
+    rng = random.Random(1)
+    root = game.snapshot()
+    depths = []
+    for _ in range(60):
+        mctsplayer.determinize(game, observer, set(map(id, decision.choices)), rng)
+        path, winners = mctsplayer.descend(game, tree, candidates, rng)
+        game.restore(root)
+        for node in path:
+            node.visits += 1
+        depths.append(len(path))
+    assert game.machine.pending is decision
+    assert max(depths) > 3
+    # Each iteration adds one node
+    assert sum(len(node.children) for node in walk(tree)) == 60
+
+
+def test_search_counts_every_iteration_at_the_root():
+    definition = load_definition("race")
+    game = definition.new_game(5)
+    decision = game.begin([RandomPlayer(0), RandomPlayer(1)])
+    candidates = mctsplayer.candidate_selections(len(decision.choices), decision.min_choices, decision.max_choices,
+                                                 random.Random(0))
+    visits, rewards = mctsplayer.search(game, decision.player.index, candidates, 50, None, random.Random(2))
+    assert sum(visits) == 50
+    assert all(0 <= reward <= count for reward, count in zip(rewards, visits))
+    assert game.machine.pending is decision
+
+
+def walk(node):
+    yield node
+    for child in node.children.values():
+        yield from walk(child)
@@ -0,0 +1,71 @@
+import multiprocessing
+import numpy
+import pytest
+from Game.replay import ReplayStore
+
+INPUT_LENGTH = 12
+OUTPUT_LENGTH = 5
+GAMES = 30
+
+
+def game_rows(value: int, rows: int) -> tuple:
+    masks = numpy.zeros((rows, OUTPUT_LENGTH), numpy.bool_)
+    masks[:, value % OUTPUT_LENGTH] = True
+    return (numpy.full((rows, INPUT_LENGTH), value, numpy.float32), numpy.full((rows, 1), value, numpy.float32),
+            numpy.full((rows, OUTPUT_LENGTH), value, numpy.float32), masks)
+
+
+# Each game's rows are filled with a value that only that process and game use
+def append_games(path: str, process: int):
+    store = ReplayStore(path, INPUT_LENGTH, OUTPUT_LENGTH, capacity=8)
+    for game in range(GAMES):
+        store.append(game_rows(process * 1000 + game, 1 + game % 7))
+    store.close()
+
+
+def test_appends_from_two_processes(tmp_path):
+    path = str(tmp_path / "replay")
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=append_games, args=(path, process)) for process in (1, 2)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+    store = ReplayStore(path, INPUT_LENGTH, OUTPUT_LENGTH)
+    count = len(store)
+    assert count == 2 * sum(1 + game % 7 for game in range(GAMES))
+    assert store.capacity >= count
+    inputs, scores, choice_targets, masks = store.read(numpy.arange(count))
+    values = inputs[:, 0]
+    assert (inputs == values[:, None]).all() and (scores[:, 0] == values).all()
+    assert (choice_targets == values[:, None]).all()
+    assert (masks.argmax(axis=1) == values.astype(numpy.int64) % OUTPUT_LENGTH).all()
+    # Each game got its own id, whichever process appended it
+    game_ids = numpy.array(store.game_ids[:count])
+    assert len(set(game_ids.tolist())) == 2 * GAMES
+    for game_id in set(game_ids.tolist()):
+        assert len(set(values[game_ids == game_id].tolist())) == 1
+    store.close()
+
+
+def test_sampling(tmp_path):
+    store = ReplayStore(str(tmp_path / "replay"), INPUT_LENGTH, OUTPUT_LENGTH, capacity=4)
+    for game in range(20):
+        store.append(game_rows(game, 3))
+    rng = numpy.random.default_rng(1)
+    indexes, (inputs, scores, choice_targets, masks) = store.sample_uniform(64, rng)
+    assert inputs.shape == (64, INPUT_LENGTH) and masks.shape == (64, OUTPUT_LENGTH)
+    assert (inputs[:, 0] == indexes // 3).all()
+    store.update_priorities(numpy.arange(3), 1000.0)
+    indexes, rows, weights = store.sample_prioritized(500, rng)
+    assert (indexes < 3).mean() > .5
+    assert weights.max() == 1 and (weights[indexes < 3] < 1).all()
+    store.close()
+
+
+def test_mismatched_row_widths_are_refused(tmp_path):
+    path = str(tmp_path / "replay")
+    ReplayStore(path, INPUT_LENGTH, OUTPUT_LENGTH).close()
+    with pytest.raises(ValueError):
+        ReplayStore(path, INPUT_LENGTH + 1, OUTPUT_LENGTH)
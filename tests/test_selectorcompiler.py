@@ -0,0 +1,73 @@
+import random
+from Game import selectors as selector_models, tests as test_models
+from Game.game import Action
+from Game.randomplayer import RandomPlayer
+from Game.steps import Step
+from tests import load_definition
+
+
+# The selectors and tests that selectorcompiler installed a compiled closure on
+def compiled_nodes(definition) -> list:
+    nodes = []
+    seen = set()
+
+    def walk(obj):
+        if id(obj) in seen:
+            return
+        seen.add(id(obj))
+        if isinstance(obj, (selector_models.Selector, test_models.Test)):
+            nodes.append(obj)
+        elif isinstance(obj, Action):
+            for step in obj.steps:
+                walk(step)
+        elif isinstance(obj, Step):
+            for value in vars(obj).values():
+                walk(value)
+        elif isinstance(obj, dict):
+            for value in obj.values():
+                walk(value)
+        elif isinstance(obj, (list, tuple)):
+            for value in obj:
+                walk(value)
+    for action in definition.actions.values():
+        walk(action)
+    return nodes
+
+
+# Runs the compiled closure and the tree method from the same random state.  Returns their results, or the exception
+# types for an evaluation that failed.
+def evaluate_both(node, game_state):
+    tree = type(node).select if isinstance(node, selector_models.Selector) else type(node).test
+    compiled = node.select if isinstance(node, selector_models.Selector) else node.test
+    random_state = game_state.random.getstate()
+    results = []
+    for evaluate in (compiled, lambda state: tree(node, state)):
+        game_state.random.setstate(random_state)
+        try:
+            results.append(evaluate(game_state))
+        except Exception as error:
+            results.append(type(error))
+    game_state.random.setstate(random_state)
+    return results
+
+
+def test_compiled_selectors_match_tree_selectors():
+    for name in ("race", "mini"):
+        definition = load_definition(name)
+        nodes = compiled_nodes(definition)
+        assert all("select" in vars(node) or "test" in vars(node) for node in nodes)
+        for seed in range(5):
+            game = definition.new_game(seed)
+            rng = random.Random(seed)
+            decision = game.begin([RandomPlayer(0), RandomPlayer(1)])
+            checked = 0
+            while decision is not None:
+                for node in nodes:
+                    compiled, tree = evaluate_both(node, game.state)
+                    if type(compiled) is type and type(tree) is type:
+                        continue
+                    assert compiled == tree, str(node)
+                    checked += 1
+                decision = game.resume(rng.sample(decision.choices,
+                                                  rng.randint(decision.min_choices, decision.max_choices)))
+            assert checked
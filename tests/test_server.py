@@ -0,0 +1,81 @@
+import asyncio
+import json
+import socket
+from Game.server import Connection, GameHost, RemotePlayer
+
+
+async def connected_pair():
+    server_socket, client_socket = socket.socketpair()
+    reader, writer = await asyncio.open_unix_connection(sock=server_socket)
+    client_reader, client_writer = await asyncio.open_unix_connection(sock=client_socket)
+    return Connection(reader, writer), client_reader, client_writer
+
+
+async def read_message(reader: asyncio.StreamReader) -> dict:
+    return json.loads((await reader.readline()).decode())
+
+
+def write_message(writer: asyncio.StreamWriter, message: dict):
+    writer.write(json.dumps(message).encode() + b"\n")
+
+
+def test_late_answer_is_not_taken_for_the_next_decision():
+    async def run():
+        connection, reader, writer = await connected_pair()
+        player = RemotePlayer(0, connection, 0.2)
+        choices = ["a", "b", "c"]
+        # The first decision times out and gets the smallest selection
+        assert await player.select_async(choices, 1, 1, None, 1) == ["a"]
+        first = await read_message(reader)
+        assert player.timeouts == 1
+        # Its late answer arrives while the second decision is pending, and is dropped
+        second_decision = asyncio.ensure_future(player.select_async(choices, 1, 1, None, 2))
+        second = await read_message(reader)
+        assert second["id"] != first["id"]
+        write_message(writer, {"id": first["id"], "choices": [2]})
+        write_message(writer, {"id": second["id"], "choices": [1]})
+        assert await second_decision == ["b"]
+        await connection.close()
+        writer.close()
+    asyncio.run(run())
+
+
+def test_malformed_answer_is_reported_and_the_decision_stays_open():
+    async def run():
+        connection, reader, writer = await connected_pair()
+        player = RemotePlayer(0, connection, 5)
+        decision = asyncio.ensure_future(player.select_async(["a", "b", "c"], 1, 1, None, 1))
+        select = await read_message(reader)
+        writer.write(b"{not json\n")
+        error = await read_message(reader)
+        assert error["type"] == "error" and error["id"] == select["id"]
+        write_message(writer, {"id": select["id"], "choices": [2]})
+        assert await decision == ["c"]
+        await connection.close()
+        writer.close()
+    asyncio.run(run())
+
+
+class FailingDefinition:
+    def new_game(self):
+        return FailingGame()
+
+
+class FailingGame:
+    seed = 0
+
+    def begin(self, players):
+        raise RuntimeError("broken game")
+
+
+def test_failing_session_ends_its_clients_and_is_not_raised():
+    async def run():
+        connection, reader, writer = await connected_pair()
+        host = GameHost(FailingDefinition(), 1)
+        await host.run_session([connection])
+        await read_message(reader)
+        end = await read_message(reader)
+        assert end["type"] == "end" and end["error"]
+        assert host.games_played == 0
+        writer.close()
+    asyncio.run(run())
@@ -0,0 +1,72 @@
+import random
+from Game.randomplayer import RandomPlayer
+from tests import load_definition
+
+
+def collections_of(game) -> list:
+    collections = sorted(game.collections.items())
+    for player in game.players:
+        collections.extend(((player.index, name), collection) for name, collection in sorted(player.collections.items()))
+    return collections
+
+
+# Everything a restore has to put back, with pieces by identity
+def signature(game) -> list:
+    result = []
+    for name, collection in collections_of(game):
+        result.append((name, [id(piece) for piece in collection.pieces], dict(collection.name_counts),
+                       [piece.parent is collection for piece in collection.pieces],
+                       [dict(piece.attributes) for piece in collection.pieces], dict(collection.attributes)))
+    result.append(dict(game.attributes))
+    result.append([dict(player.attributes) for player in game.players])
+    result.append([(turn.name, dict(turn.attributes)) for turn in game.turns.values()])
+    state = game.state
+    result.append((state.player, list(state.turns), sorted(state.vars), list(state.winners), state.random.getstate()))
+    return result
+
+
+def play_out(game, rng: random.Random) -> list:
+    selections = []
+    decision = game.machine.pending
+    while decision is not None:
+        chosen = rng.sample(decision.choices, rng.randint(decision.min_choices, decision.max_choices))
+        selections.append(chosen)
+        game.machine.resume(chosen)
+        decision = game.machine.run_until_decision()
+    return selections
+
+
+def test_restore_returns_to_the_snapshot():
+    definition = load_definition("race")
+    for seed in range(10):
+        game = definition.new_game(seed)
+        rng = random.Random(seed)
+        decision = game.begin([RandomPlayer(0), RandomPlayer(1), RandomPlayer(2)])
+        while decision is not None:
+            before = signature(game)
+            snapshot = game.snapshot()
+            for _ in range(2):
+                play_out(game, rng)
+                game.restore(snapshot)
+                assert signature(game) == before
+            game.state.release_snapshots()
+            decision = game.resume(decision.ask())
+
+
+def test_replaying_after_restore_plays_the_same_game():
+    definition = load_definition("race")
+    game = definition.new_game(3)
+    rng = random.Random(3)
+    decision = game.begin([RandomPlayer(0), RandomPlayer(1)])
+    for _ in range(5):
+        decision = game.resume(decision.ask())
+    snapshot = game.snapshot()
+    selections = play_out(game, rng)
+    ended = signature(game)
+    game.restore(snapshot)
+    decision = game.machine.pending
+    for chosen in selections:
+        game.machine.resume(chosen)
+        decision = game.machine.run_until_decision()
+    assert decision is None
+    assert signature(game) == ended
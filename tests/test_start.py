@@ -0,0 +1,14 @@
+import os
+from click.testing import CliRunner
+from Game import start
+from tests import GAMES_PATH
+
+MINI = os.path.join(GAMES_PATH, "mini.xml")
+
+
+def test_options_without_a_command_start_a_game():
+    plain = CliRunner().invoke(start.cli, ["--game_path", MINI, "--players", "Random,Random", "--seed", "1"])
+    named = CliRunner().invoke(start.cli, ["start", "--game_path", MINI, "--players", "Random,Random", "--seed", "1"])
+    assert plain.exit_code == 0, plain.output
+    assert plain.output == named.output
+    assert "Winners" in plain.output
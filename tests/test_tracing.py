@@ -0,0 +1,64 @@
+from Game import tracing
+from Game.randomplayer import RandomPlayer
+from Game.steps import TestStep, WhileStep
+from Game.tests import TestComparison, TestExists
+from tests import load_definition
+
+
+class SelectCounter(tracing.Tracer):
+    def __init__(self):
+        self.selects = 0
+
+    def on_select(self, selector, game_state, result):
+        self.selects += 1
+
+
+def traced_game(definition, seed: int = 1) -> SelectCounter:
+    tracer = SelectCounter()
+    game = definition.new_game(seed)
+    game.start([RandomPlayer(0), RandomPlayer(1)], lambda game_state: tracing.TracingMachine(game_state, tracer))
+    return tracer
+
+
+def test_tracing_a_definition_leaves_definitions_sharing_its_selectors_alone():
+    traced = load_definition("mini")
+    other = load_definition("mini")
+    # Selectors are interned, so both definitions use the same selector objects
+    assert traced.actions["action_take"].steps[2].pieces is other.actions["action_take"].steps[2].pieces
+    tracing.trace_selectors(traced)
+    try:
+        assert traced_game(traced).selects
+        assert traced_game(other).selects == 0
+        tracing.trace_selectors(other)
+        tracing.untrace_selectors(other)
+        assert traced_game(traced).selects
+    finally:
+        tracing.untrace_selectors(traced)
+    assert traced_game(traced).selects == 0
+
+
+class SelectRecorder(tracing.Tracer):
+    def __init__(self):
+        self.selectors = set()
+
+    def on_select(self, selector, game_state, result):
+        self.selectors.add(id(selector))
+
+
+def test_selectors_of_if_and_repeat_conditions_are_traced():
+    definition = load_definition("race")
+    repeat = next(step for step in definition.actions["action_start"].steps if isinstance(step, WhileStep))
+    conditions = [step for step in definition.actions["action_play"].steps if isinstance(step, TestStep)]
+    operands = [repeat.test.obj1] + [condition.test.selector for condition in conditions
+                                     if isinstance(condition.test, TestExists)] + \
+        [condition.test.obj1 for condition in conditions if isinstance(condition.test, TestComparison)]
+    assert len(operands) == 3
+    tracing.trace_selectors(definition)
+    try:
+        tracer = SelectRecorder()
+        game = definition.new_game(1)
+        game.start([RandomPlayer(0), RandomPlayer(1)], lambda game_state: tracing.TracingMachine(game_state, tracer))
+        assert all(id(operand) in tracer.selectors for operand in operands)
+    finally:
+        tracing.untrace_selectors(definition)
+    assert "test" in vars(repeat.test)
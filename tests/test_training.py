@@ -0,0 +1,80 @@
+import numpy
+import pytest
+import random
+from Game import networks, training
+
+
+def transitions(rows: int, input_length: int = 6, output_length: int = 3) -> tuple:
+    rng = numpy.random.default_rng(rows)
+    return (rng.random((rows, input_length), numpy.float32), rng.random((rows, 1), numpy.float32),
+            rng.random((rows, output_length), numpy.float32), numpy.ones((rows, output_length), numpy.bool_))
+
+
+def test_learner_publishes_what_it_trained():
+    scorer = networks.NumpyNetwork([6, 4, 1], seed=1)
+    chooser = networks.NumpyNetwork([6, 4, 3], seed=2)
+    learner = training.Learner(scorer, chooser, seed=3, batch_size=8, sync_interval=2)
+    try:
+        learner.submit(transitions(40))
+        learner.wait()
+        assert learner.version >= 1
+        assert not all((before == after).all() for before, after in zip(scorer.get_weights(), learner.weights[0]))
+    finally:
+        learner.close()
+
+
+def test_learner_error_is_raised_instead_of_hanging():
+    learner = training.Learner(networks.NumpyNetwork([6, 4, 1], seed=1), networks.NumpyNetwork([6, 4, 3], seed=2))
+    try:
+        # Rows of the wrong width make training fail
+        learner.submit(transitions(10, input_length=5))
+        learner.transitions.put(transitions(10))
+        with pytest.raises(ValueError):
+            learner.wait()
+        with pytest.raises(ValueError):
+            learner.submit(transitions(10))
+    finally:
+        learner.close()
+    assert not learner.thread.is_alive()
+
+
+def test_train_minibatches_counts_batches():
+    scorer = networks.NumpyNetwork([6, 4, 1], seed=1)
+    chooser = networks.NumpyNetwork([6, 4, 3], seed=2)
+    assert training.train_minibatches(scorer, chooser, transitions(70), random.Random(1), 32) == 3
+
+
+def test_fann_network_weights_round_trip():
+    pytest.importorskip("fann2")
+    network = networks.create_network(6, 3, "fann")
+    inputs = transitions(1)[0][0]
+    copied = network.copy()
+    assert (copied.run(inputs) == network.run(inputs)).all()
+    copied.train(inputs, [1, 0, 1])
+    network.set_weights(copied.get_weights())
+    assert (copied.run(inputs) == network.run(inputs)).all()
+
+
+def test_masked_outputs_are_not_trained():
+    chooser = networks.NumpyNetwork([6, 4, 3], seed=2)
+    inputs, scores, choice_targets, masks = transitions(16)
+    masks[:] = [True, False, True]
+    before = chooser.get_weights()
+    training.train_minibatches(networks.NumpyNetwork([6, 4, 1], seed=1), chooser,
+                               (inputs, scores, choice_targets, masks), random.Random(1), 8)
+    after = chooser.get_weights()
+    # The output layer's weights and bias for the masked out output did not move
+    assert (before[1][:, 1] == after[1][:, 1]).all() and before[3][1] == after[3][1]
+    assert not (before[1][:, 0] == after[1][:, 0]).all()
+
+def test_every_backend_can_share_its_weights():
+    with pytest.raises(TypeError):
+        networks.NeuralNetwork()
+    for backend in (networks.NumpyNetwork, networks.FannNetwork):
+        assert not backend.__abstractmethods__
+    network = networks.NumpyNetwork([3, 4, 2], 1)
+    copy = network.copy()
+    copy.train_batch(numpy.ones((2, 3), numpy.float32), numpy.zeros((2, 2), numpy.float32))
+    assert (copy.run([1, 1, 1]) != network.run([1, 1, 1])).any()
+    network.set_weights(copy.get_weights())
+    assert (copy.run([1, 1, 1]) == network.run([1, 1, 1])).all()